@@ -8,6 +8,7 @@ from .models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightSchedule,
     Order,
     Ticket
 )
@@ -31,4 +32,5 @@ admin.site.register(Route)
 admin.site.register(AirplaneType)
 admin.site.register(Airplane)
 admin.site.register(Flight)
+admin.site.register(FlightSchedule)
 admin.site.register(Ticket)
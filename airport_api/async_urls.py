@@ -0,0 +1,51 @@
+from django.urls import include, path, re_path
+
+from .async_views import DETAIL_ACTIONS, LIST_ACTIONS, AsyncReadView
+from .urls import router
+from .views import (
+    AirplaneTypeViewSet,
+    AirplaneViewSet,
+    AirportViewSet,
+    CityViewSet,
+    CountryViewSet,
+    FlightViewSet,
+    RouteViewSet,
+)
+
+ASYNC_VIEWSETS = {
+    "countries": CountryViewSet,
+    "cities": CityViewSet,
+    "airports": AirportViewSet,
+    "routes": RouteViewSet,
+    "airplane_types": AirplaneTypeViewSet,
+    "airplanes": AirplaneViewSet,
+    "flights": FlightViewSet,
+}
+
+urlpatterns = []
+for prefix, viewset in ASYNC_VIEWSETS.items():
+    basename = router.get_default_basename(viewset)
+    urlpatterns += [
+        re_path(
+            rf"^{prefix}/$",
+            AsyncReadView.as_view(viewset=viewset, actions=LIST_ACTIONS),
+            name=f"{basename}-list",
+        ),
+        re_path(
+            rf"^{prefix}/(?P<pk>[^/.]+)/$",
+            AsyncReadView.as_view(viewset=viewset, actions=DETAIL_ACTIONS),
+            name=f"{basename}-detail",
+        ),
+    ]
+
+urlpatterns += [
+    re_path(
+        r"^flights/(?P<pk>[^/.]+)/seats/$",
+        AsyncReadView.as_view(viewset=FlightViewSet, actions={"get": "seats"}),
+        name="flight-seats",
+    ),
+    # Everything else is served by the regular viewsets
+    path("", include(router.urls)),
+]
+
+app_name = "api_airport"
@@ -0,0 +1,172 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from user.authentication import aget_jwt_user
+
+LIST_ACTIONS = {"get": "list", "post": "create"}
+DETAIL_ACTIONS = {
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+}
+
+
+async def authenticate(request: Request) -> None:
+    """Resolve ``request.user`` before DRF would do it synchronously.
+
+    JWT users are loaded from the cache or with the async ORM; any other
+    authenticator runs in the worker thread. Afterwards ``request.user``
+    is set, so ``APIView.initial`` performs no more database work.
+    """
+    try:
+        for authenticator in request.authenticators:
+            if isinstance(authenticator, JWTAuthentication):
+                header = authenticator.get_header(request)
+                raw_token = header and authenticator.get_raw_token(header)
+                if not raw_token:
+                    continue
+                token = authenticator.get_validated_token(raw_token)
+                if hasattr(authenticator, "aget_user"):
+                    user = await authenticator.aget_user(token)
+                else:
+                    user = await aget_jwt_user(authenticator, token)
+                result = (user, token)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = result
+                return
+    except exceptions.APIException:
+        request._not_authenticated()
+        raise
+    request._not_authenticated()
+
+
+class AsyncReadMixin:
+    """Async ``list`` and ``retrieve`` for the ASGI read path.
+
+    Filtering, sparse fields and serializers are the viewset's own; only
+    the queries are awaited. Serializers must find every relation they
+    render already loaded, which the ``select_related_fields`` and
+    ``prefetch_related_fields`` hints of the serializers take care of.
+    Mixins wrapping ``list`` and ``retrieve`` wrap ``alist`` and
+    ``aretrieve`` the same way.
+    """
+
+    throttles_awaited = False
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # DRF paginators evaluate the page inside paginate_queryset; the
+        # async ORM of Django 4.2 runs queries in the same worker thread
+        page = await sync_to_async(self.paginate_queryset)(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(
+            [instance async for instance in queryset], many=True
+        )
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    def check_throttles(self, request):
+        # AsyncReadView awaits them once initial() checked the permissions
+        if not self.throttles_awaited:
+            super().check_throttles(request)
+
+    async def acheck_throttles(self, request):
+        """``check_throttles`` with the rate limiter awaited"""
+        durations = []
+        for throttle in self.get_throttles():
+            if hasattr(throttle, "aallow_request"):
+                allowed = await throttle.aallow_request(request, self)
+            else:
+                allowed = await sync_to_async(throttle.allow_request)(
+                    request, self
+                )
+            if not allowed:
+                durations.append(throttle.wait())
+        if durations:
+            durations = [duration for duration in durations if duration is not None]
+            self.throttled(request, max(durations, default=None))
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (
+                queryset.model.DoesNotExist,
+                DjangoValidationError,
+                TypeError,
+                ValueError,
+        ):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+
+class AsyncReadView(View):
+    """Serve a viewset's GET requests on the event loop.
+
+    The viewset goes through its usual DRF request cycle with
+    authentication, throttles and the action awaited (``a<action>``
+    methods), so one ASGI worker keeps many slow clients in flight
+    without tying a thread to each of them while they read. Other
+    methods are handed to the regular viewset, which Django runs in a
+    worker thread.
+    """
+
+    viewset = None
+    actions = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Metrics label the view like the viewset it serves
+        view.cls = initkwargs["viewset"]
+        view.actions = initkwargs["actions"]
+        # Like APIView, leave CSRF to the session authentication
+        view.csrf_exempt = True
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        view = self.viewset(
+            action_map={"head": self.actions["get"], **self.actions}
+        )
+        view.args, view.kwargs = args, kwargs
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+        try:
+            await authenticate(request)
+            view.throttles_awaited = True
+            view.initial(request, *args, **kwargs)
+            await view.acheck_throttles(request)
+            handler = getattr(view, f"a{view.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+    async def delegate(self, request, *args, **kwargs):
+        view = self.viewset.as_view(self.actions)
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+    post = put = patch = delete = options = delegate
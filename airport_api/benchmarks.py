@@ -0,0 +1,400 @@
+import gc
+import math
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from .models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from .flight_search import refresh_search_entries
+from .seat_map import SeatMap
+from .tasks import update_flying_hours
+
+ROWS = 30
+SEATS_IN_ROW = 6
+SOLD_PER_FLIGHT = 120
+TICKETS_PER_ORDER = 3
+
+
+def seed_dataset(tickets: int, seed: int = 42, batch_size: int = 5000) -> dict:
+    """Create a synthetic schedule with ``tickets`` sold tickets.
+
+    Flights are two thirds full and split evenly between landed and
+    upcoming ones, every flight has four crew members and every order
+    holds three tickets. Seat maps and sold counters match the tickets.
+    """
+    rng = random.Random(seed)
+    country = Country.objects.create(name="Benchmark Country")
+    cities = City.objects.bulk_create(
+        City(name=f"Benchmark City {index}", country=country)
+        for index in range(10)
+    )
+    airports = Airport.objects.bulk_create(
+        Airport(name=f"Benchmark Airport {index}", closest_big_city=cities[index % 10])
+        for index in range(50)
+    )
+    routes = Route.objects.bulk_create(
+        Route(
+            source=source,
+            destination=destination,
+            distance=rng.randrange(300, 9000),
+        )
+        for source, destination in (rng.sample(airports, 2) for _ in range(200))
+    )
+    airplane_type = AirplaneType.objects.create(name="Benchmark Type")
+    airplanes = Airplane.objects.bulk_create(
+        Airplane(
+            name=f"Benchmark Airplane {index}",
+            rows=ROWS,
+            seats_in_row=SEATS_IN_ROW,
+            airplane_type=airplane_type,
+        )
+        for index in range(20)
+    )
+    crews = Crew.objects.bulk_create(
+        Crew(first_name="Benchmark", last_name=f"Crew {index}")
+        for index in range(100)
+    )
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(email=f"benchmark{index}@example.com")
+        for index in range(max(10, tickets // 100))
+    )
+
+    flight_count = max(50, math.ceil(tickets / SOLD_PER_FLIGHT))
+    now = timezone.now().replace(minute=0, second=0, microsecond=0)
+    flights = []
+    for index in range(flight_count):
+        offset = timedelta(hours=index // 2 + 3)
+        departure_time = now + offset if index % 2 else now - offset - timedelta(days=1)
+        flights.append(
+            Flight(
+                route=rng.choice(routes),
+                airplane=rng.choice(airplanes),
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(
+                    minutes=rng.randrange(45, 600)
+                ),
+            )
+        )
+    Flight.objects.bulk_create(flights, batch_size=batch_size)
+    Flight.crews.through.objects.bulk_create(
+        (
+            Flight.crews.through(flight_id=flight.id, crew_id=crew.id)
+            for flight in flights
+            for crew in rng.sample(crews, 4)
+        ),
+        batch_size=batch_size,
+    )
+
+    remaining = tickets
+    pending, order = [], None
+    for flight in flights:
+        seat_map = SeatMap(ROWS, SEATS_IN_ROW)
+        for index in range(min(SOLD_PER_FLIGHT, remaining)):
+            if order is None or len(pending) % TICKETS_PER_ORDER == 0:
+                order = Order.objects.create(user=rng.choice(users))
+            row, seat = seat_map.position(index)
+            seat_map.take(row, seat)
+            pending.append(Ticket(row=row, seat=seat, flight=flight, order=order))
+            if len(pending) >= batch_size:
+                Ticket.objects.bulk_create(pending)
+                pending = []
+        remaining -= len(seat_map)
+        flight.seat_map = bytes(seat_map)
+        flight.seats_sold = len(seat_map)
+    Ticket.objects.bulk_create(pending)
+    Flight.objects.bulk_update(
+        flights, ["seat_map", "seats_sold"], batch_size=batch_size
+    )
+    refresh_search_entries(Flight.objects.all(), batch_size=batch_size)
+    return {
+        "flights": flights,
+        "airports": airports,
+        "airplane_type": airplane_type,
+        "users": users,
+        "tickets": tickets,
+    }
+
+
+class Scenario:
+    """A request or task measured repeatedly on the seeded dataset"""
+
+    def __init__(
+            self,
+            name: str,
+            run: Callable[[int], object],
+            expected_status: int = None,
+            prepare: Callable[[int], None] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.expected_status = expected_status
+        self.prepare = prepare
+
+    def execute(self, iteration: int):
+        result = self.run(iteration)
+        if (
+                self.expected_status is not None
+                and result.status_code != self.expected_status
+        ):
+            raise AssertionError(
+                f"{self.name}: expected {self.expected_status}, "
+                f"got {result.status_code}"
+            )
+        return result
+
+
+def build_scenarios(dataset: dict, runs: int, order_tickets: int) -> list[Scenario]:
+    rng = random.Random(7)
+    flights = dataset["flights"]
+    upcoming = [flight for flight in flights if flight.departure_time > timezone.now()]
+    landed = [flight.id for flight in flights if flight not in upcoming]
+
+    admin = get_user_model().objects.create_user(
+        email="benchmark-admin@example.com", password="benchmark", is_staff=True
+    )
+    admin_client = APIClient()
+    admin_client.force_authenticate(admin)
+    user_client = APIClient()
+    user_client.force_authenticate(dataset["users"][0])
+
+    # A large empty flight gives every order a fresh block of seats
+    order_rows = math.ceil(runs * order_tickets / SEATS_IN_ROW) + 1
+    order_flight = Flight.objects.create(
+        route=upcoming[0].route,
+        airplane=Airplane.objects.create(
+            name="Benchmark Order Airplane",
+            rows=order_rows,
+            seats_in_row=SEATS_IN_ROW,
+            airplane_type=dataset["airplane_type"],
+        ),
+        departure_time=timezone.now() + timedelta(days=30),
+        arrival_time=timezone.now() + timedelta(days=30, hours=2),
+    )
+
+    def order_payload(iteration: int) -> dict:
+        first = iteration * order_tickets
+        return {
+            "tickets": [
+                {
+                    "row": index // SEATS_IN_ROW + 1,
+                    "seat": index % SEATS_IN_ROW + 1,
+                    "flight": order_flight.id,
+                }
+                for index in range(first, first + order_tickets)
+            ]
+        }
+
+    flight_list_url = reverse("api_airport:flight-list")
+    filter_day = timezone.localdate(upcoming[len(upcoming) // 2].departure_time)
+    source_name = upcoming[0].route.source.name
+
+    def reset_landed(iteration: int) -> None:
+        Flight.objects.filter(id__in=landed).update(accounted=False)
+
+    return [
+        Scenario(
+            "flight_list",
+            lambda iteration: user_client.get(flight_list_url),
+            200,
+        ),
+        Scenario(
+            "flight_list_filtered",
+            lambda iteration: user_client.get(
+                flight_list_url,
+                {"from": source_name, "departure_date": filter_day.isoformat()},
+            ),
+            200,
+        ),
+        Scenario(
+            "flight_retrieve",
+            lambda iteration: user_client.get(
+                reverse(
+                    "api_airport:flight-detail",
+                    args=[rng.choice(flights).id]
+                )
+            ),
+            200,
+        ),
+        Scenario(
+            "route_list",
+            lambda iteration: user_client.get(reverse("api_airport:route-list")),
+            200,
+        ),
+        Scenario(
+            "ticket_list",
+            lambda iteration: admin_client.get(reverse("api_airport:ticket-list")),
+            200,
+        ),
+        Scenario(
+            f"order_create_{order_tickets}_tickets",
+            lambda iteration: user_client.post(
+                reverse("api_airport:order-list"),
+                order_payload(iteration),
+                format="json",
+            ),
+            201,
+        ),
+        Scenario(
+            "update_flying_hours",
+            lambda iteration: update_flying_hours(),
+            prepare=reset_landed,
+        ),
+    ]
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def measure(
+        scenario: Scenario,
+        iterations: int,
+        warmup: int,
+        memory_iterations: int,
+        start: int = 0,
+) -> dict:
+    """Time ``iterations`` runs, then count queries and peak memory.
+
+    Query counting and tracemalloc slow requests down, so they are
+    measured in separate runs that do not contribute to the latency.
+    """
+    iteration = start
+    for _ in range(warmup):
+        if scenario.prepare:
+            scenario.prepare(iteration)
+        scenario.execute(iteration)
+        iteration += 1
+
+    timings = []
+    for _ in range(iterations):
+        if scenario.prepare:
+            scenario.prepare(iteration)
+        gc.collect()
+        started = time.perf_counter()
+        scenario.execute(iteration)
+        timings.append((time.perf_counter() - started) * 1000)
+        iteration += 1
+
+    queries, peaks = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            if scenario.prepare:
+                scenario.prepare(iteration)
+            gc.collect()
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            with CaptureQueriesContext(connection) as context:
+                scenario.execute(iteration)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            queries.append(len(context.captured_queries))
+            iteration += 1
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": max(queries, default=0),
+        "peak_memory_kb": round(max(peaks, default=0) / 1024, 1),
+    }
+
+
+def run_suite(
+        tickets: int,
+        iterations: int,
+        warmup: int,
+        memory_iterations: int,
+        order_tickets: int,
+        only: list[str] = None,
+        log: Callable[[str], None] = print,
+) -> dict:
+    seed_started = time.perf_counter()
+    dataset = seed_dataset(tickets)
+    log(
+        f"Seeded {tickets} tickets on {len(dataset['flights'])} flights "
+        f"in {time.perf_counter() - seed_started:.1f}s"
+    )
+    runs = warmup + iterations + memory_iterations
+    results = {}
+    for scenario in build_scenarios(dataset, runs, order_tickets):
+        if only and scenario.name not in only:
+            continue
+        # Scenarios repeat requests of one user beyond the throttle rates
+        with override_settings(
+                RATE_LIMITER={**settings.RATE_LIMITER, "ENABLED": False}
+        ):
+            results[scenario.name] = measure(
+                scenario, iterations, warmup, memory_iterations
+            )
+        log(
+            f"{scenario.name}: p50={results[scenario.name]['p50_ms']}ms "
+            f"p95={results[scenario.name]['p95_ms']}ms "
+            f"queries={results[scenario.name]['queries']} "
+            f"peak={results[scenario.name]['peak_memory_kb']}KB"
+        )
+    return {
+        "meta": {
+            "tickets": tickets,
+            "flights": len(dataset["flights"]),
+            "iterations": iterations,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "created_at": timezone.now().isoformat(),
+        },
+        "results": results,
+    }
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Compare a run with a stored baseline of the same shape.
+
+    Latency and memory may grow by ``tolerance`` (plus a small absolute
+    margin that absorbs noise on very fast scenarios); any extra query
+    is a regression.
+    """
+    margins = {"p50_ms": 1.0, "p95_ms": 2.0, "peak_memory_kb": 64.0}
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for metric, margin in margins.items():
+            limit = previous[metric] * (1 + tolerance) + margin
+            if current[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {current[metric]} > {previous[metric]}"
+                )
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: queries {current['queries']} > {previous['queries']}"
+            )
+    return regressions
@@ -0,0 +1,321 @@
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .replicas import primary_reads
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class LocalCache:
+    """Per-process LRU cache with a time-to-live on every entry"""
+
+    def __init__(self, max_entries: int, timeout: float):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ReferenceCache:
+    """Two-tier cache for rarely changing reference data.
+
+    Entries live in a per-process LRU (L1) and in the shared Django cache
+    (L2, Redis in production). Every key embeds the current version token
+    of each model it depends on, so bumping a model version on save or
+    delete makes older entries unreachable instead of deleting them.
+
+    Version tokens are stored in L2. When ``PUBSUB_URL`` is configured,
+    bumps are also published on a Redis channel and every process keeps
+    the latest tokens in memory, so an L1 hit needs no network round trip.
+    Without pub/sub the tokens are read from L2 on every lookup.
+    """
+
+    channel = "airport_api:reference-cache"
+
+    def __init__(self):
+        self._local = None
+        self._versions = {}
+        self._client = None
+        self._subscriber = None
+        self._subscribed = threading.Event()
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def options(self) -> dict:
+        return settings.REFERENCE_CACHE
+
+    @property
+    def shared(self):
+        return caches[self.options["ALIAS"]]
+
+    @property
+    def local(self) -> LocalCache:
+        if self._local is None:
+            self._local = LocalCache(
+                self.options["L1_MAX_ENTRIES"],
+                self.options["L1_TIMEOUT"]
+            )
+        return self._local
+
+    @staticmethod
+    def new_token() -> str:
+        # Tokens start with their creation time, the latest possible change
+        return f"{time.time():.6f}-{uuid.uuid4().hex}"
+
+    @staticmethod
+    def changed_at(token: str) -> float | None:
+        """Time a version token was created, ``None`` for older tokens"""
+        created, separator, _ = token.partition("-")
+        return float(created) if separator else None
+
+    @staticmethod
+    def version_key(label: str) -> str:
+        return f"reference-cache:version:{label}"
+
+    def _missing_versions(self, labels: list[str]) -> list[str]:
+        self._ensure_subscriber()
+        if self._subscribed.is_set():
+            return [label for label in labels if label not in self._versions]
+        return labels
+
+    def versions(self, labels: list[str]) -> list[str]:
+        missing = self._missing_versions(labels)
+        if missing:
+            stored = self.shared.get_many(
+                [self.version_key(label) for label in missing]
+            )
+            for label in missing:
+                token = stored.get(self.version_key(label))
+                if token is None:
+                    token = self.new_token()
+                    if not self.shared.add(self.version_key(label), token, None):
+                        token = self.shared.get(self.version_key(label), token)
+                self._versions[label] = token
+        return [self._versions[label] for label in labels]
+
+    async def aversions(self, labels: list[str]) -> list[str]:
+        missing = self._missing_versions(labels)
+        if missing:
+            stored = await self.shared.aget_many(
+                [self.version_key(label) for label in missing]
+            )
+            for label in missing:
+                token = stored.get(self.version_key(label))
+                if token is None:
+                    token = self.new_token()
+                    key = self.version_key(label)
+                    if not await self.shared.aadd(key, token, None):
+                        token = await self.shared.aget(key, token)
+                self._versions[label] = token
+        return [self._versions[label] for label in labels]
+
+    def bump(self, label: str) -> None:
+        token = self.new_token()
+        self.shared.set(self.version_key(label), token, None)
+        self._versions[label] = token
+        self._publish(f"{label} {token}")
+
+    @staticmethod
+    def entry_key(versions: list[str], key: str) -> str:
+        return "reference-cache:" + hashlib.sha1(
+            f"{':'.join(versions)}:{key}".encode()
+        ).hexdigest()
+
+    def get_or_set(self, labels: list[str], key: str, default):
+        key = self.entry_key(self.versions(labels), key)
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        value = self.shared.get(key, MISSING)
+        if value is MISSING:
+            # A lagging replica would store stale data under the new version
+            with primary_reads():
+                value = default()
+            if value is MISSING:
+                return value
+            self.shared.set(key, value, self.options["TIMEOUT"])
+        self.local.set(key, value)
+        return value
+
+    async def aget_or_set(self, labels: list[str], key: str, default):
+        """``get_or_set`` for async callers, ``default`` is awaited"""
+        key = self.entry_key(await self.aversions(labels), key)
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        value = await self.shared.aget(key, MISSING)
+        if value is MISSING:
+            with primary_reads():
+                value = await default()
+            if value is MISSING:
+                return value
+            await self.shared.aset(key, value, self.options["TIMEOUT"])
+        self.local.set(key, value)
+        return value
+
+    def _publish(self, message: str) -> None:
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            client.publish(self.channel, message)
+        except Exception:
+            logger.exception("Failed to publish reference cache invalidation")
+
+    def _redis(self):
+        url = self.options.get("PUBSUB_URL")
+        if not url:
+            return None
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(url)
+        return self._client
+
+    def _ensure_subscriber(self) -> None:
+        if not self.options.get("PUBSUB_URL"):
+            return
+        if self._subscriber is not None and self._subscriber.is_alive():
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        with self._lock:
+            if self._subscriber is None or not self._subscriber.is_alive():
+                self._subscriber = threading.Thread(
+                    target=self._listen,
+                    name="reference-cache-invalidation",
+                    daemon=True
+                )
+                self._subscriber.start()
+
+    def _listen(self) -> None:
+        try:
+            pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+            self._versions = {}
+            self._subscribed.set()
+            for message in pubsub.listen():
+                label, token = message["data"].decode().split(" ", 1)
+                self._versions[label] = token
+        except Exception:
+            logger.exception("Reference cache invalidation listener stopped")
+        finally:
+            self._subscribed.clear()
+            self._versions = {}
+            self._retry_at = time.monotonic() + 5
+
+
+reference_cache = ReferenceCache()
+
+
+def invalidate_reference_model(label: str) -> None:
+    """Bump a model version now and again once the transaction commits.
+
+    The first bump stops other processes from serving stale entries right
+    away; the second one discards anything they cached from the old rows
+    between the bump and the commit.
+    """
+    reference_cache.bump(label)
+    transaction.on_commit(lambda: reference_cache.bump(label))
+
+
+class CachedReadMixin:
+    """Serve list and retrieve responses from the reference cache.
+
+    ``cache_models`` lists every model whose data appears in the response;
+    a change to any of them invalidates the cached payload. The ASGI read
+    path shares the entries through ``alist`` and ``aretrieve``.
+    """
+
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        response = None
+
+        def render():
+            nonlocal response
+            response = handler(request, *args, **kwargs)
+            return response.data if response.status_code == 200 else MISSING
+
+        data = reference_cache.get_or_set(
+            [model._meta.label_lower for model in self.cache_models],
+            f"{self.__class__.__name__}:{self.action}:"
+            f"{request.build_absolute_uri()}",
+            render,
+        )
+        if data is MISSING:
+            return response
+        return Response(data)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self._acached_response(
+            super().alist, request, *args, **kwargs
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self._acached_response(
+            super().aretrieve, request, *args, **kwargs
+        )
+
+    async def _acached_response(self, handler, request, *args, **kwargs):
+        response = None
+
+        async def render():
+            nonlocal response
+            response = await handler(request, *args, **kwargs)
+            return response.data if response.status_code == 200 else MISSING
+
+        data = await reference_cache.aget_or_set(
+            [model._meta.label_lower for model in self.cache_models],
+            f"{self.__class__.__name__}:{self.action}:"
+            f"{request.build_absolute_uri()}",
+            render,
+        )
+        if data is MISSING:
+            return response
+        return Response(data)
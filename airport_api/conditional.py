@@ -0,0 +1,215 @@
+import hashlib
+from typing import Sequence
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import reference_cache
+
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve with 304 Not Modified when nothing changed.
+
+    Validators never scan the tables they describe. They are made of the
+    reference cache version token of every model the response depends on,
+    which the model signals and bulk writers bump, and for a detail of
+    the ``conditional_fields`` of its row. The row is read with one
+    primary key lookup when the request is conditional and taken from the
+    loaded object otherwise, so a plain request costs no extra query.
+    Lists only carry an ETag; a detail also gets Last-Modified from its
+    row and the time of the latest version bump.
+
+    Views that also serve from the reference cache (``cache_models``)
+    depend on those versions alone, so a cached response stays free of
+    database queries. ``alist`` and ``aretrieve`` do the same on the ASGI
+    read path.
+    """
+
+    conditional_models = ()
+    conditional_fields = ("updated_at",)
+    conditional_instance = None
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().list, False, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().retrieve, True, request, *args, **kwargs
+        )
+
+    def get_object(self):
+        self.conditional_instance = super().get_object()
+        return self.conditional_instance
+
+    def get_conditional_models(self) -> tuple:
+        cache_models = getattr(self, "cache_models", ())
+        if cache_models:
+            return cache_models
+        if self.action == "list":
+            return (self.get_queryset().model, *self.conditional_models)
+        return self.conditional_models
+
+    def get_conditional_labels(self) -> Sequence[str]:
+        return [model._meta.label_lower for model in self.get_conditional_models()]
+
+    def uses_conditional_row(self, detail: bool) -> bool:
+        return detail and not getattr(self, "cache_models", ())
+
+    def get_conditional_row(self, row: dict) -> dict:
+        """Validator state of a detail row, ``row`` holds its
+        ``conditional_fields``"""
+        return row
+
+    def get_row_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).order_by().values(*self.conditional_fields)
+
+    def instance_row(self) -> dict | None:
+        if self.conditional_instance is None:
+            return None
+        return self.get_conditional_row(
+            {
+                field: getattr(self.conditional_instance, field)
+                for field in self.conditional_fields
+            }
+        )
+
+    @staticmethod
+    def is_conditional(request) -> bool:
+        return any(header in request.headers for header in CONDITIONAL_HEADERS)
+
+    def conditional_validators(
+            self,
+            request,
+            versions: Sequence[str],
+            row: dict | None,
+            detail: bool
+    ) -> tuple:
+        etag = quote_etag(
+            hashlib.md5(
+                repr(
+                    (
+                        request.get_full_path(),
+                        request.accepted_renderer.format,
+                        versions,
+                        row,
+                    )
+                ).encode(),
+                usedforsecurity=False
+            ).hexdigest()
+        )
+        last_modified = None
+        if detail:
+            changes = [reference_cache.changed_at(version) for version in versions]
+            if row and row.get("updated_at"):
+                changes.append(row["updated_at"].timestamp())
+            if changes and None not in changes:
+                last_modified = int(max(changes))
+        return etag, last_modified
+
+    @staticmethod
+    def set_conditional_headers(response, etag: str, last_modified):
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def _conditional_response(
+            self,
+            handler,
+            detail: bool,
+            request,
+            *args,
+            **kwargs
+    ):
+        versions = reference_cache.versions(self.get_conditional_labels())
+        uses_row = self.uses_conditional_row(detail)
+        row = None
+        if self.is_conditional(request):
+            if uses_row:
+                row = self.get_row_queryset().first()
+                if row is None:
+                    return handler(request, *args, **kwargs)
+                row = self.get_conditional_row(row)
+            etag, last_modified = self.conditional_validators(
+                request, versions, row, detail
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return self.set_conditional_headers(
+                    response, etag, last_modified
+                )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if uses_row and row is None:
+            row = self.instance_row()
+            if row is None:
+                return response
+        etag, last_modified = self.conditional_validators(
+            request, versions, row, detail
+        )
+        return self.set_conditional_headers(response, etag, last_modified)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self._aconditional_response(
+            super().alist, False, request, *args, **kwargs
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self._aconditional_response(
+            super().aretrieve, True, request, *args, **kwargs
+        )
+
+    async def aget_object(self):
+        self.conditional_instance = await super().aget_object()
+        return self.conditional_instance
+
+    async def _aconditional_response(
+            self,
+            handler,
+            detail: bool,
+            request,
+            *args,
+            **kwargs
+    ):
+        versions = await reference_cache.aversions(self.get_conditional_labels())
+        uses_row = self.uses_conditional_row(detail)
+        row = None
+        if self.is_conditional(request):
+            if uses_row:
+                row = await self.get_row_queryset().afirst()
+                if row is None:
+                    return await handler(request, *args, **kwargs)
+                row = self.get_conditional_row(row)
+            etag, last_modified = self.conditional_validators(
+                request, versions, row, detail
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return self.set_conditional_headers(
+                    response, etag, last_modified
+                )
+
+        response = await handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if uses_row and row is None:
+            row = self.instance_row()
+            if row is None:
+                return response
+        etag, last_modified = self.conditional_validators(
+            request, versions, row, detail
+        )
+        return self.set_conditional_headers(response, etag, last_modified)
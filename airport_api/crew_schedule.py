@@ -0,0 +1,132 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+
+class Assignment(NamedTuple):
+    crew_id: int
+    departure_time: datetime
+    arrival_time: datetime
+    flight_id: int | None = None
+    index: int | None = None
+
+    @property
+    def is_proposed(self) -> bool:
+        return self.index is not None
+
+    def describe(self) -> dict:
+        if self.index is None:
+            return {"id": self.flight_id}
+        if self.flight_id is None:
+            return {"index": self.index}
+        return {"index": self.index, "id": self.flight_id}
+
+
+class CrewSchedule:
+    """Crew assignments grouped per crew member and sorted by departure.
+
+    ``conflicts`` sweeps every crew timeline once, keeping the flights
+    still in the air in a heap ordered by arrival time, so checking a
+    whole season costs one query plus O(n log n) instead of one join
+    per proposed flight. Flights that only touch (one arrives as the
+    next departs) do not overlap, matching ``Flight.has_overlapping_crew``.
+    """
+
+    def __init__(self, assignments: Iterable[Assignment] = ()):
+        self._timelines: dict[int, list[Assignment]] = defaultdict(list)
+        for assignment in assignments:
+            self.add(assignment)
+
+    def add(self, assignment: Assignment) -> None:
+        self._timelines[assignment.crew_id].append(assignment)
+
+    @classmethod
+    def load(
+            cls,
+            crew_ids: Iterable[int],
+            departure_time: datetime,
+            arrival_time: datetime,
+            exclude_flight_ids: Iterable[int] = (),
+    ) -> "CrewSchedule":
+        """Load stored assignments of the crews overlapping the window"""
+        from .models import Flight
+
+        rows = (
+            Flight.crews.through.objects.filter(
+                crew_id__in=set(crew_ids),
+                flight__departure_time__lt=arrival_time,
+                flight__arrival_time__gt=departure_time,
+            )
+            .exclude(flight_id__in=set(exclude_flight_ids))
+            .values_list(
+                "crew_id",
+                "flight__departure_time",
+                "flight__arrival_time",
+                "flight_id",
+            )
+        )
+        return cls(Assignment(*row) for row in rows)
+
+    def conflicts(self) -> list[tuple[Assignment, Assignment]]:
+        """Return overlapping pairs that involve at least one proposed flight"""
+        conflicts = []
+        for timeline in self._timelines.values():
+            timeline.sort(key=lambda item: (item.departure_time, item.arrival_time))
+            in_air = []
+            for counter, assignment in enumerate(timeline):
+                while in_air and in_air[0][0] <= assignment.departure_time:
+                    heapq.heappop(in_air)
+                for _, _, other in in_air:
+                    if other.is_proposed or assignment.is_proposed:
+                        conflicts.append((other, assignment))
+                heapq.heappush(
+                    in_air, (assignment.arrival_time, counter, assignment)
+                )
+        return conflicts
+
+
+def find_crew_conflicts(
+        flights: list[dict],
+        exclude_flight_ids: Iterable[int] = ()
+) -> list[dict]:
+    """Check proposed flights against stored flights and each other.
+
+    Every item needs ``crews``, ``departure_time`` and ``arrival_time``;
+    an ``id`` marks an existing flight being rescheduled, whose stored
+    assignments are replaced by the proposed ones. Stored flights in
+    ``exclude_flight_ids`` are ignored, e.g. because they are removed.
+    """
+    if not flights:
+        return []
+    assignments = [
+        Assignment(
+            crew_id=getattr(crew, "pk", crew),
+            departure_time=flight["departure_time"],
+            arrival_time=flight["arrival_time"],
+            flight_id=flight.get("id"),
+            index=index,
+        )
+        for index, flight in enumerate(flights)
+        for crew in flight.get("crews", [])
+    ]
+    if not assignments:
+        return []
+    schedule = CrewSchedule.load(
+        {assignment.crew_id for assignment in assignments},
+        min(flight["departure_time"] for flight in flights),
+        max(flight["arrival_time"] for flight in flights),
+        exclude_flight_ids=[
+            *exclude_flight_ids,
+            *(flight["id"] for flight in flights if flight.get("id")),
+        ],
+    )
+    for assignment in assignments:
+        schedule.add(assignment)
+    return [
+        {
+            "crew": first.crew_id,
+            "flights": [first.describe(), second.describe()],
+        }
+        for first, second in schedule.conflicts()
+    ]
@@ -0,0 +1,137 @@
+import csv
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+
+
+class Echo:
+    """Pseudo-buffer that hands back what the csv writer writes to it"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class CsvEncoder:
+    content_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, columns: list[str]):
+        self.writer = csv.writer(Echo())
+        self.columns = columns
+
+    def header(self) -> str:
+        return self.writer.writerow(self.columns)
+
+    def encode(self, row: tuple) -> str:
+        return self.writer.writerow([csv_value(value) for value in row])
+
+
+class NdjsonEncoder:
+    content_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+
+    def header(self) -> str:
+        return ""
+
+    def encode(self, row: tuple) -> str:
+        return json.dumps(
+            dict(zip(self.columns, row)), cls=DjangoJSONEncoder
+        ) + "\n"
+
+
+EXPORT_ENCODERS = {
+    "csv": CsvEncoder,
+    "ndjson": NdjsonEncoder,
+}
+
+
+def stream_rows(encoder, rows, batch_size: int):
+    """Encode rows lazily, yielding them in batches to limit write calls"""
+    yield encoder.header()
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(row))
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+class ExportMixin:
+    """Stream the filtered queryset of a viewset as CSV or NDJSON.
+
+    ``export_fields`` maps column names to lookups read with
+    ``values_list``; rows are fetched with ``iterator(chunk_size=...)``,
+    which uses a server-side cursor on PostgreSQL, so memory use does
+    not grow with the size of the export.
+    """
+
+    export_fields = {}
+
+    def get_export_queryset(self):
+        queryset = self.get_queryset()
+        ordering = getattr(self.pagination_class, "ordering", None)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset.values_list(*self.export_fields.values())
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Export filtered records",
+        description="Admin can download every record matching the list "
+                    "filters as CSV or newline-delimited JSON",
+        parameters=[
+            OpenApiParameter(
+                name="export_format",
+                description="File format of the export",
+                enum=list(EXPORT_ENCODERS),
+                default="csv",
+            ),
+        ],
+        responses={
+            (200, "text/csv"): OpenApiTypes.STR,
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+        },
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request: Request):
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORT_ENCODERS:
+            raise ValidationError(
+                {"export_format": f"Choose one of: {', '.join(EXPORT_ENCODERS)}"}
+            )
+        encoder = EXPORT_ENCODERS[export_format](list(self.export_fields))
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+        rows = self.get_export_queryset().iterator(chunk_size=chunk_size)
+        response = StreamingHttpResponse(
+            stream_rows(encoder, rows, chunk_size),
+            content_type=encoder.content_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.basename}.{encoder.extension}"'
+        )
+        return response
@@ -0,0 +1,136 @@
+from itertools import islice
+
+from django.db.models import DurationField, ExpressionWrapper, F, Q, QuerySet
+from django.utils import timezone
+
+from .cache import invalidate_reference_model
+from .models import (
+    Airplane,
+    Airport,
+    City,
+    Country,
+    Flight,
+    FlightSearchEntry,
+    Route,
+)
+
+COPIED_FIELDS = ["route_id", "departure_time", "arrival_time", "seats_sold"]
+JOINED_FIELDS = {
+    "source_name": F("route__source__name"),
+    "source_city": F("route__source__closest_big_city__name"),
+    "source_country": F("route__source__closest_big_city__country__name"),
+    "destination_name": F("route__destination__name"),
+    "destination_city": F("route__destination__closest_big_city__name"),
+    "destination_country": F(
+        "route__destination__closest_big_city__country__name"
+    ),
+    "airplane_name": F("airplane__name"),
+    "capacity": F("airplane__rows") * F("airplane__seats_in_row"),
+    "duration": ExpressionWrapper(
+        F("arrival_time") - F("departure_time"),
+        output_field=DurationField()
+    ),
+}
+
+# Flight lookups of every model copied into the entries, and the fields
+# of that model whose change makes the copies stale
+RELATED_LOOKUPS = {
+    Route: (
+        ("route",),
+        ("source_id", "destination_id"),
+    ),
+    Airport: (
+        ("route__source", "route__destination"),
+        ("name", "closest_big_city_id"),
+    ),
+    City: (
+        (
+            "route__source__closest_big_city",
+            "route__destination__closest_big_city",
+        ),
+        ("name", "country_id"),
+    ),
+    Country: (
+        (
+            "route__source__closest_big_city__country",
+            "route__destination__closest_big_city__country",
+        ),
+        ("name",),
+    ),
+    Airplane: (
+        ("airplane",),
+        ("name", "rows", "seats_in_row"),
+    ),
+}
+
+
+def refresh_search_entries(flights: QuerySet, batch_size: int = 2000) -> int:
+    """Rewrite the entries of ``flights`` with batched upserts.
+
+    Every batch is read with a single joined query and written with one
+    INSERT ... ON CONFLICT DO UPDATE, so the cost grows with the number
+    of flights touched, never with the size of the table.
+    """
+    rows = flights.order_by().values("id", *COPIED_FIELDS, **JOINED_FIELDS)
+    rows = rows.iterator(chunk_size=batch_size)
+    count = 0
+    while batch := list(islice(rows, batch_size)):
+        FlightSearchEntry.objects.bulk_create(
+            [FlightSearchEntry(flight_id=row.pop("id"), **row) for row in batch],
+            update_conflicts=True,
+            unique_fields=["flight"],
+            update_fields=[*COPIED_FIELDS, *JOINED_FIELDS, "updated_at"],
+        )
+        count += len(batch)
+    if count:
+        invalidate_entries()
+    return count
+
+
+def update_seats_sold(flights: list[Flight]) -> None:
+    now = timezone.now()
+    for flight in flights:
+        FlightSearchEntry.objects.filter(flight_id=flight.pk).update(
+            seats_sold=flight.seats_sold, updated_at=now
+        )
+    invalidate_entries()
+
+
+def invalidate_entries() -> None:
+    """Change the version of the entries, part of the flight list ETag"""
+    invalidate_reference_model(FlightSearchEntry._meta.label_lower)
+
+
+def related_flights(model, pk) -> QuerySet:
+    condition = Q()
+    for lookup in RELATED_LOOKUPS[model][0]:
+        condition |= Q(**{lookup: pk})
+    return Flight.objects.filter(condition)
+
+
+def stored_values(instance) -> tuple | None:
+    """Copied field values of a related row as currently stored"""
+    if instance.pk is None:
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values_list(
+        *RELATED_LOOKUPS[type(instance)][1]
+    ).first()
+
+
+def instance_values(instance) -> tuple:
+    return tuple(
+        getattr(instance, field) for field in RELATED_LOOKUPS[type(instance)][1]
+    )
+
+
+def refresh_changed_since(moment) -> int:
+    """Refresh entries of flights changed directly or through a related row.
+
+    Used after bulk writes that skip model signals; it relies on every
+    writer setting ``updated_at``.
+    """
+    condition = Q(updated_at__gte=moment)
+    for lookups, _ in RELATED_LOOKUPS.values():
+        for lookup in lookups:
+            condition |= Q(**{f"{lookup}__updated_at__gte": moment})
+    return refresh_search_entries(Flight.objects.filter(condition))
@@ -0,0 +1,79 @@
+import hashlib
+import io
+import pathlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+ORIGINALS_DIR = pathlib.PurePosixPath("upload/airplanes/originals")
+VARIANTS_DIR = pathlib.PurePosixPath("upload/airplanes/variants")
+
+# name: (bounding box, Pillow format, file extension, save options)
+AIRPLANE_IMAGE_VARIANTS = {
+    "thumbnail": ((320, 240), "JPEG", "jpg", {"quality": 80, "optimize": True}),
+    "thumbnail_webp": ((320, 240), "WEBP", "webp", {"quality": 75, "method": 4}),
+    "medium_webp": ((1280, 960), "WEBP", "webp", {"quality": 80, "method": 4}),
+}
+
+
+def content_hash(file) -> str:
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(64 * 1024), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def store_original(file) -> tuple[str, str]:
+    """Save an upload under its content hash unless it is already stored.
+
+    Returns the storage name and the hash. Uploading the same picture
+    for several airplanes keeps a single copy.
+    """
+    digest = content_hash(file)
+    suffix = pathlib.PurePosixPath(file.name).suffix.lower()
+    name = str(ORIGINALS_DIR / f"{digest}{suffix}")
+    if not default_storage.exists(name):
+        name = default_storage.save(name, file)
+    return name, digest
+
+
+def variant_name(digest: str, variant: str) -> str:
+    extension = AIRPLANE_IMAGE_VARIANTS[variant][2]
+    return str(VARIANTS_DIR / digest[:2] / f"{digest}-{variant}.{extension}")
+
+
+def build_variants(name: str, digest: str) -> dict[str, str]:
+    """Render every missing variant of a stored original.
+
+    The original is decoded once and each variant is resized from that
+    image, so a large photo is never decoded more than once per run.
+    """
+    names = {
+        variant: variant_name(digest, variant)
+        for variant in AIRPLANE_IMAGE_VARIANTS
+    }
+    missing = [
+        variant for variant, path in names.items()
+        if not default_storage.exists(path)
+    ]
+    if not missing:
+        return names
+
+    with default_storage.open(name, "rb") as file:
+        with Image.open(file) as image:
+            # Draft mode lets JPEG decoding skip detail the variants drop
+            side = max(max(AIRPLANE_IMAGE_VARIANTS[variant][0]) for variant in missing)
+            image.draft("RGB", (side, side))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+
+    for variant in missing:
+        size, image_format, _, options = AIRPLANE_IMAGE_VARIANTS[variant]
+        resized = image.copy()
+        resized.thumbnail(size, Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, image_format, **options)
+        default_storage.save(names[variant], ContentFile(buffer.getvalue()))
+    return names
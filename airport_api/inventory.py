@@ -0,0 +1,371 @@
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .seat_map import SeatMap
+
+
+class SeatInventory(ABC):
+    """Front-line arbiter for seat sales that sits in front of the database.
+
+    Seats are addressed by their seat-map bit (see ``SeatMap.index``). The
+    sold bitmap of a flight is seeded lazily from ``Flight.seat_map`` and
+    expires after ``SYNC_TTL`` seconds so it is periodically reseeded
+    from the database, which stays the source of truth: ``Ticket.book``
+    re-checks every seat when it writes the seat maps.
+
+    A hold reserves seats for a token until it expires; ``claim`` turns
+    seats that are free, or held by the same token, into sold seats.
+    Orders hold their seats for ``claim_ttl`` seconds and claim them once
+    their transaction commits.
+
+    Hold tokens handed out to users start with the user id, so only the
+    user who made a hold can extend, release or confirm it, and every
+    user has at most ``max_holds`` active holds.
+    """
+
+    def __init__(
+            self,
+            hold_ttl: int,
+            sync_ttl: int,
+            claim_ttl: int = 30,
+            max_holds: int = 5,
+    ):
+        self.hold_ttl = hold_ttl
+        self.sync_ttl = sync_ttl
+        self.claim_ttl = claim_ttl
+        self.max_holds = max_holds
+
+    @staticmethod
+    def hold_token(user_id: int) -> str:
+        return f"{user_id}.{secrets.token_urlsafe(16)}"
+
+    @staticmethod
+    def is_hold_of(token: str, user_id: int) -> bool:
+        return token.startswith(f"{user_id}.")
+
+    @staticmethod
+    def bits(flight, positions: list[tuple[int, int]]) -> list[int]:
+        seat_map = SeatMap(flight.airplane.rows, flight.airplane.seats_in_row)
+        return [seat_map.index(row, seat) for row, seat in positions]
+
+    def hold(self, flight, positions, token: str, ttl: int = None) -> bool:
+        return self._hold(
+            flight.id,
+            bytes(flight.seat_map),
+            self.bits(flight, positions),
+            token,
+            self.hold_ttl if ttl is None else ttl,
+        )
+
+    def claim(self, flight, positions, token: str = None) -> bool:
+        return self._claim(
+            flight.id,
+            bytes(flight.seat_map),
+            self.bits(flight, positions),
+            token or "",
+        )
+
+    def release(self, flight, positions, token: str) -> None:
+        self._release(flight.id, self.bits(flight, positions), token)
+
+    def free(self, flight, positions) -> None:
+        self._free(flight.id, self.bits(flight, positions))
+
+    def register_hold(self, user_id: int, flight_id: int, token: str) -> bool:
+        """Count a hold of ``token`` on a flight among the active holds of
+        a user, False if that would exceed ``max_holds``"""
+        return self._register_hold(
+            user_id, f"{flight_id}:{token}", self.hold_ttl, self.max_holds
+        )
+
+    def unregister_hold(self, user_id: int, flight_id: int, token: str) -> None:
+        self._unregister_hold(user_id, f"{flight_id}:{token}")
+
+    @abstractmethod
+    def reset(self, flight_id: int) -> None:
+        """Drop the state of a flight, it is reseeded on next use"""
+
+    @abstractmethod
+    def _hold(self, flight_id, seed, bits, token, ttl) -> bool:
+        """Hold all ``bits`` for ``token`` if none is sold or held by
+        another token"""
+
+    @abstractmethod
+    def _claim(self, flight_id, seed, bits, token) -> bool:
+        """Mark all ``bits`` sold if none is sold or held by another
+        token"""
+
+    @abstractmethod
+    def _release(self, flight_id, bits, token) -> None:
+        """Drop the holds of ``token`` on ``bits``"""
+
+    @abstractmethod
+    def _free(self, flight_id, bits) -> None:
+        """Mark ``bits`` unsold"""
+
+    @abstractmethod
+    def _register_hold(self, user_id, hold, ttl, limit) -> bool:
+        """Add ``hold`` to the holds of a user for ``ttl`` seconds unless
+        the user already has ``limit`` other holds"""
+
+    @abstractmethod
+    def _unregister_hold(self, user_id, hold) -> None:
+        """Drop ``hold`` from the holds of a user"""
+
+
+class InMemorySeatInventory(SeatInventory):
+    """Single-process stand-in for tests and local development"""
+
+    def __init__(self, hold_ttl: int, sync_ttl: int, **kwargs):
+        super().__init__(hold_ttl, sync_ttl, **kwargs)
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._user_holds = {}
+
+    def _state(self, flight_id, seed):
+        state = self._flights.get(flight_id)
+        now = time.monotonic()
+        if state is None or state["expires_at"] < now:
+            seat_map = SeatMap(len(seed) * 8, 1, seed)
+            state = {
+                "sold": set(seat_map.taken_indexes()),
+                "holds": {},
+                "expires_at": now + self.sync_ttl,
+            }
+            self._flights[flight_id] = state
+        return state
+
+    @staticmethod
+    def _available(state, bits, token) -> bool:
+        now = time.monotonic()
+        for bit in bits:
+            if bit in state["sold"]:
+                return False
+            holder, expires_at = state["holds"].get(bit, (None, 0))
+            if holder != token and expires_at > now:
+                return False
+        return True
+
+    def reset(self, flight_id):
+        with self._lock:
+            self._flights.pop(flight_id, None)
+
+    def _hold(self, flight_id, seed, bits, token, ttl):
+        with self._lock:
+            state = self._state(flight_id, seed)
+            if not self._available(state, bits, token):
+                return False
+            for bit in bits:
+                state["holds"][bit] = (token, time.monotonic() + ttl)
+            return True
+
+    def _claim(self, flight_id, seed, bits, token):
+        with self._lock:
+            state = self._state(flight_id, seed)
+            if not self._available(state, bits, token):
+                return False
+            for bit in bits:
+                state["sold"].add(bit)
+                state["holds"].pop(bit, None)
+            return True
+
+    def _release(self, flight_id, bits, token):
+        with self._lock:
+            state = self._flights.get(flight_id)
+            if state is None:
+                return
+            for bit in bits:
+                if state["holds"].get(bit, (None, 0))[0] == token:
+                    del state["holds"][bit]
+
+    def _free(self, flight_id, bits):
+        with self._lock:
+            state = self._flights.get(flight_id)
+            if state is not None:
+                state["sold"].difference_update(bits)
+
+    def _register_hold(self, user_id, hold, ttl, limit):
+        with self._lock:
+            now = time.monotonic()
+            holds = {
+                other: expires_at
+                for other, expires_at in self._user_holds.get(user_id, {}).items()
+                if expires_at > now
+            }
+            self._user_holds[user_id] = holds
+            if hold not in holds and len(holds) >= limit:
+                return False
+            holds[hold] = now + ttl
+            return True
+
+    def _unregister_hold(self, user_id, hold):
+        with self._lock:
+            self._user_holds.get(user_id, {}).pop(hold, None)
+
+
+class RedisSeatInventory(SeatInventory):
+    """Seat inventory shared by all workers through Redis.
+
+    Each flight has a sold bitmap (a Redis string, bit per seat) and a
+    hash of holds mapping a seat bit to ``token|expires_at_ms``. Holds
+    and claims check and update every requested seat inside one Lua
+    script, so concurrent requests for a hot flight never interleave.
+    The active holds of a user are a sorted set scored by expiry.
+    """
+
+    prelude = """
+        if redis.call('EXISTS', KEYS[1]) == 0 then
+            redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+        end
+        local now = redis.call('TIME')
+        local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+        for i = 5, #ARGV do
+            if redis.call('GETBIT', KEYS[1], ARGV[i]) == 1 then
+                return 0
+            end
+            local hold = redis.call('HGET', KEYS[2], ARGV[i])
+            if hold then
+                local separator = string.find(hold, '|', 1, true)
+                local holder = string.sub(hold, 1, separator - 1)
+                local expires_at = tonumber(string.sub(hold, separator + 1))
+                if holder ~= ARGV[1] and expires_at > now_ms then
+                    return 0
+                end
+            end
+        end
+    """
+
+    hold_script = prelude + """
+        local ttl = tonumber(ARGV[4])
+        for i = 5, #ARGV do
+            redis.call('HSET', KEYS[2], ARGV[i], ARGV[1] .. '|' .. (now_ms + ttl))
+        end
+        if redis.call('PTTL', KEYS[2]) < ttl then
+            redis.call('PEXPIRE', KEYS[2], ttl)
+        end
+        return 1
+    """
+
+    claim_script = prelude + """
+        for i = 5, #ARGV do
+            redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+            redis.call('HDEL', KEYS[2], ARGV[i])
+        end
+        return 1
+    """
+
+    release_script = """
+        for i = 2, #ARGV do
+            local hold = redis.call('HGET', KEYS[1], ARGV[i])
+            if hold and string.sub(hold, 1, #ARGV[1] + 1) == ARGV[1] .. '|' then
+                redis.call('HDEL', KEYS[1], ARGV[i])
+            end
+        end
+        return 1
+    """
+
+    free_script = """
+        if redis.call('EXISTS', KEYS[1]) == 1 then
+            for i = 1, #ARGV do
+                redis.call('SETBIT', KEYS[1], ARGV[i], 0)
+            end
+        end
+        return 1
+    """
+
+    register_hold_script = """
+        local now = redis.call('TIME')
+        local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms)
+        if not redis.call('ZSCORE', KEYS[1], ARGV[1])
+                and redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+            return 0
+        end
+        redis.call('ZADD', KEYS[1], now_ms + tonumber(ARGV[2]), ARGV[1])
+        redis.call('PEXPIRE', KEYS[1], ARGV[2])
+        return 1
+    """
+
+    def __init__(self, hold_ttl: int, sync_ttl: int, url: str, **kwargs):
+        super().__init__(hold_ttl, sync_ttl, **kwargs)
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._hold_script = self.client.register_script(self.hold_script)
+        self._claim_script = self.client.register_script(self.claim_script)
+        self._release_script = self.client.register_script(self.release_script)
+        self._free_script = self.client.register_script(self.free_script)
+        self._register_hold_script = self.client.register_script(
+            self.register_hold_script
+        )
+
+    @staticmethod
+    def keys(flight_id: int) -> list[str]:
+        return [
+            f"seat-inventory:{{{flight_id}}}:sold",
+            f"seat-inventory:{{{flight_id}}}:holds",
+        ]
+
+    @staticmethod
+    def user_key(user_id: int) -> str:
+        return f"seat-inventory:user:{user_id}:holds"
+
+    def reset(self, flight_id):
+        self.client.delete(*self.keys(flight_id))
+
+    def _hold(self, flight_id, seed, bits, token, ttl):
+        return bool(
+            self._hold_script(
+                keys=self.keys(flight_id),
+                args=[token, seed, self.sync_ttl, ttl * 1000, *bits],
+            )
+        )
+
+    def _claim(self, flight_id, seed, bits, token):
+        return bool(
+            self._claim_script(
+                keys=self.keys(flight_id),
+                args=[token, seed, self.sync_ttl, 0, *bits],
+            )
+        )
+
+    def _release(self, flight_id, bits, token):
+        self._release_script(
+            keys=self.keys(flight_id)[1:],
+            args=[token, *bits],
+        )
+
+    def _free(self, flight_id, bits):
+        self._free_script(
+            keys=self.keys(flight_id)[:1],
+            args=bits,
+        )
+
+    def _register_hold(self, user_id, hold, ttl, limit):
+        return bool(
+            self._register_hold_script(
+                keys=[self.user_key(user_id)],
+                args=[hold, ttl * 1000, limit],
+            )
+        )
+
+    def _unregister_hold(self, user_id, hold):
+        self.client.zrem(self.user_key(user_id), hold)
+
+
+@lru_cache(maxsize=None)
+def get_seat_inventory() -> SeatInventory:
+    options = settings.SEAT_INVENTORY
+    return import_string(options["BACKEND"])(
+        hold_ttl=options["HOLD_TTL"],
+        sync_ttl=options["SYNC_TTL"],
+        claim_ttl=options.get("CLAIM_TTL", 30),
+        max_holds=options.get("MAX_HOLDS", 5),
+        **options.get("OPTIONS", {}),
+    )
@@ -0,0 +1,269 @@
+import bisect
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import reference_cache
+from .replicas import primary_reads
+
+
+class Connection(NamedTuple):
+    flight_id: int
+    source_id: int
+    destination_id: int
+    departure_time: datetime
+    arrival_time: datetime
+    seats_available: int
+
+
+class FlightGraph:
+    """Time-expanded graph of upcoming flights kept in process memory.
+
+    Every flight is an edge from its source airport at departure time to
+    its destination airport at arrival time. Departures of an airport are
+    kept sorted, so the connections reachable after a layover are found
+    by bisection. Mutations replace the per-airport lists instead of
+    editing them in place, which lets searches run without taking the
+    lock while another thread applies an update.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[int, Connection] = {}
+        self._departures: dict[int, list[Connection]] = {}
+        self.loaded_at = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._flights = {}
+            self._departures = {}
+            self.loaded_at = None
+
+    def load(self, connections: Iterable[Connection]) -> None:
+        flights = {}
+        departures = {}
+        for connection in connections:
+            flights[connection.flight_id] = connection
+            departures.setdefault(connection.source_id, []).append(connection)
+        for airport_departures in departures.values():
+            airport_departures.sort(key=lambda item: item.departure_time)
+        with self._lock:
+            self._flights = flights
+            self._departures = departures
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, connection: Connection) -> None:
+        with self._lock:
+            self._remove(connection.flight_id)
+            self._flights[connection.flight_id] = connection
+            airport_departures = list(
+                self._departures.get(connection.source_id, [])
+            )
+            bisect.insort(
+                airport_departures,
+                connection,
+                key=lambda item: item.departure_time
+            )
+            self._departures[connection.source_id] = airport_departures
+
+    def remove(self, flight_id: int) -> None:
+        with self._lock:
+            self._remove(flight_id)
+
+    def update_seats(self, flight_id: int, seats_available: int) -> None:
+        connection = self._flights.get(flight_id)
+        if connection is not None:
+            self.upsert(connection._replace(seats_available=seats_available))
+
+    def _remove(self, flight_id: int) -> None:
+        connection = self._flights.pop(flight_id, None)
+        if connection is None:
+            return
+        self._departures[connection.source_id] = [
+            item
+            for item in self._departures[connection.source_id]
+            if item.flight_id != flight_id
+        ]
+
+    def departures_between(
+            self,
+            airport_id: int,
+            earliest: datetime,
+            latest: datetime
+    ) -> list[Connection]:
+        airport_departures = self._departures.get(airport_id, [])
+        start = bisect.bisect_left(
+            airport_departures, earliest, key=lambda item: item.departure_time
+        )
+        end = bisect.bisect_right(
+            airport_departures, latest, key=lambda item: item.departure_time
+        )
+        return airport_departures[start:end]
+
+    def search(
+            self,
+            source_ids: Iterable[int],
+            destination_ids: Iterable[int],
+            earliest_departure: datetime,
+            latest_departure: datetime,
+            min_connection: timedelta,
+            max_layover: timedelta,
+            max_stops: int = 2,
+            seats: int = 1,
+            limit: int = 10,
+    ) -> list[list[Connection]]:
+        """Return up to ``limit`` itineraries ordered by arrival time.
+
+        Partial itineraries are expanded best-first by arrival time, so
+        the first complete itinerary popped from the heap is the earliest
+        arrival. Each (airport, legs) state is settled at most ``limit``
+        times, which bounds the search like a k-shortest-paths Dijkstra.
+        """
+        destination_ids = set(destination_ids)
+        heap = []
+        counter = 0
+        for source_id in set(source_ids):
+            for connection in self.departures_between(
+                    source_id, earliest_departure, latest_departure
+            ):
+                if connection.seats_available >= seats:
+                    heap.append(
+                        (connection.arrival_time, counter, (connection,))
+                    )
+                    counter += 1
+        heapq.heapify(heap)
+
+        itineraries = []
+        settled = {}
+        while heap and len(itineraries) < limit:
+            arrival_time, _, legs = heapq.heappop(heap)
+            airport_id = legs[-1].destination_id
+            if airport_id in destination_ids:
+                itineraries.append(list(legs))
+                continue
+            if len(legs) > max_stops:
+                continue
+            state = (airport_id, len(legs))
+            settled[state] = settled.get(state, 0) + 1
+            if settled[state] > limit:
+                continue
+            visited = {legs[0].source_id}
+            visited.update(leg.destination_id for leg in legs)
+            for connection in self.departures_between(
+                    airport_id,
+                    arrival_time + min_connection,
+                    arrival_time + max_layover
+            ):
+                if (
+                        connection.destination_id in visited
+                        or connection.seats_available < seats
+                ):
+                    continue
+                heapq.heappush(
+                    heap,
+                    (connection.arrival_time, counter, legs + (connection,))
+                )
+                counter += 1
+        return itineraries
+
+
+def flight_connections(queryset) -> Iterable[Connection]:
+    rows = queryset.annotate(
+        seats_available=F("airplane__rows") * F("airplane__seats_in_row")
+        - F("seats_sold")
+    ).values_list(
+        "id",
+        "route__source_id",
+        "route__destination_id",
+        "departure_time",
+        "arrival_time",
+        "seats_available",
+    )
+    return (Connection(*row) for row in rows)
+
+
+class FlightGraphStore:
+    """Process-wide graph, loaded lazily and refreshed incrementally.
+
+    Signal handlers apply flight, route and seat changes made by this
+    process; a full reload every ``ITINERARY_GRAPH_MAX_AGE`` seconds
+    picks up changes made by other workers. Changes are applied once the
+    writing transaction commits, so searches never see flights or seats
+    of a transaction that rolls back. Bulk writers that skip the signals
+    call ``invalidate``, which bumps a version shared by all processes
+    and makes each of them reload on its next search.
+    """
+
+    version_label = "airport_api.flight_graph"
+
+    def __init__(self):
+        self.graph = FlightGraph()
+        self.version = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.graph.loaded_at is not None
+
+    def get(self) -> FlightGraph:
+        loaded_at = self.graph.loaded_at
+        version = reference_cache.versions([self.version_label])[0]
+        max_age = settings.ITINERARY_GRAPH_MAX_AGE
+        if (
+                loaded_at is None
+                or version != self.version
+                or time.monotonic() - loaded_at > max_age
+        ):
+            with self._load_lock:
+                if self.graph.loaded_at == loaded_at:
+                    self.reload()
+                    self.version = version
+        return self.graph
+
+    def reload(self) -> None:
+        from .models import Flight
+
+        # Read from the primary, the graph outlives the request and a
+        # lagging replica may miss the rows of a schedule just imported
+        with primary_reads():
+            self.graph.load(
+                flight_connections(
+                    Flight.objects.filter(departure_time__gte=timezone.now())
+                )
+            )
+
+    def clear(self) -> None:
+        self.graph.clear()
+
+    def invalidate(self) -> None:
+        """Make every process reload its graph on its next search"""
+        reference_cache.bump(self.version_label)
+
+    def refresh_flights(self, queryset) -> None:
+        if self.is_loaded:
+            transaction.on_commit(lambda: self._refresh_flights(queryset))
+
+    def _refresh_flights(self, queryset) -> None:
+        # Evaluated after the commit, so it reads the committed rows
+        for connection in flight_connections(queryset):
+            self.graph.upsert(connection)
+
+    def remove_flight(self, flight_id: int) -> None:
+        if self.is_loaded:
+            transaction.on_commit(lambda: self.graph.remove(flight_id))
+
+    def update_seats(self, flight_id: int, seats_available: int) -> None:
+        if self.is_loaded:
+            transaction.on_commit(
+                lambda: self.graph.update_seats(flight_id, seats_available)
+            )
+
+
+flight_graph = FlightGraphStore()
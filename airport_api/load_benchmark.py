@@ -0,0 +1,327 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .benchmarks import percentile, seed_dataset
+from .models import Flight
+
+# Allowed by setup_test_environment()
+HOST = "testserver"
+
+
+class LoadTarget:
+    """A GET request fired by every simulated client"""
+
+    def __init__(self, name: str, path: str, query: dict = None):
+        self.name = name
+        self.path = path
+        self.query_string = urlencode(query or {})
+
+
+def build_targets(flight: Flight = None) -> list[LoadTarget]:
+    """The list endpoints, and the endpoints of ``flight`` when given"""
+    targets = [LoadTarget("flight_list", "/api/airport/flights/")]
+    if flight is not None:
+        targets += [
+            LoadTarget(
+                "flight_list_filtered",
+                "/api/airport/flights/",
+                {"from": flight.route.source.name},
+            ),
+            LoadTarget("flight_retrieve", f"/api/airport/flights/{flight.id}/"),
+            LoadTarget(
+                "flight_seats", f"/api/airport/flights/{flight.id}/seats/"
+            ),
+        ]
+    return targets + [
+        LoadTarget("route_list", "/api/airport/routes/"),
+        LoadTarget("airport_list", "/api/airport/airports/"),
+    ]
+
+
+class ThreadCounter:
+    """Peak number of live threads seen while requests are in flight"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+
+    def sample(self) -> None:
+        self.peak = max(self.peak, threading.active_count())
+
+
+def wsgi_load(
+        target: LoadTarget,
+        authorization: str,
+        clients: int,
+        delay: float,
+        threads: int,
+) -> tuple[list[tuple[int, float, float]], int]:
+    """Run ``clients`` requests on a pool of ``threads`` WSGI workers.
+
+    Each worker keeps the request until the client has read the whole
+    response, which takes ``delay`` seconds, like a threaded server
+    writing to a slow client.
+    """
+    handler = WSGIHandler()
+    threads_seen = ThreadCounter()
+
+    def client() -> tuple[int, float, float]:
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": target.path,
+            "QUERY_STRING": target.query_string,
+            "HTTP_HOST": HOST,
+            "HTTP_AUTHORIZATION": authorization,
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = handler(
+            environ, lambda status, headers, *args: statuses.append(status)
+        )
+        try:
+            for _ in response:
+                pass
+            threads_seen.sample()
+            time.sleep(delay)
+        finally:
+            response.close()
+        return int(statuses[0].split()[0]), started, time.perf_counter()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        samples = list(executor.map(lambda _: client(), range(clients)))
+    return samples, threads_seen.peak
+
+
+def asgi_load(
+        target: LoadTarget,
+        authorization: str,
+        clients: int,
+        delay: float,
+) -> tuple[list[tuple[int, float, float]], int]:
+    """Run ``clients`` concurrent requests on one event loop.
+
+    A slow client only delays its own ``send``, the loop keeps serving
+    the others in the meantime. Django 4.2 still runs the sync parts of
+    a request, the ORM included, in a thread of that request's own
+    context, so the peak thread count grows with the concurrency; those
+    threads are not held while a client reads its response.
+    """
+    handler = ASGIHandler()
+    threads_seen = ThreadCounter()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": target.path,
+        "raw_path": target.path.encode(),
+        "query_string": target.query_string.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", HOST.encode()),
+            (b"authorization", authorization.encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+
+    async def client() -> tuple[int, float, float]:
+        received = False
+        status = None
+
+        async def receive():
+            nonlocal received
+            if received:
+                # A connected client sends nothing after the request
+                await asyncio.Event().wait()
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif not message.get("more_body"):
+                threads_seen.sample()
+                await asyncio.sleep(delay)
+
+        await handler(dict(scope), receive, send)
+        return status, started, time.perf_counter()
+
+    async def run():
+        return await asyncio.gather(*(client() for _ in range(clients)))
+
+    started = time.perf_counter()
+    # The loop gets a thread of its own, like under an ASGI server, so
+    # no asgiref state of the calling thread leaks into the requests
+    with ThreadPoolExecutor(max_workers=1) as loop_thread:
+        samples = loop_thread.submit(asyncio.run, run()).result()
+    return samples, threads_seen.peak
+
+
+def http_load(
+        url: str, authorization: str, clients: int, requests: int
+) -> list[tuple[int, float, float]]:
+    """Send ``requests`` GETs to a running server, ``clients`` at a time"""
+
+    def client(_) -> tuple[int, float, float]:
+        started = time.perf_counter()
+        request = Request(url, headers={"Authorization": authorization})
+        try:
+            with urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except OSError:
+            status = 0
+        return status, started, time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        return list(executor.map(client, range(requests)))
+
+
+def summarize(
+        samples: list[tuple[int, float, float]], threads: int = None
+) -> dict:
+    """Latency counts from the moment a client sent its request. The in
+    process loads connect all clients at once, so their latency includes
+    the time a request waited for a free worker."""
+    timings = [(finished - started) * 1000 for _, started, finished in samples]
+    elapsed = (
+        max(finished for *_, finished in samples)
+        - min(started for _, started, _ in samples)
+    )
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for status, *_ in samples if status != 200),
+        "requests_per_second": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "peak_threads": threads,
+    }
+
+
+def run_load(
+        tickets: int,
+        clients: int,
+        delay: float,
+        threads: int,
+        only: list[str] = None,
+        log: Callable[[str], None] = print,
+) -> dict:
+    """Compare the WSGI and ASGI entry points under many slow clients"""
+    dataset = seed_dataset(tickets)
+    authorization = f"Bearer {AccessToken.for_user(dataset['users'][0])}"
+    flight = next(
+        flight for flight in dataset["flights"]
+        if flight.departure_time > timezone.now()
+    )
+    results = {}
+    for target in build_targets(flight):
+        if only and target.name not in only:
+            continue
+        # One user sends every request, far beyond the throttle rates
+        with override_settings(
+                RATE_LIMITER={**settings.RATE_LIMITER, "ENABLED": False}
+        ):
+            wsgi = summarize(
+                *wsgi_load(target, authorization, clients, delay, threads)
+            )
+            with override_settings(ROOT_URLCONF="airport_service.asgi_urls"):
+                asgi = summarize(
+                    *asgi_load(target, authorization, clients, delay)
+                )
+        results[target.name] = {"wsgi": wsgi, "asgi": asgi}
+        log(
+            f"{target.name}: "
+            + " | ".join(
+                f"{path} {result['requests_per_second']} req/s "
+                f"p95={result['p95_ms']}ms threads={result['peak_threads']} "
+                f"errors={result['errors']}"
+                for path, result in (("wsgi", wsgi), ("asgi", asgi))
+            )
+        )
+    return {
+        "meta": {
+            "tickets": tickets,
+            "clients": clients,
+            "client_delay_s": delay,
+            "wsgi_threads": threads,
+            "database": connection.vendor,
+            "created_at": timezone.now().isoformat(),
+        },
+        "results": results,
+    }
+
+
+def run_server_load(
+        servers: dict[str, str],
+        user,
+        clients: int,
+        requests: int,
+        only: list[str] = None,
+        log: Callable[[str], None] = print,
+) -> dict:
+    """Compare running servers, e.g. ``runserver`` against gunicorn.
+
+    Requests are authenticated as ``user`` and use the data already in
+    the database, which the servers must share with this process. Run
+    the servers with ``THROTTLING_ENABLED=false``, one user is quickly
+    throttled otherwise.
+    """
+    authorization = f"Bearer {AccessToken.for_user(user)}"
+    flight = (
+        Flight.objects.filter(departure_time__gt=timezone.now())
+        .select_related("route__source")
+        .order_by("departure_time")
+        .first()
+    )
+    results = {}
+    for target in build_targets(flight):
+        if only and target.name not in only:
+            continue
+        results[target.name] = {}
+        for name, base_url in servers.items():
+            url = base_url.rstrip("/") + target.path
+            if target.query_string:
+                url += f"?{target.query_string}"
+            results[target.name][name] = summarize(
+                http_load(url, authorization, clients, requests)
+            )
+        log(
+            f"{target.name}: "
+            + " | ".join(
+                f"{name} {result['requests_per_second']} req/s "
+                f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                f"errors={result['errors']}"
+                for name, result in results[target.name].items()
+            )
+        )
+    return {
+        "meta": {
+            "servers": servers,
+            "clients": clients,
+            "requests": requests,
+            "created_at": timezone.now().isoformat(),
+        },
+        "results": results,
+    }
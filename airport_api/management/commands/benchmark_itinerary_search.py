@@ -0,0 +1,83 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport_api.itinerary import Connection, FlightGraph
+
+
+class Command(BaseCommand):
+    help = "Measure itinerary search latency on a synthetic flight graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=300)
+        parser.add_argument("--flights-per-day", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--max-stops", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        airports = options["airports"]
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        connections = []
+        for flight_id in range(options["flights_per_day"] * options["days"]):
+            source_id, destination_id = rng.sample(range(airports), 2)
+            departure_time = start + timedelta(
+                minutes=rng.randrange(options["days"] * 24 * 60)
+            )
+            connections.append(
+                Connection(
+                    flight_id=flight_id,
+                    source_id=source_id,
+                    destination_id=destination_id,
+                    departure_time=departure_time,
+                    arrival_time=departure_time + timedelta(
+                        minutes=rng.randrange(45, 600)
+                    ),
+                    seats_available=rng.randrange(0, 200),
+                )
+            )
+
+        graph = FlightGraph()
+        load_started = time.perf_counter()
+        graph.load(connections)
+        load_time = time.perf_counter() - load_started
+
+        timings = []
+        found = 0
+        for _ in range(options["queries"]):
+            source_id, destination_id = rng.sample(range(airports), 2)
+            earliest_departure = start + timedelta(
+                days=rng.randrange(options["days"])
+            )
+            query_started = time.perf_counter()
+            itineraries = graph.search(
+                source_ids=[source_id],
+                destination_ids=[destination_id],
+                earliest_departure=earliest_departure,
+                latest_departure=earliest_departure + timedelta(days=1),
+                min_connection=settings.ITINERARY_MIN_CONNECTION,
+                max_layover=settings.ITINERARY_MAX_LAYOVER,
+                max_stops=options["max_stops"],
+            )
+            timings.append((time.perf_counter() - query_started) * 1000)
+            found += bool(itineraries)
+
+        percentiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(f"Flights loaded: {len(connections)} in {load_time:.3f}s")
+        self.stdout.write(
+            f"Queries: {len(timings)}, with results: {found}"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Latency ms p50={percentiles[49]:.2f} "
+                f"p95={percentiles[94]:.2f} p99={percentiles[98]:.2f}"
+            )
+        )
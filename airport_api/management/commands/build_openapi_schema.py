@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from airport_api.schema_artifact import build_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema served at /api/schema/ as YAML and "
+        "JSON files, each with a gzipped copy"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            default=settings.OPENAPI_SCHEMA_DIR,
+            help="Directory to write the schema files to"
+        )
+
+    def handle(self, *args, **options):
+        for path in build_schema(Path(options["output_dir"])):
+            self.stdout.write(f"{path} ({path.stat().st_size} bytes)")
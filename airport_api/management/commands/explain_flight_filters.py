@@ -0,0 +1,160 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from airport_api.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Flight,
+    Route,
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query plans and timings of extract-based flight time "
+        "filters with the half-open ranges used by the flight list. "
+        "Synthetic flights are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=20000)
+        parser.add_argument("--routes", type=int, default=50)
+        parser.add_argument("--airplanes", type=int, default=20)
+        parser.add_argument("--days", type=int, default=90)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                day, route, airplane = self.populate(options)
+                self.compare(day, route, airplane, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def populate(self, options):
+        rng = random.Random(options["seed"])
+        country = Country.objects.create(name="Benchmark Country")
+        city = City.objects.create(name="Benchmark City", country=country)
+        airports = Airport.objects.bulk_create(
+            Airport(name=f"Benchmark Airport {index}", closest_big_city=city)
+            for index in range(options["routes"] + 1)
+        )
+        routes = Route.objects.bulk_create(
+            Route(
+                source=airports[index],
+                destination=airports[index + 1],
+                distance=rng.randrange(300, 9000),
+            )
+            for index in range(options["routes"])
+        )
+        airplane_type = AirplaneType.objects.create(name="Benchmark Type")
+        airplanes = Airplane.objects.bulk_create(
+            Airplane(
+                name=f"Benchmark Airplane {index}",
+                rows=30,
+                seats_in_row=6,
+                airplane_type=airplane_type,
+            )
+            for index in range(options["airplanes"])
+        )
+
+        start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        flights = []
+        for _ in range(options["flights"]):
+            departure_time = start + timedelta(
+                minutes=rng.randrange(options["days"] * 24 * 60)
+            )
+            flights.append(
+                Flight(
+                    route=rng.choice(routes),
+                    airplane=rng.choice(airplanes),
+                    departure_time=departure_time,
+                    arrival_time=departure_time + timedelta(
+                        minutes=rng.randrange(45, 600)
+                    ),
+                )
+            )
+        Flight.objects.bulk_create(flights, batch_size=1000)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE airport_api_flight")
+        day = timezone.localtime(start).date() + timedelta(
+            days=options["days"] // 2
+        )
+        return day, rng.choice(routes), rng.choice(airplanes)
+
+    def compare(self, day, route, airplane, repeat):
+        day_start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        day_range = {
+            "departure_time__gte": day_start,
+            "departure_time__lt": day_start + timedelta(days=1),
+        }
+        hour_start = day_start + timedelta(hours=8)
+        cases = [
+            (
+                "departure date",
+                {"departure_time__date": day},
+                day_range,
+            ),
+            (
+                "departure date and hour",
+                {"departure_time__date": day, "departure_time__hour": 8},
+                {
+                    "departure_time__gte": hour_start,
+                    "departure_time__lt": hour_start + timedelta(hours=1),
+                },
+            ),
+            (
+                "route and departure date",
+                {"route": route, "departure_time__date": day},
+                {"route": route, **day_range},
+            ),
+            (
+                "airplane and departure date",
+                {"airplane": airplane, "departure_time__date": day},
+                {"airplane": airplane, **day_range},
+            ),
+            (
+                "arrival date",
+                {"arrival_time__date": day},
+                {
+                    "arrival_time__gte": day_start,
+                    "arrival_time__lt": day_start + timedelta(days=1),
+                },
+            ),
+        ]
+        for title, extract_lookups, range_lookups in cases:
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            for label, lookups in (
+                    ("extract", extract_lookups),
+                    ("range", range_lookups),
+            ):
+                queryset = Flight.objects.filter(**lookups).order_by(
+                    "departure_time", "id"
+                )
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    count = len(queryset.values_list("id", flat=True))
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"  {label}: {count} rows, "
+                    f"median {statistics.median(timings):.2f} ms"
+                )
+                for line in queryset.explain().splitlines():
+                    self.stdout.write(f"    {line}")
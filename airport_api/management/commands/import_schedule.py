@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from airport_api.cache import invalidate_reference_model
+from airport_api.flight_search import refresh_changed_since
+from airport_api.itinerary import flight_graph
+from airport_api.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Route,
+)
+from airport_api.schedule_import import ScheduleImporter, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Import airports, routes, airplanes, flights and crew assignments "
+        "from CSV or NDJSON files, resolving related objects by name"
+    )
+
+    steps = (
+        ("airports", "import_airports"),
+        ("routes", "import_routes"),
+        ("airplanes", "import_airplanes"),
+        ("flights", "import_flights"),
+        ("crews", "import_crew_assignments"),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--airports",
+            help="Columns: name, city, country"
+        )
+        parser.add_argument(
+            "--routes",
+            help="Columns: source, destination, distance (airport names)"
+        )
+        parser.add_argument(
+            "--airplanes",
+            help="Columns: name, airplane_type, rows, seats_in_row"
+        )
+        parser.add_argument(
+            "--flights",
+            help="Columns: source, destination, airplane, "
+                 "departure_time, arrival_time"
+        )
+        parser.add_argument(
+            "--crews",
+            help="Crew assignments. Columns: first_name, last_name, "
+                 "airplane, departure_time"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not any(options[name] for name, _ in self.steps):
+            raise CommandError("Pass at least one file to import")
+        importer = ScheduleImporter(batch_size=options["batch_size"])
+        started_at = timezone.now()
+        for name, method in self.steps:
+            path = options[name]
+            if not path:
+                continue
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    count = getattr(importer, method)(read_records(path))
+            except (OSError, ValueError) as error:
+                raise CommandError(f"{path}: {error}")
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name}: {count} rows in {elapsed:.2f}s "
+                    f"({count / max(elapsed, 1e-9):,.0f} rows/s)"
+                )
+            )
+
+        # Bulk writes skip model signals, so refresh what they maintain
+        with transaction.atomic():
+            entries = refresh_changed_since(started_at)
+        self.stdout.write(f"Refreshed {entries} flight search entries")
+        for model in (
+                Country, City, Airport, Route, AirplaneType, Airplane, Crew
+        ):
+            invalidate_reference_model(model._meta.label_lower)
+        flight_graph.invalidate()
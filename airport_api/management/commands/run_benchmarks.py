@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from airport_api.benchmarks import find_regressions, run_suite
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with synthetic data and measure "
+        "latency, query counts and peak memory of the hot endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tickets",
+            type=int,
+            default=1000,
+            help="Number of sold tickets to seed, e.g. 1000, 100000, 1000000"
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--memory-iterations",
+            type=int,
+            default=3,
+            help="Extra runs that count queries and trace peak memory"
+        )
+        parser.add_argument("--order-tickets", type=int, default=10)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Run only this scenario, can be repeated"
+        )
+        parser.add_argument("--output", help="Write results to this JSON file")
+        parser.add_argument(
+            "--baseline",
+            help="Compare with results stored by a previous run"
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative growth of latency and memory"
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = run_suite(
+                tickets=options["tickets"],
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                memory_iterations=options["memory_iterations"],
+                order_tickets=options["order_tickets"],
+                only=options["scenarios"],
+                log=self.stdout.write,
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+            regressions = find_regressions(
+                results, baseline, options["tolerance"]
+            )
+            if regressions:
+                raise CommandError(
+                    "Regressions against the baseline:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
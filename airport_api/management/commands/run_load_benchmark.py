@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from airport_api.load_benchmark import run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and compare the WSGI and ASGI "
+        "entry points under many concurrent slow clients"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=1000)
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=100,
+            help="Concurrent clients per endpoint"
+        )
+        parser.add_argument(
+            "--client-delay",
+            type=float,
+            default=0.5,
+            help="Seconds every client takes to read its response"
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Worker threads of the WSGI server"
+        )
+        parser.add_argument(
+            "--target",
+            action="append",
+            dest="targets",
+            help="Run only this endpoint, can be repeated"
+        )
+        parser.add_argument("--output", help="Write results to this JSON file")
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = run_load(
+                tickets=options["tickets"],
+                clients=options["clients"],
+                delay=options["client_delay"],
+                threads=options["threads"],
+                only=options["targets"],
+                log=self.stdout.write,
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,73 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from airport_api.load_benchmark import run_server_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the requests per second of running servers, e.g. the "
+        "development server against the preforking gunicorn setup"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            action="append",
+            dest="servers",
+            required=True,
+            help="NAME=URL of a running server, can be repeated"
+        )
+        parser.add_argument(
+            "--email",
+            required=True,
+            help="User whose token authenticates the requests"
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=16,
+            help="Requests in flight at once"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests per endpoint and server"
+        )
+        parser.add_argument(
+            "--target",
+            action="append",
+            dest="targets",
+            help="Run only this endpoint, can be repeated"
+        )
+        parser.add_argument("--output", help="Write results to this JSON file")
+
+    def handle(self, *args, **options):
+        servers = {}
+        for server in options["servers"]:
+            name, separator, url = server.partition("=")
+            if not separator or not url:
+                raise CommandError(f"Expected NAME=URL, got {server!r}")
+            servers[name] = url
+
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        results = run_server_load(
+            servers=servers,
+            user=user,
+            clients=options["clients"],
+            requests=options["requests"],
+            only=options["targets"],
+            log=self.stdout.write,
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,603 @@
+import hmac
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+POOL_WAIT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+# psycopg_pool statistics exported per database alias
+POOL_GAUGES = {
+    "pool_size": (
+        "airport_db_pool_connections",
+        "Connections currently opened by the pools.",
+    ),
+    "pool_available": (
+        "airport_db_pool_idle_connections",
+        "Connections waiting in the pools to be used.",
+    ),
+    "pool_max": (
+        "airport_db_pool_max_connections",
+        "Upper bound of connections the pools may open.",
+    ),
+    "requests_waiting": (
+        "airport_db_pool_waiting_requests",
+        "Requests currently waiting for a connection.",
+    ),
+}
+POOL_COUNTERS = {
+    "requests_num": (
+        "airport_db_pool_checkouts_total",
+        "Connections requested from the pools.",
+    ),
+    "requests_queued": (
+        "airport_db_pool_queued_checkouts_total",
+        "Requests that had to wait for a free connection.",
+    ),
+    "requests_errors": (
+        "airport_db_pool_checkout_errors_total",
+        "Requests that got no connection in time.",
+    ),
+    "connections_lost": (
+        "airport_db_pool_connections_lost_total",
+        "Connections found broken by the health check.",
+    ),
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Totals of the worker processes that are gone
+AGGREGATE_FILE = "aggregate.json"
+
+
+def metrics_settings() -> dict:
+    return {
+        "ENABLED": True,
+        "TOKEN": None,
+        "PUBLIC": False,
+        "MULTIPROCESS_DIR": None,
+        "FLUSH_INTERVAL": 5,
+        **getattr(settings, "METRICS", {}),
+    }
+
+
+class Shard:
+    """Counters written by a single thread only.
+
+    Every request thread owns one shard, so recording never takes a
+    lock. A scrape reads all shards and sums them; a sample that is
+    being written concurrently is simply picked up by the next scrape.
+    """
+
+    def __init__(self):
+        self.requests = {}
+        self.latency = {}
+        self.queries = {}
+        self.sql_seconds = {}
+        self.response_bytes = {}
+        self.pool_wait = {}
+
+    @staticmethod
+    def observe(histograms: dict, key, buckets: tuple, value: float) -> None:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [[0] * len(buckets), 0, 0.0]
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                histogram[0][index] += 1
+                break
+        histogram[1] += 1
+        histogram[2] += value
+
+    def record(
+            self,
+            view: str,
+            method: str,
+            status: int,
+            duration: float,
+            query_count: int,
+            sql_seconds: float,
+            response_bytes: int,
+    ) -> None:
+        key = (view, method, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.observe(self.latency, view, LATENCY_BUCKETS, duration)
+        self.observe(self.queries, view, QUERY_BUCKETS, query_count)
+        self.sql_seconds[view] = self.sql_seconds.get(view, 0.0) + sql_seconds
+        self.response_bytes[view] = (
+            self.response_bytes.get(view, 0) + response_bytes
+        )
+
+    def record_pool_wait(self, alias: str, seconds: float) -> None:
+        self.observe(self.pool_wait, alias, POOL_WAIT_BUCKETS, seconds)
+
+    def snapshot(self) -> dict:
+        """Plain copy of the counters, safe to merge and to serialize"""
+        return {
+            "requests": [
+                [*key, value] for key, value in list(self.requests.items())
+            ],
+            "latency": [
+                [view, list(buckets), count, total]
+                for view, (buckets, count, total) in list(self.latency.items())
+            ],
+            "queries": [
+                [view, list(buckets), count, total]
+                for view, (buckets, count, total) in list(self.queries.items())
+            ],
+            "sql_seconds": [
+                [view, value] for view, value in list(self.sql_seconds.items())
+            ],
+            "response_bytes": [
+                [view, value] for view, value in list(self.response_bytes.items())
+            ],
+            "pool_wait": [
+                [alias, list(buckets), count, total]
+                for alias, (buckets, count, total) in list(self.pool_wait.items())
+            ],
+        }
+
+
+class MetricsRegistry:
+    """Per-process registry of request metrics sharded by thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        self._pid = None
+
+    def shard(self) -> Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            shards = list(self._shards)
+        snapshot = merge_snapshots(shard.snapshot() for shard in shards)
+        snapshot["pools"] = pool_stats()
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shards = []
+        self._local = threading.local()
+
+    def flush(self, directory: str, interval: float, force: bool = False) -> None:
+        """Publish this process' totals for the multiprocess scrape.
+
+        Every worker writes its own file and replaces it atomically, the
+        scrape sums all files found in ``directory``. A file already left
+        under the pid of a new process belongs to a dead one and is
+        folded into the aggregate before it would be overwritten.
+        """
+        now = time.monotonic()
+        if not force and now - self._flushed_at < interval:
+            return
+        self._flushed_at = now
+        pid = os.getpid()
+        if self._pid != pid:
+            fold_process(directory, pid)
+            self._pid = pid
+        write_snapshot(Path(directory) / f"{pid}.json", self.snapshot())
+
+
+def write_snapshot(path: Path, snapshot: dict) -> None:
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(snapshot))
+    os.replace(temporary, path)
+
+
+def read_snapshot(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def directory_lock(directory: str):
+    """Serialize folding and scraping of the files of ``directory``"""
+    import fcntl
+
+    with open(Path(directory) / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def without_gauges(snapshot: dict) -> dict:
+    """Counters of a snapshot; pool sizes only hold for a live process"""
+    return {
+        **snapshot,
+        "pools": [
+            sample for sample in snapshot.get("pools", [])
+            if sample[1] in POOL_COUNTERS
+        ],
+    }
+
+
+def _fold(directory: str, pid: int) -> None:
+    path = Path(directory) / f"{pid}.json"
+    snapshot = read_snapshot(path)
+    if snapshot is not None:
+        aggregate = Path(directory) / AGGREGATE_FILE
+        snapshots = [without_gauges(snapshot)]
+        if previous := read_snapshot(aggregate):
+            snapshots.append(previous)
+        write_snapshot(aggregate, merge_snapshots(snapshots))
+    path.unlink(missing_ok=True)
+
+
+def fold_process(directory: str, pid: int) -> None:
+    """Add the counters of a finished process to the aggregate file and
+    remove the file of the process"""
+    with directory_lock(directory):
+        _fold(directory, pid)
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def retire_process() -> None:
+    """Fold the final totals of an exiting worker, see ``worker_exit``.
+
+    Workers recycled by ``max_requests`` would otherwise leave one file
+    each behind, growing every scrape.
+    """
+    directory = metrics_settings()["MULTIPROCESS_DIR"]
+    if directory:
+        registry.flush(directory, 0, force=True)
+        fold_process(directory, os.getpid())
+
+
+def pool_stats() -> list:
+    """``[alias, statistic, value]`` of the connection pools of this process.
+
+    Only backends with a ``pool_stats`` method, like
+    ``airport_service.postgresql_pool``, report any.
+    """
+    samples = []
+    for alias in connections:
+        stats = getattr(connections[alias], "pool_stats", None)
+        if stats is not None:
+            samples.extend([alias, name, value] for name, value in stats().items())
+    return samples
+
+
+def merge_snapshots(snapshots) -> dict:
+    requests, sql_seconds, response_bytes = {}, {}, {}
+    latency, queries, pool_wait, pools = {}, {}, {}, {}
+    for snapshot in snapshots:
+        for view, method, status, value in snapshot["requests"]:
+            key = (view, method, status)
+            requests[key] = requests.get(key, 0) + value
+        for target, name in (
+                (latency, "latency"),
+                (queries, "queries"),
+                (pool_wait, "pool_wait"),
+        ):
+            # Files of workers started before an upgrade may lack some
+            for view, buckets, count, total in snapshot.get(name, []):
+                merged = target.setdefault(view, [[0] * len(buckets), 0, 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += count
+                merged[2] += total
+        for target, name in (
+                (sql_seconds, "sql_seconds"),
+                (response_bytes, "response_bytes"),
+        ):
+            for view, value in snapshot[name]:
+                target[view] = target.get(view, 0) + value
+        # Pool sizes of all worker processes add up to the connections
+        # the service holds; thread shards have no pools of their own
+        for alias, name, value in snapshot.get("pools", []):
+            pools[alias, name] = pools.get((alias, name), 0) + value
+    return {
+        "requests": [[*key, value] for key, value in requests.items()],
+        "latency": [[view, *value] for view, value in latency.items()],
+        "queries": [[view, *value] for view, value in queries.items()],
+        "sql_seconds": [[view, value] for view, value in sql_seconds.items()],
+        "response_bytes": [
+            [view, value] for view, value in response_bytes.items()
+        ],
+        "pool_wait": [[alias, *value] for alias, value in pool_wait.items()],
+        "pools": [[*key, value] for key, value in pools.items()],
+    }
+
+
+registry = MetricsRegistry()
+
+
+def label_value(value) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def format_labels(**labels) -> str:
+    return "{" + ",".join(
+        f'{name}="{label_value(value)}"' for name, value in labels.items()
+    ) + "}"
+
+
+def format_number(value) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_histogram(
+        lines: list[str],
+        name: str,
+        help_text: str,
+        buckets: tuple,
+        samples: list,
+        label_name: str = "view",
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for label, counts, count, total in sorted(samples):
+        labels = {label_name: label}
+        cumulative = 0
+        for bound, bucket in zip(buckets, counts):
+            cumulative += bucket
+            lines.append(
+                f"{name}_bucket{format_labels(**labels, le=format_number(bound))}"
+                f" {cumulative}"
+            )
+        lines.append(f'{name}_bucket{format_labels(**labels, le="+Inf")} {count}')
+        lines.append(f"{name}_count{format_labels(**labels)} {count}")
+        lines.append(f"{name}_sum{format_labels(**labels)} {format_number(total)}")
+
+
+def render_counter(
+        lines: list[str],
+        name: str,
+        help_text: str,
+        samples: list,
+        label_names: tuple = ("view",),
+        kind: str = "counter",
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for *labels, value in sorted(samples):
+        lines.append(
+            f"{name}{format_labels(**dict(zip(label_names, labels)))} "
+            f"{format_number(value)}"
+        )
+
+
+def render(snapshot: dict) -> str:
+    """Prometheus text exposition of a registry snapshot"""
+    lines = []
+    render_counter(
+        lines,
+        "airport_http_requests_total",
+        "Requests handled, by view, method and status.",
+        snapshot["requests"],
+        ("view", "method", "status"),
+    )
+    render_histogram(
+        lines,
+        "airport_http_request_duration_seconds",
+        "Request latency by view.",
+        LATENCY_BUCKETS,
+        snapshot["latency"],
+    )
+    render_histogram(
+        lines,
+        "airport_db_queries_per_request",
+        "SQL queries executed per request by view.",
+        QUERY_BUCKETS,
+        snapshot["queries"],
+    )
+    render_counter(
+        lines,
+        "airport_db_query_duration_seconds_total",
+        "Time spent executing SQL by view.",
+        snapshot["sql_seconds"],
+    )
+    render_counter(
+        lines,
+        "airport_http_response_size_bytes_total",
+        "Bytes of non-streaming responses by view.",
+        snapshot["response_bytes"],
+    )
+    render_histogram(
+        lines,
+        "airport_db_pool_wait_seconds",
+        "Time requests waited for a pooled connection by database.",
+        POOL_WAIT_BUCKETS,
+        snapshot["pool_wait"],
+        "alias",
+    )
+    for stats, kind in ((POOL_GAUGES, "gauge"), (POOL_COUNTERS, "counter")):
+        for statistic, (name, help_text) in stats.items():
+            samples = [
+                [alias, value] for alias, stat, value in snapshot["pools"]
+                if stat == statistic
+            ]
+            if samples:
+                render_counter(
+                    lines, name, help_text, samples, ("alias",), kind
+                )
+    return "\n".join(lines) + "\n"
+
+
+def collect() -> dict:
+    directory = metrics_settings()["MULTIPROCESS_DIR"]
+    if not directory:
+        return registry.snapshot()
+    registry.flush(directory, 0, force=True)
+    snapshots = []
+    with directory_lock(directory):
+        for path in Path(directory).glob("*.json"):
+            # Files of workers killed before worker_exit ran
+            if path.stem.isdigit() and not is_alive(int(path.stem)):
+                _fold(directory, int(path.stem))
+        for path in Path(directory).glob("*.json"):
+            if (snapshot := read_snapshot(path)) is not None:
+                snapshots.append(snapshot)
+    return merge_snapshots(snapshots)
+
+
+def view_name(request) -> str:
+    """``FlightViewSet.list`` style name of the view that served a request"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    view = match.func
+    view_class = getattr(view, "cls", None) or getattr(view, "view_class", None)
+    if view_class is None:
+        return getattr(view, "__name__", match.view_name)
+    actions = getattr(view, "actions", None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f"{view_class.__name__}.{action}"
+
+
+class QueryCounter:
+    """Counts the statements of one request and their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+# Counter of the request being handled. A context variable follows the
+# request into the thread that runs its queries, so requests served
+# concurrently on one event loop never count each other's statements.
+current_counter = ContextVar("airport_query_counter", default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    counter = current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs) -> None:
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and response metrics of every request.
+
+    Works both in the WSGI and in the ASGI handler; in the latter it
+    stays on the event loop instead of pinning requests to a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = metrics_settings()
+        self.enabled = options["ENABLED"]
+        self.directory = options["MULTIPROCESS_DIR"]
+        self.flush_interval = options["FLUSH_INTERVAL"]
+        if self.directory:
+            Path(self.directory).mkdir(parents=True, exist_ok=True)
+        connection_created.connect(install_query_counter)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        for connection in connections.all():
+            install_query_counter(connection)
+        counter = QueryCounter()
+        token = current_counter.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_counter.reset(token)
+        self.record(request, response, counter, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        # Queries run in a worker thread whose connection got the
+        # wrapper from connection_created when it was opened
+        counter = QueryCounter()
+        token = current_counter.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_counter.reset(token)
+        self.record(request, response, counter, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, counter, duration: float) -> None:
+        registry.shard().record(
+            view_name(request),
+            request.method,
+            response.status_code,
+            duration,
+            counter.count,
+            counter.seconds,
+            0 if response.streaming else len(response.content),
+        )
+        if self.directory:
+            registry.flush(self.directory, self.flush_interval)
+
+
+def metrics_view(request):
+    metrics = metrics_settings()
+    token = metrics["TOKEN"]
+    if not token:
+        # Without a token the metrics are only exposed when made public
+        if not metrics["PUBLIC"]:
+            return HttpResponseForbidden()
+    elif not hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(),
+            f"Bearer {token}".encode(),
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
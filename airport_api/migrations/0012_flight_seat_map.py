@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+from airport_api.seat_map import SeatMap
+
+
+def fill_seat_maps(apps, schema_editor):
+    Flight = apps.get_model("airport_api", "Flight")
+    Ticket = apps.get_model("airport_api", "Ticket")
+    flights = Flight.objects.select_related("airplane")
+    for flight in flights.iterator():
+        seat_map = SeatMap(flight.airplane.rows, flight.airplane.seats_in_row)
+        tickets = Ticket.objects.filter(flight=flight).values_list("row", "seat")
+        for row, seat in tickets:
+            if 1 <= row <= seat_map.rows and 1 <= seat <= seat_map.seats_in_row:
+                seat_map.take(row, seat)
+        flight.seat_map = bytes(seat_map)
+        flight.seats_sold = len(seat_map)
+        flight.save(update_fields=["seat_map", "seats_sold"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport_api", "0011_alter_city_options_alter_country_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="seat_map",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="seats_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_seat_maps, migrations.RunPython.noop),
+    ]
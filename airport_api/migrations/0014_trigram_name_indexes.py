@@ -0,0 +1,41 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ("country_name_trgm_idx", "airport_api_country", "name"),
+    ("city_name_trgm_idx", "airport_api_city", "name"),
+    ("airport_name_trgm_idx", "airport_api_airport", "name"),
+    ("airplanetype_name_trgm_idx", "airport_api_airplanetype", "name"),
+    ("airplane_name_trgm_idx", "airport_api_airplane", "name"),
+    ("crew_first_name_trgm_idx", "airport_api_crew", "first_name"),
+    ("crew_last_name_trgm_idx", "airport_api_crew", "last_name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport_api", "0013_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport_api", "0015_flight_time_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                condition=models.Q(("accounted", False)),
+                fields=["arrival_time"],
+                name="flight_unaccounted_arrival_idx",
+            ),
+        ),
+    ]
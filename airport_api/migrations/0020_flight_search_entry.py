@@ -0,0 +1,116 @@
+# Generated by Django 4.2 on 2026-10-17 04:51
+
+from itertools import islice
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import DurationField, ExpressionWrapper, F
+
+TRIGRAM_INDEXES = [
+    ("search_source_name_trgm_idx", "source_name"),
+    ("search_destination_name_trgm_idx", "destination_name"),
+    ("search_airplane_name_trgm_idx", "airplane_name"),
+]
+
+
+def populate_search_entries(apps, schema_editor):
+    Flight = apps.get_model("airport_api", "Flight")
+    FlightSearchEntry = apps.get_model("airport_api", "FlightSearchEntry")
+    rows = Flight.objects.order_by().values(
+        "id",
+        "route_id",
+        "departure_time",
+        "arrival_time",
+        "seats_sold",
+        source_name=F("route__source__name"),
+        source_city=F("route__source__closest_big_city__name"),
+        source_country=F("route__source__closest_big_city__country__name"),
+        destination_name=F("route__destination__name"),
+        destination_city=F("route__destination__closest_big_city__name"),
+        destination_country=F(
+            "route__destination__closest_big_city__country__name"
+        ),
+        airplane_name=F("airplane__name"),
+        capacity=F("airplane__rows") * F("airplane__seats_in_row"),
+        duration=ExpressionWrapper(
+            F("arrival_time") - F("departure_time"),
+            output_field=DurationField()
+        ),
+    )
+    rows = rows.iterator(chunk_size=2000)
+    while batch := list(islice(rows, 2000)):
+        FlightSearchEntry.objects.bulk_create(
+            FlightSearchEntry(flight_id=row.pop("id"), **row) for row in batch
+        )
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "airport_api_flightsearchentry" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport_api", "0019_updated_at_tracking"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlightSearchEntry",
+            fields=[
+                (
+                    "flight",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="airport_api.flight",
+                    ),
+                ),
+                ("route_id", models.BigIntegerField()),
+                ("source_name", models.CharField(max_length=255)),
+                ("source_city", models.CharField(max_length=63)),
+                ("source_country", models.CharField(max_length=63)),
+                ("destination_name", models.CharField(max_length=255)),
+                ("destination_city", models.CharField(max_length=63)),
+                ("destination_country", models.CharField(max_length=63)),
+                ("airplane_name", models.CharField(max_length=255)),
+                ("capacity", models.PositiveIntegerField()),
+                ("departure_time", models.DateTimeField()),
+                ("arrival_time", models.DateTimeField()),
+                ("duration", models.DurationField()),
+                ("seats_sold", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "flight search entries",
+                "ordering": ["departure_time", "flight"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="flightsearchentry",
+            index=models.Index(
+                fields=["departure_time", "flight"], name="search_departure_flight_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flightsearchentry",
+            index=models.Index(fields=["arrival_time"], name="search_arrival_idx"),
+        ),
+        migrations.RunPython(populate_search_entries, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-17 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport_api", "0020_flight_search_entry"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("flight", "row", "seat"), name="ticket_flight_row_seat_unique"
+            ),
+        ),
+    ]
@@ -3,17 +3,28 @@ import uuid
 from datetime import datetime
 from typing import Type
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.dispatch import Signal
 from django.utils import timezone
 from django.utils.text import slugify
 
 from user.models import User
+from .seat_map import SeatMap
+
+SEAT_TAKEN_MESSAGE = "This seat has already been taken for the selected flight"
+
+# Sent with ``flights`` after seat maps are written without Flight.save()
+seats_changed = Signal()
 
 
 class Crew(models.Model):
     first_name = models.CharField(max_length=63)
     last_name = models.CharField(max_length=63)
     flying_hours = models.FloatField(default=0)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
 
     @property
     def full_name(self):
@@ -25,6 +36,10 @@ class Crew(models.Model):
 
 class Country(models.Model):
     name = models.CharField(max_length=63)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ["name"]
@@ -41,6 +56,10 @@ class City(models.Model):
         on_delete=models.CASCADE,
         related_name="cities"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ["name"]
@@ -60,6 +79,10 @@ class Airport(models.Model):
         on_delete=models.CASCADE,
         related_name="airports"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ["name"]
@@ -80,6 +103,10 @@ class Route(models.Model):
         related_name="routes_to"
     )
     distance = models.FloatField()
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ["source"]
@@ -104,6 +131,10 @@ class AirplaneType(models.Model):
         max_length=255,
         unique=True
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ["name"]
@@ -135,6 +166,19 @@ class Airplane(models.Model):
         null=True,
         upload_to=airplane_image_path
     )
+    # sha256 of the original, empty until processed, and variant paths
+    image_hash = models.CharField(
+        max_length=64,
+        blank=True
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ["name"]
@@ -147,7 +191,54 @@ class Airplane(models.Model):
         return f"{self.name}. Type: {self.airplane_type}"
 
 
+class FlightSchedule(models.Model):
+    """Template of a recurring flight, materialized into Flight rows.
+
+    ``weekdays`` is a bit mask with Monday as bit 0, and
+    ``departure_time`` is a local time in the server time zone.
+    """
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="route_schedules"
+    )
+    airplane = models.ForeignKey(
+        Airplane,
+        on_delete=models.CASCADE,
+        related_name="airplane_schedules"
+    )
+    crews = models.ManyToManyField(
+        Crew,
+        related_name="crew_schedules"
+    )
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    weekdays = models.PositiveSmallIntegerField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+
+    class Meta:
+        ordering = ["valid_from", "departure_time"]
+
+    @property
+    def weekday_list(self) -> list[int]:
+        return [day for day in range(7) if self.weekdays & (1 << day)]
+
+    def __str__(self):
+        return (
+            f"{self.route.source.name} -> {self.route.destination.name} "
+            f"at {self.departure_time} from {self.valid_from} "
+            f"until {self.valid_until}"
+        )
+
+
 class Flight(models.Model):
+    # Fields written together whenever seats are sold or released
+    SEAT_FIELDS = ["seat_map", "seats_sold", "seats_version", "updated_at"]
+    # Seat data left out of full saves, see ``Flight.save``
+    SEAT_DATA_FIELDS = ["seat_map", "seats_sold", "seats_version"]
+
     route = models.ForeignKey(
         Route,
         on_delete=models.CASCADE,
@@ -167,18 +258,178 @@ class Flight(models.Model):
     accounted = models.BooleanField(
         default=False
     )
+    seats_sold = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
+    seat_map = models.BinaryField(
+        default=b"",
+        editable=False
+    )
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights"
+    )
+    # Bumped on every seat map write, part of the flight ETag
+    seats_version = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_time", "id"],
+                name="flight_departure_id_idx"
+            ),
+            models.Index(
+                fields=["route", "departure_time"],
+                name="flight_route_departure_idx"
+            ),
+            models.Index(
+                fields=["airplane", "departure_time"],
+                name="flight_airplane_departure_idx"
+            ),
+            models.Index(
+                fields=["arrival_time"],
+                name="flight_arrival_idx"
+            ),
+            models.Index(
+                fields=["arrival_time"],
+                condition=models.Q(accounted=False),
+                name="flight_unaccounted_arrival_idx"
+            ),
+        ]
+
+    def save(self, *args, update_fields=None, **kwargs):
+        """Leave the seat data out of full saves of an existing flight.
+
+        Seats are sold with conditional UPDATEs in ``write_seat_map``, so
+        writing the seat map loaded with this instance would undo every
+        sale made since. The seat data is only saved when asked for, or
+        when an airplane change makes the seat map be rebuilt.
+        """
+        if update_fields is None and not self._state.adding:
+            previous_airplane_id = Flight.objects.filter(
+                pk=self.pk
+            ).values_list("airplane_id", flat=True).first()
+            if previous_airplane_id is not None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and (
+                        field.name not in Flight.SEAT_DATA_FIELDS
+                        or previous_airplane_id != self.airplane_id
+                    )
+                ]
+        super().save(*args, update_fields=update_fields, **kwargs)
 
     @staticmethod
     def has_overlapping_crew(
             crew_ids: list[int],
             departure_time: datetime,
-            arrival_time: datetime
+            arrival_time: datetime,
+            exclude_flight_id: int = None
     ) -> bool:
         return Flight.objects.filter(
             crews__id__in=crew_ids,
             departure_time__lt=arrival_time,
             arrival_time__gt=departure_time,
-        ).exists()
+        ).exclude(id=exclude_flight_id).exists()
+
+    @staticmethod
+    def update_seat_map(
+            flight_id: int,
+            take: list[tuple[int, int]] = (),
+            release: list[tuple[int, int]] = (),
+            error_to_raise: Type[Exception] = ValueError,
+    ) -> "Flight | None":
+        """Mark seats as sold or free in the flight seat map"""
+        flight = Flight.objects.select_related("airplane").filter(
+            pk=flight_id
+        ).first()
+        if flight is None:
+            return None
+        flight.write_seat_map(take, release, error_to_raise)
+        seats_changed.send(sender=Flight, flights=[flight])
+        return flight
+
+    def write_seat_map(
+            self,
+            take: list[tuple[int, int]] = (),
+            release: list[tuple[int, int]] = (),
+            error_to_raise: Type[Exception] = ValueError,
+    ) -> None:
+        """Apply seat changes with a conditional UPDATE instead of a lock.
+
+        The UPDATE only matches the ``seats_version`` the changes were
+        applied to; when another writer got in between, the seat map is
+        read again and the changes re-applied, so the row stays locked
+        only from this statement to the commit.
+        """
+        with transaction.atomic():
+            while True:
+                seat_map = self.get_seat_map()
+                for row, seat in release:
+                    seat_map.release(row, seat)
+                for row, seat in take:
+                    if seat_map.is_taken(row, seat):
+                        raise error_to_raise({"detail": SEAT_TAKEN_MESSAGE})
+                    seat_map.take(row, seat)
+                version = self.seats_version
+                self.set_seat_map(seat_map)
+                if Flight.objects.filter(
+                        pk=self.pk, seats_version=version
+                ).update(
+                    **{field: getattr(self, field) for field in Flight.SEAT_FIELDS}
+                ):
+                    return
+                self.seat_map, self.seats_version = Flight.objects.filter(
+                    pk=self.pk
+                ).values_list("seat_map", "seats_version").get()
+
+    def set_seat_map(self, seat_map: SeatMap) -> None:
+        self.seat_map = bytes(seat_map)
+        self.seats_sold = len(seat_map)
+        self.seats_version += 1
+        self.updated_at = timezone.now()
+
+    def get_seat_map(self) -> SeatMap:
+        return SeatMap(
+            self.airplane.rows,
+            self.airplane.seats_in_row,
+            self.seat_map
+        )
+
+    def rebuild_seat_map(self) -> None:
+        seat_map = SeatMap(
+            self.airplane.rows,
+            self.airplane.seats_in_row
+        )
+        for row, seat in self.flight_tickets.values_list("row", "seat"):
+            if 1 <= row <= seat_map.rows and 1 <= seat <= seat_map.seats_in_row:
+                seat_map.take(row, seat)
+        self.set_seat_map(seat_map)
+
+    def is_seat_taken(self, row: int, seat: int) -> bool:
+        return self.get_seat_map().is_taken(row, seat)
+
+    @property
+    def taken_seats(self) -> list[int]:
+        return sorted(
+            seat for _, seat in self.get_seat_map().taken_positions()
+        )
+
+    @property
+    def tickets_available(self) -> int:
+        return self.airplane.capacity - self.seats_sold
 
     @property
     def flight_time(self) -> str:
@@ -198,6 +449,61 @@ class Flight(models.Model):
         )
 
 
+class FlightSearchEntry(models.Model):
+    """Flat read model of a flight for the flight list and its filters.
+
+    One row per flight with the route endpoints, airplane and seat sales
+    copied in, so listing and filtering flights needs no joins. Rows are
+    written by ``airport_api.flight_search`` whenever a flight or any of
+    the rows it is copied from changes.
+    """
+
+    flight = models.OneToOneField(
+        Flight,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_entry"
+    )
+    route_id = models.BigIntegerField()
+    source_name = models.CharField(max_length=255)
+    source_city = models.CharField(max_length=63)
+    source_country = models.CharField(max_length=63)
+    destination_name = models.CharField(max_length=255)
+    destination_city = models.CharField(max_length=63)
+    destination_country = models.CharField(max_length=63)
+    airplane_name = models.CharField(max_length=255)
+    capacity = models.PositiveIntegerField()
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    duration = models.DurationField()
+    seats_sold = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["departure_time", "flight"]
+        verbose_name_plural = "flight search entries"
+        indexes = [
+            models.Index(
+                fields=["departure_time", "flight"],
+                name="search_departure_flight_idx"
+            ),
+            models.Index(
+                fields=["arrival_time"],
+                name="search_arrival_idx"
+            ),
+        ]
+
+    @property
+    def tickets_available(self) -> int:
+        return self.capacity - self.seats_sold
+
+    def __str__(self):
+        return (
+            f"{self.source_name} -> {self.destination_name} "
+            f"at {self.departure_time}"
+        )
+
+
 class Order(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True
@@ -209,6 +515,16 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="order_created_id_idx"
+            ),
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="order_user_created_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return str(self.created_at)
@@ -230,6 +546,12 @@ class Ticket(models.Model):
 
     class Meta:
         ordering = ["seat"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["flight", "row", "seat"],
+                name="ticket_flight_row_seat_unique"
+            ),
+        ]
 
     @staticmethod
     def validate_seat_and_rows(
@@ -248,6 +570,48 @@ class Ticket(models.Model):
                 {"row": f"row must be in a range of " f"[1,{num_rows}],not [{row}]"}
             )
 
+    @staticmethod
+    def book(
+            order: Order,
+            tickets_data: list[dict],
+            error_to_raise: Type[Exception],
+    ) -> list["Ticket"]:
+        """Create all tickets of an order with one insert, then sell seats.
+
+        The seats were already claimed in the seat inventory, so flights
+        are not locked up front. Tickets are inserted first and every seat
+        map is then written with a conditional UPDATE, in flight id order,
+        which re-checks the seats against the database and keeps each
+        flight row locked only until the commit.
+        """
+        tickets = [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+        flights = {}
+        positions = {}
+        for ticket in tickets:
+            ticket.flight = flights.setdefault(ticket.flight_id, ticket.flight)
+            Ticket.validate_seat_and_rows(
+                ticket.seat,
+                ticket.flight.airplane.seats_in_row,
+                ticket.row,
+                ticket.flight.airplane.rows,
+                error_to_raise,
+            )
+            positions.setdefault(ticket.flight_id, []).append(
+                (ticket.row, ticket.seat)
+            )
+        with transaction.atomic():
+            try:
+                Ticket.objects.bulk_create(tickets)
+            except IntegrityError:
+                raise error_to_raise({"detail": SEAT_TAKEN_MESSAGE})
+            for flight_id in sorted(flights):
+                flights[flight_id].write_seat_map(
+                    take=positions[flight_id],
+                    error_to_raise=error_to_raise,
+                )
+        seats_changed.send(sender=Flight, flights=list(flights.values()))
+        return tickets
+
     def clean(self):
         Ticket.validate_seat_and_rows(
             self.seat,
@@ -262,15 +626,51 @@ class Ticket(models.Model):
             force_insert=False,
             force_update=False,
             using=None,
-            update_fields=None
+            update_fields=None,
+            error_to_raise: Type[Exception] = ValueError,
     ):
-        self.full_clean()
-        super(Ticket, self).save(
-            force_insert,
-            force_update,
-            using,
-            update_fields
-        )
+        self.full_clean(validate_constraints=False)
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = Ticket.objects.filter(pk=self.pk).values_list(
+                    "flight_id", "row", "seat"
+                ).first()
+            current = (self.flight_id, self.row, self.seat)
+            if previous is None:
+                Flight.update_seat_map(
+                    self.flight_id,
+                    take=[(self.row, self.seat)],
+                    error_to_raise=error_to_raise,
+                )
+            elif previous != current:
+                previous_flight_id, *previous_position = previous
+                if previous_flight_id == self.flight_id:
+                    Flight.update_seat_map(
+                        self.flight_id,
+                        take=[(self.row, self.seat)],
+                        release=[tuple(previous_position)],
+                        error_to_raise=error_to_raise,
+                    )
+                else:
+                    Flight.update_seat_map(
+                        previous_flight_id,
+                        release=[tuple(previous_position)]
+                    )
+                    Flight.update_seat_map(
+                        self.flight_id,
+                        take=[(self.row, self.seat)],
+                        error_to_raise=error_to_raise,
+                    )
+            try:
+                super(Ticket, self).save(
+                    force_insert,
+                    force_update,
+                    using,
+                    update_fields
+                )
+            except IntegrityError:
+                raise error_to_raise({"detail": SEAT_TAKEN_MESSAGE})
 
     def __str__(self):
         return (
@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    page_size_query_param = "page_size"
+    max_page_size = settings.CURSOR_PAGINATION_MAX_PAGE_SIZE
+
+
+class FlightPagination(KeysetPagination):
+    # "pk" also matches FlightSearchEntry, whose primary key is the flight
+    ordering = ("departure_time", "pk")
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class TicketPagination(KeysetPagination):
+    ordering = ("id",)
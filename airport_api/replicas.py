@@ -0,0 +1,140 @@
+"""Read replicas of the ``default`` database.
+
+``DATABASE_REPLICAS`` names the database aliases that replicate the
+primary. Reads of safe-method requests go to one of them, picked per
+request, and so do reads inside ``replica_reads()`` blocks, meant for
+reporting jobs. Writes, reads of other requests and of jobs, and reads
+inside a transaction stay on the primary.
+
+A client whose request changed data, e.g. created an order, is pinned
+to the primary for ``REPLICA_PIN_SECONDS``, so it reads its own writes
+while the replicas catch up. Clients are told apart by the user of
+their access token or by their session.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Apps read right after a write of the same client that is not pinned
+# yet, like the session created by a login
+PRIMARY_APPS = {"sessions"}
+
+# Replica the current reads go to, None for the primary
+read_alias = ContextVar("airport_read_alias", default=None)
+
+
+def replica_aliases() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+@contextmanager
+def reads_from(alias: str | None):
+    token = read_alias.set(alias)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+def replica_reads():
+    """Send the reads of the block to a replica, e.g. in reporting jobs"""
+    replicas = replica_aliases()
+    return reads_from(random.choice(replicas) if replicas else None)
+
+
+def primary_reads():
+    """Send the reads of the block to the primary, e.g. to fill a cache"""
+    return reads_from(None)
+
+
+def client_key(request) -> str | None:
+    """The access token user or the session a request comes from"""
+    scheme, _, raw_token = request.headers.get("Authorization", "").partition(" ")
+    if scheme in api_settings.AUTH_HEADER_TYPES and raw_token:
+        try:
+            return f"user:{AccessToken(raw_token)[api_settings.USER_ID_CLAIM]}"
+        except (TokenError, KeyError):
+            return None
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return f"session:{session_key}" if session_key else None
+
+
+def pin_key(client: str) -> str:
+    return f"replicas:pinned:{client}"
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # A transaction reads its own writes
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """Choose where the reads of a request go, pin clients that write"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        replicas = replica_aliases()
+        if not replicas:
+            return self.get_response(request)
+        client = client_key(request)
+        pinned = client is not None and cache.get(pin_key(client), False)
+        with reads_from(self.read_alias(request, replicas, pinned)):
+            response = self.get_response(request)
+        if self.changes_data(request, response) and client is not None:
+            cache.set(pin_key(client), True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        replicas = replica_aliases()
+        if not replicas:
+            return await self.get_response(request)
+        client = client_key(request)
+        pinned = client is not None and await cache.aget(pin_key(client), False)
+        with reads_from(self.read_alias(request, replicas, pinned)):
+            response = await self.get_response(request)
+        if self.changes_data(request, response) and client is not None:
+            await cache.aset(pin_key(client), True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def read_alias(request, replicas: list[str], pinned: bool) -> str | None:
+        if pinned or request.method not in SAFE_METHODS:
+            return None
+        return random.choice(replicas)
+
+    @staticmethod
+    def changes_data(request, response) -> bool:
+        return request.method not in SAFE_METHODS and response.status_code < 400
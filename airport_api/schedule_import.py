@@ -0,0 +1,511 @@
+import csv
+import json
+from contextlib import nullcontext
+from datetime import timezone as dt_timezone
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .crew_schedule import find_crew_conflicts
+from .models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Route,
+)
+
+
+class ScheduleImportError(ValueError):
+    pass
+
+
+def read_records(path: str) -> Iterator[tuple[int, dict]]:
+    """Yield ``(line number, record)`` from a CSV or NDJSON file"""
+    with open(path, newline="", encoding="utf-8") as file:
+        if Path(path).suffix in (".ndjson", ".jsonl"):
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+        else:
+            for line_number, record in enumerate(csv.DictReader(file), start=2):
+                yield line_number, record
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class ScheduleImporter:
+    """Load reference data and flights in batches, resolving names to ids.
+
+    Airports, routes, airplanes and crews are small, so they are matched
+    by name in memory and written with ``bulk_create``. Flights and crew
+    assignments are matched on (airplane, departure time). On PostgreSQL
+    each batch is copied into a temporary staging table with ``COPY``
+    and merged with one UPDATE and one INSERT ... SELECT; other databases
+    use ``bulk_create``/``bulk_update``. Crew assignments are checked for
+    overlapping flights of a crew member before they are written. Callers
+    run each file inside a transaction, so a file that fails to resolve
+    is not half-imported.
+    """
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == "postgresql"
+
+    @staticmethod
+    def field(line_number: int, record: dict, name: str) -> str:
+        value = record.get(name)
+        if value in (None, ""):
+            raise ScheduleImportError(f"line {line_number}: missing {name}")
+        return str(value).strip()
+
+    @staticmethod
+    def moment(line_number: int, record: dict, name: str):
+        value = ScheduleImporter.field(line_number, record, name)
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ScheduleImportError(f"line {line_number}: invalid {name} {value!r}")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        # Keys are compared with values read back from the database
+        return moment.astimezone(dt_timezone.utc)
+
+    @staticmethod
+    def resolve(line_number: int, mapping: dict, key, label: str):
+        try:
+            return mapping[key]
+        except KeyError:
+            raise ScheduleImportError(f"line {line_number}: unknown {label} {key!r}")
+
+    def import_airports(self, records) -> int:
+        countries = {country.name: country for country in Country.objects.all()}
+        cities = {
+            (city.name, city.country_id): city for city in City.objects.all()
+        }
+        airports = {airport.name: airport for airport in Airport.objects.all()}
+        created, updated, count = [], [], 0
+        for line_number, record in records:
+            count += 1
+            country_name = self.field(line_number, record, "country")
+            if country_name not in countries:
+                countries[country_name] = Country.objects.create(name=country_name)
+            country = countries[country_name]
+            city_name = self.field(line_number, record, "city")
+            if (city_name, country.id) not in cities:
+                cities[city_name, country.id] = City.objects.create(
+                    name=city_name, country=country
+                )
+            city = cities[city_name, country.id]
+            name = self.field(line_number, record, "name")
+            airport = airports.get(name)
+            if airport is None:
+                airports[name] = Airport(name=name, closest_big_city=city)
+                created.append(airports[name])
+            elif airport.closest_big_city_id != city.id:
+                airport.closest_big_city = city
+                airport.updated_at = timezone.now()
+                if airport.pk:
+                    updated.append(airport)
+        Airport.objects.bulk_create(created, batch_size=self.batch_size)
+        Airport.objects.bulk_update(
+            updated, ["closest_big_city", "updated_at"], batch_size=self.batch_size
+        )
+        return count
+
+    def import_routes(self, records) -> int:
+        airports = dict(Airport.objects.values_list("name", "id"))
+        routes = {
+            (route.source_id, route.destination_id): route
+            for route in Route.objects.all()
+        }
+        created, updated, count = [], [], 0
+        for line_number, record in records:
+            count += 1
+            key = (
+                self.resolve(
+                    line_number,
+                    airports,
+                    self.field(line_number, record, "source"),
+                    "airport"
+                ),
+                self.resolve(
+                    line_number,
+                    airports,
+                    self.field(line_number, record, "destination"),
+                    "airport"
+                ),
+            )
+            distance = float(self.field(line_number, record, "distance"))
+            route = routes.get(key)
+            if route is None:
+                routes[key] = Route(
+                    source_id=key[0], destination_id=key[1], distance=distance
+                )
+                created.append(routes[key])
+            elif route.distance != distance:
+                route.distance = distance
+                route.updated_at = timezone.now()
+                if route.pk:
+                    updated.append(route)
+        Route.objects.bulk_create(created, batch_size=self.batch_size)
+        Route.objects.bulk_update(
+            updated, ["distance", "updated_at"], batch_size=self.batch_size
+        )
+        return count
+
+    def import_airplanes(self, records) -> int:
+        airplane_types = {
+            airplane_type.name: airplane_type
+            for airplane_type in AirplaneType.objects.all()
+        }
+        airplanes = {airplane.name: airplane for airplane in Airplane.objects.all()}
+        created, count = [], 0
+        for line_number, record in records:
+            count += 1
+            type_name = self.field(line_number, record, "airplane_type")
+            if type_name not in airplane_types:
+                airplane_types[type_name] = AirplaneType.objects.create(
+                    name=type_name
+                )
+            values = {
+                "airplane_type": airplane_types[type_name],
+                "rows": int(self.field(line_number, record, "rows")),
+                "seats_in_row": int(
+                    self.field(line_number, record, "seats_in_row")
+                ),
+            }
+            name = self.field(line_number, record, "name")
+            airplane = airplanes.get(name)
+            if airplane is None:
+                airplanes[name] = Airplane(name=name, **values)
+                created.append(airplanes[name])
+            elif airplane.pk and any(
+                    getattr(airplane, key) != value
+                    for key, value in values.items()
+            ):
+                # Saved one by one so seat maps follow a new cabin layout
+                for key, value in values.items():
+                    setattr(airplane, key, value)
+                airplane.save()
+        Airplane.objects.bulk_create(created, batch_size=self.batch_size)
+        return count
+
+    def import_flights(self, records) -> int:
+        routes = {
+            (source, destination): route_id
+            for route_id, source, destination in Route.objects.values_list(
+                "id", "source__name", "destination__name"
+            )
+        }
+        airplanes = dict(Airplane.objects.values_list("name", "id"))
+        count = 0
+        with self.staging_table(
+                "import_flight",
+                "route_id bigint, airplane_id bigint, "
+                "departure_time timestamptz, arrival_time timestamptz"
+        ):
+            for batch in batched(records, self.batch_size):
+                rows = []
+                for line_number, record in batch:
+                    route_key = (
+                        self.field(line_number, record, "source"),
+                        self.field(line_number, record, "destination"),
+                    )
+                    rows.append(
+                        (
+                            self.resolve(line_number, routes, route_key, "route"),
+                            self.resolve(
+                                line_number,
+                                airplanes,
+                                self.field(line_number, record, "airplane"),
+                                "airplane"
+                            ),
+                            self.moment(line_number, record, "departure_time"),
+                            self.moment(line_number, record, "arrival_time"),
+                        )
+                    )
+                if self.use_copy:
+                    self.merge_flights(rows)
+                else:
+                    self.save_flights(rows)
+                count += len(rows)
+        return count
+
+    def import_crew_assignments(self, records) -> int:
+        crews = {
+            (first_name, last_name): crew_id
+            for crew_id, first_name, last_name in Crew.objects.values_list(
+                "id", "first_name", "last_name"
+            )
+        }
+        airplanes = dict(Airplane.objects.values_list("name", "id"))
+        count = 0
+        with self.staging_table(
+                "import_crew_assignment",
+                "crew_id bigint, airplane_id bigint, departure_time timestamptz"
+        ):
+            for batch in batched(records, self.batch_size):
+                rows, new_crews = [], {}
+                for line_number, record in batch:
+                    crew_key = (
+                        self.field(line_number, record, "first_name"),
+                        self.field(line_number, record, "last_name"),
+                    )
+                    if crew_key not in crews and crew_key not in new_crews:
+                        new_crews[crew_key] = Crew(
+                            first_name=crew_key[0], last_name=crew_key[1]
+                        )
+                    rows.append(
+                        (
+                            line_number,
+                            crew_key,
+                            self.resolve(
+                                line_number,
+                                airplanes,
+                                self.field(line_number, record, "airplane"),
+                                "airplane"
+                            ),
+                            self.moment(line_number, record, "departure_time"),
+                        )
+                    )
+                for crew in Crew.objects.bulk_create(new_crews.values()):
+                    crews[crew.first_name, crew.last_name] = crew.id
+                rows = [
+                    (line_number, crews[crew_key], airplane_id, departure_time)
+                    for line_number, crew_key, airplane_id, departure_time in rows
+                ]
+                existing = self.check_crew_conflicts(rows)
+                if self.use_copy:
+                    self.merge_crew_assignments(rows)
+                else:
+                    self.save_crew_assignments(rows, existing)
+                count += len(rows)
+        return count
+
+    def staging_table(self, name: str, columns: str):
+        return StagingTable(name, columns) if self.use_copy else nullcontext()
+
+    @staticmethod
+    def copy_rows(table: str, columns: str, rows: Iterable[tuple]) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {table}")
+            with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    def merge_flights(self, rows: list[tuple]) -> None:
+        flight_table = connection.ops.quote_name(Flight._meta.db_table)
+        self.copy_rows(
+            "import_flight",
+            "route_id, airplane_id, departure_time, arrival_time",
+            rows
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {flight_table} AS flight
+                SET route_id = staged.route_id,
+                    arrival_time = staged.arrival_time,
+                    updated_at = now()
+                FROM import_flight AS staged
+                WHERE flight.airplane_id = staged.airplane_id
+                  AND flight.departure_time = staged.departure_time
+                  AND (flight.route_id <> staged.route_id
+                       OR flight.arrival_time <> staged.arrival_time)
+                """
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {flight_table} (
+                    route_id, airplane_id, departure_time, arrival_time,
+                    accounted, seats_sold, seat_map, seats_version, updated_at
+                )
+                SELECT DISTINCT ON (staged.airplane_id, staged.departure_time)
+                    staged.route_id, staged.airplane_id,
+                    staged.departure_time, staged.arrival_time,
+                    false, 0, ''::bytea, 0, now()
+                FROM import_flight AS staged
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {flight_table} AS flight
+                    WHERE flight.airplane_id = staged.airplane_id
+                      AND flight.departure_time = staged.departure_time
+                )
+                """
+            )
+
+    def merge_crew_assignments(self, rows: list[tuple]) -> None:
+        flight_table = connection.ops.quote_name(Flight._meta.db_table)
+        crew_table = connection.ops.quote_name(Flight.crews.through._meta.db_table)
+        self.copy_rows(
+            "import_crew_assignment",
+            "crew_id, airplane_id, departure_time",
+            [row[1:] for row in rows]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT staged.airplane_id, staged.departure_time
+                FROM import_crew_assignment AS staged
+                LEFT JOIN {flight_table} AS flight
+                  ON flight.airplane_id = staged.airplane_id
+                 AND flight.departure_time = staged.departure_time
+                WHERE flight.id IS NULL
+                LIMIT 1
+                """
+            )
+            missing = cursor.fetchone()
+            if missing:
+                self.raise_missing_flight(rows, *missing)
+            cursor.execute(
+                f"""
+                INSERT INTO {crew_table} (flight_id, crew_id)
+                SELECT flight.id, staged.crew_id
+                FROM import_crew_assignment AS staged
+                JOIN {flight_table} AS flight
+                  ON flight.airplane_id = staged.airplane_id
+                 AND flight.departure_time = staged.departure_time
+                ON CONFLICT (flight_id, crew_id) DO NOTHING
+                """
+            )
+            cursor.execute(
+                f"""
+                UPDATE {flight_table} AS flight
+                SET updated_at = now()
+                FROM import_crew_assignment AS staged
+                WHERE flight.airplane_id = staged.airplane_id
+                  AND flight.departure_time = staged.departure_time
+                """
+            )
+
+    @staticmethod
+    def existing_flights(rows: list[tuple]) -> dict:
+        """Map (airplane id, departure time) to stored flights of a batch"""
+        departure_times = [row[-1] for row in rows]
+        return {
+            (flight.airplane_id, flight.departure_time): flight
+            for flight in Flight.objects.filter(
+                airplane_id__in={row[-2] for row in rows},
+                departure_time__range=(
+                    min(departure_times), max(departure_times)
+                ),
+            ).only("id", "route_id", "airplane_id", "departure_time", "arrival_time")
+        }
+
+    def save_flights(self, rows: list[tuple]) -> None:
+        existing = self.existing_flights(
+            [(airplane_id, departure_time) for _, airplane_id, departure_time, _ in rows]
+        )
+        created, updated = {}, []
+        for route_id, airplane_id, departure_time, arrival_time in rows:
+            key = (airplane_id, departure_time)
+            flight = existing.get(key)
+            if flight is None:
+                created[key] = Flight(
+                    route_id=route_id,
+                    airplane_id=airplane_id,
+                    departure_time=departure_time,
+                    arrival_time=arrival_time,
+                )
+            elif (flight.route_id, flight.arrival_time) != (route_id, arrival_time):
+                flight.route_id = route_id
+                flight.arrival_time = arrival_time
+                flight.updated_at = timezone.now()
+                updated.append(flight)
+        Flight.objects.bulk_create(created.values(), batch_size=self.batch_size)
+        Flight.objects.bulk_update(
+            updated, ["route", "arrival_time", "updated_at"], batch_size=self.batch_size
+        )
+
+    def check_crew_conflicts(self, rows: list[tuple]) -> dict:
+        """Reject assignments that put a crew member on overlapping flights.
+
+        The assigned flights are checked with their stored and staged crews
+        against each other and the stored schedule, which includes the
+        batches imported before. Returns the flights of the batch.
+        """
+        existing = self.existing_flights([row[2:] for row in rows])
+        flights, crews = {}, {}
+        for line_number, crew_id, airplane_id, departure_time in rows:
+            flight = existing.get((airplane_id, departure_time))
+            if flight is None:
+                self.raise_missing_flight(rows, airplane_id, departure_time)
+            flights[flight.id] = flight
+            crews.setdefault(flight.id, set()).add(crew_id)
+        for flight_id, crew_id in Flight.crews.through.objects.filter(
+                flight_id__in=flights
+        ).values_list("flight_id", "crew_id"):
+            crews[flight_id].add(crew_id)
+        conflicts = find_crew_conflicts(
+            [
+                {
+                    "id": flight_id,
+                    "crews": sorted(crews[flight_id]),
+                    "departure_time": flight.departure_time,
+                    "arrival_time": flight.arrival_time,
+                }
+                for flight_id, flight in flights.items()
+            ]
+        )
+        if conflicts:
+            conflict = conflicts[0]
+            raise ScheduleImportError(
+                f"crew {conflict['crew']} is assigned to overlapping flights "
+                + " and ".join(str(flight["id"]) for flight in conflict["flights"])
+            )
+        return existing
+
+    def save_crew_assignments(self, rows: list[tuple], existing: dict) -> None:
+        assignments = []
+        for line_number, crew_id, airplane_id, departure_time in rows:
+            flight = existing[(airplane_id, departure_time)]
+            assignments.append(
+                Flight.crews.through(flight_id=flight.id, crew_id=crew_id)
+            )
+        Flight.crews.through.objects.bulk_create(
+            assignments, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        Flight.objects.filter(
+            id__in={assignment.flight_id for assignment in assignments}
+        ).update(updated_at=timezone.now())
+
+    @staticmethod
+    def raise_missing_flight(rows, airplane_id, departure_time):
+        line_number = next(
+            row[0] for row in rows
+            if row[2] == airplane_id and row[3] == departure_time
+        )
+        raise ScheduleImportError(
+            f"line {line_number}: no flight of airplane {airplane_id} "
+            f"departing at {departure_time.isoformat()}"
+        )
+
+
+class StagingTable:
+    """Temporary table dropped at the end of the surrounding transaction"""
+
+    def __init__(self, name: str, columns: str):
+        self.name = name
+        self.columns = columns
+
+    def __enter__(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {self.name} "
+                f"({self.columns}) ON COMMIT DROP"
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
@@ -0,0 +1,175 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Type
+
+from django.db import transaction
+from django.utils import timezone
+
+from .crew_schedule import find_crew_conflicts
+from .flight_search import refresh_search_entries
+from .inventory import get_seat_inventory
+from .itinerary import flight_graph
+from .models import Flight, FlightSchedule
+
+
+def schedule_dates(schedule: FlightSchedule) -> list[date]:
+    dates = []
+    day = schedule.valid_from
+    while day <= schedule.valid_until:
+        if schedule.weekdays & (1 << day.weekday()):
+            dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+
+def planned_times(schedule: FlightSchedule) -> dict[date, tuple[datetime, datetime]]:
+    """Departure and arrival of every flight the schedule plans"""
+    planned = {}
+    for day in schedule_dates(schedule):
+        departure_time = timezone.make_aware(
+            datetime.combine(day, schedule.departure_time)
+        )
+        # Aware arithmetic keeps the wall clock, which is an hour off
+        # across a DST change, so the duration is added in UTC
+        arrival_time = (
+            departure_time.astimezone(dt_timezone.utc) + schedule.duration
+        ).astimezone(departure_time.tzinfo)
+        planned[day] = (departure_time, arrival_time)
+    return planned
+
+
+def refresh_flights(created_ids: list[int], updated_ids: list[int]) -> None:
+    """Apply bulk writes that bypassed the Flight signal handlers"""
+    inventory = get_seat_inventory()
+    for flight_id in updated_ids:
+        inventory.reset(flight_id)
+    flight_graph.refresh_flights(
+        Flight.objects.filter(id__in=[*created_ids, *updated_ids])
+    )
+
+
+def sync_schedule_flights(
+        schedule: FlightSchedule,
+        error_to_raise: Type[Exception]
+) -> dict:
+    """Create, move and remove the upcoming flights of a schedule.
+
+    Only dates whose flight is missing, differs from the template or is
+    no longer planned are written, so editing a template leaves the rest
+    of the season untouched. Departed flights are never changed. Crew
+    overlaps of every written flight are checked in one sweep before
+    anything is saved, and flights with sold seats are neither removed
+    nor moved to another airplane.
+    """
+    now = timezone.now()
+    crew_ids = sorted(schedule.crews.values_list("id", flat=True))
+    planned = {
+        day: times for day, times in planned_times(schedule).items()
+        if times[0] > now
+    }
+    existing = {}
+    for flight in schedule.flights.filter(departure_time__gt=now):
+        existing.setdefault(timezone.localdate(flight.departure_time), flight)
+    flight_crews = {}
+    for flight_id, crew_id in Flight.crews.through.objects.filter(
+            flight__in=existing.values()
+    ).values_list("flight_id", "crew_id"):
+        flight_crews.setdefault(flight_id, []).append(crew_id)
+
+    to_create, to_update, to_recrew = [], [], []
+    for day, (departure_time, arrival_time) in planned.items():
+        flight = existing.pop(day, None)
+        if flight is None:
+            to_create.append(
+                Flight(
+                    route_id=schedule.route_id,
+                    airplane_id=schedule.airplane_id,
+                    departure_time=departure_time,
+                    arrival_time=arrival_time,
+                    schedule=schedule,
+                )
+            )
+            continue
+        values = {
+            "route_id": schedule.route_id,
+            "airplane_id": schedule.airplane_id,
+            "departure_time": departure_time,
+            "arrival_time": arrival_time,
+        }
+        if any(getattr(flight, key) != value for key, value in values.items()):
+            if flight.airplane_id != schedule.airplane_id and flight.seats_sold:
+                raise error_to_raise(
+                    {
+                        "detail": "Seats are already sold on the flight "
+                                  f"of {day}, its airplane cannot be changed"
+                    }
+                )
+            for key, value in values.items():
+                setattr(flight, key, value)
+            flight.updated_at = now
+            to_update.append(flight)
+        elif sorted(flight_crews.get(flight.id, [])) != crew_ids:
+            to_recrew.append(flight)
+    to_delete = list(existing.values())
+    sold = [flight for flight in to_delete if flight.seats_sold]
+    if sold:
+        raise error_to_raise(
+            {
+                "detail": "Seats are already sold on flights that the "
+                          "schedule no longer plans: "
+                          + ", ".join(
+                              str(timezone.localdate(flight.departure_time))
+                              for flight in sold
+                          )
+            }
+        )
+
+    conflicts = find_crew_conflicts(
+        [
+            {
+                "id": flight.id,
+                "crews": crew_ids,
+                "departure_time": flight.departure_time,
+                "arrival_time": flight.arrival_time,
+            }
+            for flight in [*to_create, *to_update, *to_recrew]
+        ],
+        exclude_flight_ids=[flight.id for flight in to_delete],
+    )
+    if conflicts:
+        raise error_to_raise({"conflicts": conflicts})
+
+    with transaction.atomic():
+        Flight.objects.filter(id__in=[flight.id for flight in to_delete]).delete()
+        Flight.objects.bulk_create(to_create)
+        Flight.objects.bulk_update(
+            to_update,
+            ["route", "airplane", "departure_time", "arrival_time", "updated_at"]
+        )
+        Flight.objects.filter(
+            id__in=[flight.id for flight in to_recrew]
+        ).update(updated_at=now)
+        relinked = [*to_create, *to_update, *to_recrew]
+        Flight.crews.through.objects.filter(
+            flight_id__in=[flight.id for flight in relinked]
+        ).delete()
+        Flight.crews.through.objects.bulk_create(
+            Flight.crews.through(flight_id=flight.id, crew_id=crew_id)
+            for flight in relinked
+            for crew_id in crew_ids
+        )
+        refresh_search_entries(
+            Flight.objects.filter(
+                id__in=[flight.id for flight in [*to_create, *to_update]]
+            )
+        )
+    transaction.on_commit(
+        lambda: refresh_flights(
+            [flight.id for flight in to_create],
+            [flight.id for flight in to_update]
+        )
+    )
+    return {
+        "created": len(to_create),
+        "updated": len(to_update) + len(to_recrew),
+        "deleted": len(to_delete),
+    }
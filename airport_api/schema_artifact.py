@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+accepts_gzip = re.compile(r"\bgzip\b")
+
+
+class Artifact(NamedTuple):
+    content: bytes
+    gzipped: bytes
+    digest: str
+
+    def etag(self, gzipped: bool) -> str:
+        # Strong ETags must differ between encodings of the same schema
+        return f'"{self.digest}-gzip"' if gzipped else f'"{self.digest}"'
+
+
+def build_schema(directory: Path) -> list[Path]:
+    """Render the schema to ``schema.<format>`` files, each with a gzipped
+    copy next to it, and return the paths written"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for suffix, renderer_class in RENDERERS.items():
+        content = renderer_class().render(schema, renderer_context={})
+        path = directory / f"schema.{suffix}"
+        path.write_bytes(content)
+        # Without a timestamp the same schema compresses to the same bytes
+        path.with_name(f"{path.name}.gz").write_bytes(
+            gzip.compress(content, compresslevel=9, mtime=0)
+        )
+        paths += [path, path.with_name(f"{path.name}.gz")]
+    load_artifact.cache_clear()
+    return paths
+
+
+@lru_cache(maxsize=None)
+def load_artifact(directory: Path, suffix: str) -> Artifact:
+    """Read a built schema once per process. A missing file raises
+    ``FileNotFoundError``, which is not cached."""
+    path = directory / f"schema.{suffix}"
+    content = path.read_bytes()
+    return Artifact(
+        content=content,
+        gzipped=path.with_name(f"{path.name}.gz").read_bytes(),
+        digest=hashlib.sha256(content).hexdigest()[:32],
+    )
+
+
+class SchemaArtifactView(SpectacularAPIView):
+    """Serve the schema built by ``build_openapi_schema``.
+
+    Generating the schema introspects every view, which is too slow to
+    repeat for each Swagger or Redoc page load. The built files are sent
+    with strong ETags, gzipped when the client accepts it. Without them
+    the schema is generated live in debug mode only.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        suffix = "json" if renderer.format == "json" else "yaml"
+        try:
+            artifact = load_artifact(Path(settings.OPENAPI_SCHEMA_DIR), suffix)
+        except FileNotFoundError:
+            if settings.DEBUG:
+                return super().get(request, *args, **kwargs)
+            raise Http404("The OpenAPI schema has not been built")
+
+        gzipped = bool(
+            accepts_gzip.search(request.headers.get("Accept-Encoding", ""))
+        )
+        content_type = request.accepted_media_type
+        if renderer.charset:
+            content_type += f"; charset={renderer.charset}"
+        response = HttpResponse(
+            artifact.gzipped if gzipped else artifact.content,
+            content_type=content_type,
+        )
+        if gzipped:
+            response["Content-Encoding"] = "gzip"
+        response["ETag"] = artifact.etag(gzipped)
+        # Clients revalidate on every load, which costs a 304 at most
+        response["Cache-Control"] = "no-cache"
+        response["Content-Disposition"] = (
+            f'inline; filename="{self._get_filename(request, None)}"'
+        )
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return get_conditional_response(
+            request, etag=response["ETag"], response=response
+        )
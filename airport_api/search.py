@@ -0,0 +1,20 @@
+from django.db.models import Q, QuerySet
+
+
+def substring_filter(queryset: QuerySet, value: str, *lookups: str) -> QuerySet:
+    """Filter by a case-insensitive substring of any of the given fields.
+
+    ``icontains`` compiles to ``UPPER("field"::text) LIKE UPPER('%value%')``
+    on PostgreSQL, which is exactly the expression the ``pg_trgm`` GIN
+    indexes from migration 0014 are built on, so the planner can answer
+    it with a bitmap index scan instead of a sequential scan. Joined
+    lookups such as ``route__source__name`` hit the same indexes on the
+    related table. SQLite has no trigram support and keeps a plain LIKE.
+    """
+    value = value.strip()
+    if not value:
+        return queryset
+    condition = Q()
+    for lookup in lookups:
+        condition |= Q(**{f"{lookup}__icontains": value})
+    return queryset.filter(condition)
@@ -0,0 +1,52 @@
+class SeatMap:
+    """Occupancy bitset of a flight, one bit per seat.
+
+    Seats are numbered row by row, so the bit of (row, seat) is
+    ``(row - 1) * seats_in_row + (seat - 1)``. Bits are stored most
+    significant first inside each byte, the same layout Redis uses for
+    GETBIT/SETBIT, and missing trailing bytes are treated as free seats.
+    """
+
+    def __init__(self, rows: int, seats_in_row: int, data: bytes = b""):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        size = (rows * seats_in_row + 7) // 8
+        self.data = bytearray(bytes(data)[:size].ljust(size, b"\x00"))
+
+    def index(self, row: int, seat: int) -> int:
+        return (row - 1) * self.seats_in_row + (seat - 1)
+
+    def position(self, index: int) -> tuple[int, int]:
+        row, seat = divmod(index, self.seats_in_row)
+        return row + 1, seat + 1
+
+    def is_taken(self, row: int, seat: int) -> bool:
+        index = self.index(row, seat)
+        return bool(self.data[index >> 3] & (0x80 >> (index & 7)))
+
+    def take(self, row: int, seat: int) -> None:
+        index = self.index(row, seat)
+        self.data[index >> 3] |= 0x80 >> (index & 7)
+
+    def release(self, row: int, seat: int) -> None:
+        index = self.index(row, seat)
+        self.data[index >> 3] &= ~(0x80 >> (index & 7)) & 0xFF
+
+    def taken_indexes(self) -> list[int]:
+        indexes = []
+        for byte_index, byte in enumerate(self.data):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (0x80 >> bit):
+                    indexes.append(byte_index * 8 + bit)
+        return indexes
+
+    def taken_positions(self) -> list[tuple[int, int]]:
+        return [self.position(index) for index in self.taken_indexes()]
+
+    def __len__(self) -> int:
+        return sum(bin(byte).count("1") for byte in self.data)
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.data)
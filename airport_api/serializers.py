@@ -1,5 +1,14 @@
+import secrets
+
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.db import transaction
+from django.db.models import Prefetch
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+
+from .images import AIRPLANE_IMAGE_VARIANTS, store_original
+from .inventory import get_seat_inventory
 from .models import (
     Crew,
     Country,
@@ -9,9 +18,14 @@ from .models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightSchedule,
+    FlightSearchEntry,
     Order,
-    Ticket
+    Ticket,
+    SEAT_TAKEN_MESSAGE,
 )
+from .schedules import sync_schedule_flights
+from .tasks import process_airplane_image
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -91,6 +105,7 @@ class CityRetrieveSerializer(serializers.ModelSerializer):
             "country",
 
         ]
+        select_related_fields = {"country": ["country"]}
 
 
 class AirportSerializer(serializers.ModelSerializer):
@@ -128,6 +143,10 @@ class AirportRetrieveSerializer(serializers.ModelSerializer):
             "closest_big_city",
             "country"
         ]
+        select_related_fields = {
+            "closest_big_city": ["closest_big_city"],
+            "country": ["closest_big_city__country"],
+        }
 
 
 class RouteSerializer(serializers.ModelSerializer):
@@ -158,6 +177,10 @@ class RouteListSerializer(serializers.ModelSerializer):
             "source",
             "destination",
         ]
+        select_related_fields = {
+            "source": ["source"],
+            "destination": ["destination"],
+        }
 
 
 class RouteRetrieveSerializer(serializers.ModelSerializer):
@@ -177,6 +200,10 @@ class RouteRetrieveSerializer(serializers.ModelSerializer):
             "destination",
             "distance_in_km_and_miles",
         ]
+        select_related_fields = {
+            "source": ["source"],
+            "destination": ["destination"],
+        }
 
 
 class AirplaneTypeSerializer(serializers.ModelSerializer):
@@ -215,11 +242,49 @@ class AirplaneSerializer(serializers.ModelSerializer):
         ]
 
 
+@extend_schema_field(
+    {
+        "type": "object",
+        "additionalProperties": {
+            "type": "string",
+            "format": "uri",
+            "nullable": True
+        },
+    }
+)
+class AirplaneImageVariantsField(serializers.Field):
+    """URLs of resized image variants.
+
+    Until the background task has rendered them every variant points at
+    the original upload, and all of them are null without an image.
+    """
+
+    def __init__(self, variants=None, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.variants = variants or list(AIRPLANE_IMAGE_VARIANTS)
+
+    def to_representation(self, airplane: Airplane):
+        urls = {}
+        for variant in self.variants:
+            name = airplane.image_variants.get(variant) or airplane.image.name
+            url = default_storage.url(name) if name else None
+            request = self.context.get("request")
+            if url and request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant] = url
+        return urls
+
+
 class AirplaneListSerializer(serializers.ModelSerializer):
     airplane_type = serializers.CharField(
         source="airplane_type.name",
         read_only=True
     )
+    images = AirplaneImageVariantsField(
+        variants=["thumbnail", "thumbnail_webp"]
+    )
 
     class Meta:
         model = Airplane
@@ -229,24 +294,51 @@ class AirplaneListSerializer(serializers.ModelSerializer):
             "rows",
             "seats_in_row",
             "airplane_type",
-            "image"
+            "images"
         ]
+        select_related_fields = {"airplane_type": ["airplane_type"]}
 
 
 class AirplaneImageSerializer(serializers.ModelSerializer):
+    images = AirplaneImageVariantsField()
+
     class Meta:
         model = Airplane
         fields = [
             "id",
-            "image"
+            "image",
+            "images"
         ]
 
+    def update(self, instance, validated_data):
+        """Store the upload by content hash and render variants in Celery.
+
+        An image already processed for another airplane reuses its
+        variants right away instead of queueing the task again.
+        """
+        name, digest = store_original(validated_data["image"])
+        instance.image = name
+        instance.image_hash = digest
+        instance.image_variants = (
+            Airplane.objects.filter(image_hash=digest)
+            .exclude(image_variants={})
+            .values_list("image_variants", flat=True)
+            .first()
+        ) or {}
+        instance.save(update_fields=["image", "image_hash", "image_variants"])
+        if not instance.image_variants:
+            transaction.on_commit(
+                lambda: process_airplane_image.delay(instance.id, name, digest)
+            )
+        return instance
+
 
 class AirplaneRetrieveSerializer(AirplaneSerializer):
     airplane_type = serializers.CharField(
         source="airplane_type.name",
         read_only=True
     )
+    images = AirplaneImageVariantsField()
 
     class Meta:
         model = Airplane
@@ -258,7 +350,9 @@ class AirplaneRetrieveSerializer(AirplaneSerializer):
             "capacity",
             "airplane_type",
             "image",
+            "images",
         ]
+        select_related_fields = {"airplane_type": ["airplane_type"]}
 
 
 class FlightSerializer(serializers.ModelSerializer):
@@ -291,7 +385,8 @@ class FlightSerializer(serializers.ModelSerializer):
         if Flight.has_overlapping_crew(
                 crew_ids,
                 attrs["departure_time"],
-                attrs["arrival_time"]
+                attrs["arrival_time"],
+                exclude_flight_id=self.instance.id if self.instance else None
         ):
             raise serializers.ValidationError(
                 {
@@ -302,6 +397,159 @@ class FlightSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves objects from ``prefetched`` before querying them one by one"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prefetched = {}
+
+    def to_internal_value(self, data):
+        if not isinstance(data, bool):
+            try:
+                return self.prefetched[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class FlightProposalListSerializer(serializers.ListSerializer):
+    """Loads the routes, airplanes and crews of all proposals with one
+    query each instead of one per proposed flight"""
+
+    related_fields = ("route", "airplane", "crews")
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for name in self.related_fields:
+                field = self.child.fields[name]
+                field = getattr(field, "child_relation", field)
+                ids = set()
+                for item in data:
+                    values = item.get(name) if isinstance(item, dict) else None
+                    if not isinstance(values, list):
+                        values = [values]
+                    for value in values:
+                        try:
+                            ids.add(int(value))
+                        except (TypeError, ValueError):
+                            continue
+                field.prefetched = field.get_queryset().in_bulk(ids)
+        return super().to_internal_value(data)
+
+
+class FlightProposalSerializer(FlightSerializer):
+    id = serializers.IntegerField(
+        required=False,
+        help_text="Id of an existing flight that is being rescheduled"
+    )
+    route = PrefetchedPrimaryKeyRelatedField(queryset=Route.objects.all())
+    airplane = PrefetchedPrimaryKeyRelatedField(queryset=Airplane.objects.all())
+    crews = PrefetchedPrimaryKeyRelatedField(
+        queryset=Crew.objects.all(),
+        many=True
+    )
+
+    class Meta(FlightSerializer.Meta):
+        list_serializer_class = FlightProposalListSerializer
+
+    def validate(self, attrs):
+        # Crew overlaps are checked for the whole batch at once
+        return attrs
+
+
+class CrewConflictSerializer(serializers.Serializer):
+    crew = serializers.IntegerField()
+    flights = serializers.ListField(
+        child=serializers.DictField(child=serializers.IntegerField())
+    )
+
+
+class FlightBatchValidationSerializer(serializers.Serializer):
+    flights = FlightProposalSerializer(many=True, allow_empty=False)
+    valid = serializers.BooleanField(read_only=True)
+    conflicts = CrewConflictSerializer(many=True, read_only=True)
+
+
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        source="weekday_list",
+        help_text="Days of the week the flight departs, Monday is 0"
+    )
+
+    class Meta:
+        model = FlightSchedule
+        fields = [
+            "id",
+            "route",
+            "airplane",
+            "crews",
+            "departure_time",
+            "duration",
+            "weekdays",
+            "valid_from",
+            "valid_until",
+        ]
+
+    def validate(self, attrs):
+        if "weekday_list" in attrs:
+            attrs["weekdays"] = sum(
+                1 << day for day in set(attrs.pop("weekday_list"))
+            )
+        valid_from = attrs.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = attrs.get("valid_until", getattr(self.instance, "valid_until", None))
+        if valid_until < valid_from:
+            raise serializers.ValidationError(
+                {"valid_until": "The schedule must end after it starts"}
+            )
+        if (valid_until - valid_from).days > 366:
+            raise serializers.ValidationError(
+                {"valid_until": "A schedule can cover at most one year"}
+            )
+        duration = attrs.get("duration", getattr(self.instance, "duration", None))
+        if duration.total_seconds() <= 0:
+            raise serializers.ValidationError(
+                {"duration": "Duration must be positive"}
+            )
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        crews = validated_data.pop("crews", [])
+        schedule = FlightSchedule.objects.create(**validated_data)
+        schedule.crews.set(crews)
+        sync_schedule_flights(schedule, serializers.ValidationError)
+        return schedule
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        crews = validated_data.pop("crews", None)
+        instance = super().update(instance, validated_data)
+        if crews is not None:
+            instance.crews.set(crews)
+        sync_schedule_flights(instance, serializers.ValidationError)
+        return instance
+
+
+class FlightScheduleListSerializer(FlightScheduleSerializer):
+    route = RouteListSerializer(read_only=True)
+    airplane = serializers.CharField(source="airplane.name", read_only=True)
+    crews = serializers.SlugRelatedField(
+        many=True,
+        read_only=True,
+        slug_field="full_name"
+    )
+
+    class Meta(FlightScheduleSerializer.Meta):
+        select_related_fields = {
+            "route": ["route__source", "route__destination"],
+            "airplane": ["airplane"],
+        }
+        prefetch_related_fields = {"crews": ["crews"]}
+
+
 class FlightListSerializer(serializers.ModelSerializer):
     airplane = serializers.CharField(source="airplane.name")
     route = RouteListSerializer()
@@ -317,12 +565,37 @@ class FlightListSerializer(serializers.ModelSerializer):
         ]
 
 
+class FlightSearchRouteSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="route_id")
+    source = serializers.CharField(source="source_name")
+    destination = serializers.CharField(source="destination_name")
+
+
+class FlightSearchEntrySerializer(serializers.ModelSerializer):
+    """Same shape as ``FlightListSerializer``, read from the flat entries"""
+
+    id = serializers.IntegerField(source="flight_id")
+    route = FlightSearchRouteSerializer(source="*")
+    airplane = serializers.CharField(source="airplane_name")
+
+    class Meta:
+        model = FlightSearchEntry
+        fields = [
+            "id",
+            "route",
+            "airplane",
+            "departure_time",
+            "arrival_time",
+        ]
+
+
 class FlightRetrieveSerializer(serializers.ModelSerializer):
     airplane = serializers.CharField(source="airplane.name")
     route = RouteListSerializer()
     crews = CrewListSerializer(many=True, read_only=True)
-    taken_seats = serializers.SlugRelatedField(
-        many=True, read_only=True, slug_field="seat", source="flight_tickets"
+    taken_seats = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True
     )
     tickets_available = serializers.IntegerField(read_only=True)
 
@@ -340,12 +613,92 @@ class FlightRetrieveSerializer(serializers.ModelSerializer):
             "flight_time",
             "flight_is_over",
         ]
+        select_related_fields = {
+            "route": ["route__source", "route__destination"],
+            "airplane": ["airplane"],
+            "taken_seats": ["airplane"],
+            "tickets_available": ["airplane"],
+        }
+        prefetch_related_fields = {"crews": ["crews"]}
+
+
+class FlightSeatsSerializer(serializers.ModelSerializer):
+    taken_seats = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Flight
+        fields = [
+            "id",
+            "taken_seats",
+            "tickets_available",
+            "seats_version",
+        ]
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.CharField()
+    destination = serializers.CharField()
+    date = serializers.DateField(required=False)
+    max_stops = serializers.IntegerField(
+        min_value=0,
+        max_value=2,
+        default=2
+    )
+    min_connection = serializers.IntegerField(
+        min_value=0,
+        required=False,
+        help_text="Minimum connection time in minutes"
+    )
+    seats = serializers.IntegerField(
+        min_value=1,
+        default=1
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=50,
+        default=10
+    )
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration = serializers.CharField()
+    stops = serializers.IntegerField()
+    flights = FlightListSerializer(many=True)
+
+
+class TicketBookingListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            flight_ids = set()
+            for item in data:
+                try:
+                    flight_ids.add(int(item["flight"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            self.child.fields["flight"].prefetched = (
+                Flight.objects.select_related("airplane").in_bulk(flight_ids)
+            )
+        return super().to_internal_value(data)
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    flight = PrefetchedPrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+
     class Meta:
         model = Ticket
         fields = ["id", "row", "seat", "flight"]
+        list_serializer_class = TicketBookingListSerializer
+        # Taken seats are checked against the seat map, the unique
+        # constraint only backs it up in the database
+        validators = []
 
     def validate(self, attrs):
         flight = attrs.get("flight")
@@ -363,13 +716,131 @@ class TicketSerializer(serializers.ModelSerializer):
             attrs["flight"].airplane.rows,
             serializers.ValidationError,
         )
-        if Ticket.objects.filter(
-                seat=attrs["seat"],
-                row=attrs["row"],
-                flight=attrs["flight"]
-        ).exists():
+        if attrs["flight"].is_seat_taken(attrs["row"], attrs["seat"]):
+            raise serializers.ValidationError({"detail": SEAT_TAKEN_MESSAGE})
+        return attrs
+
+    @staticmethod
+    def hold_seats(tickets_data: list[dict], hold: str = None) -> tuple:
+        """Hold the requested seats in the seat inventory, flight by flight.
+
+        Seats are held under the given hold token, or a new token for
+        ``claim_ttl`` seconds, and only claimed as sold once the
+        transaction commits, so the seats of a rolled back order are free
+        again when the hold expires rather than when the inventory reseeds.
+        """
+        seats_by_flight = {}
+        for ticket_data in tickets_data:
+            flight, positions = seats_by_flight.setdefault(
+                ticket_data["flight"].id, (ticket_data["flight"], [])
+            )
+            positions.append((ticket_data["row"], ticket_data["seat"]))
+
+        inventory = get_seat_inventory()
+        token = hold or secrets.token_urlsafe(16)
+        ttl = inventory.hold_ttl if hold else inventory.claim_ttl
+        held = []
+        for flight, positions in seats_by_flight.values():
+            if not inventory.hold(flight, positions, token, ttl):
+                if hold is None:
+                    TicketSerializer.release_seats(held, token)
+                raise serializers.ValidationError({"detail": SEAT_TAKEN_MESSAGE})
+            held.append((flight, positions))
+        return token, held
+
+    @staticmethod
+    def release_seats(held: list, token: str) -> None:
+        inventory = get_seat_inventory()
+        for flight, positions in held:
+            inventory.release(flight, positions, token)
+
+    @staticmethod
+    def claim_seats(held: list, token: str, user_id: int = None) -> None:
+        # Should the hold have lapsed and the seats gone to another
+        # request, the database rejects that request's tickets
+        inventory = get_seat_inventory()
+        for flight, positions in held:
+            inventory.claim(flight, positions, token)
+            if user_id is not None:
+                inventory.unregister_hold(user_id, flight.id, token)
+
+    @transaction.atomic()
+    def create(self, validated_data):
+        ticket = Ticket(**validated_data)
+        self.book(ticket)
+        return ticket
+
+    @transaction.atomic()
+    def update(self, instance, validated_data):
+        previous = (instance.flight, [(instance.row, instance.seat)])
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        if previous == (instance.flight, [(instance.row, instance.seat)]):
+            instance.save(error_to_raise=serializers.ValidationError)
+        else:
+            self.book(instance)
+            transaction.on_commit(
+                lambda: get_seat_inventory().free(*previous)
+            )
+        return instance
+
+    def book(self, ticket: Ticket) -> None:
+        """Sell the seat of a single ticket through the seat inventory,
+        the same way orders do, so seats held by others stay theirs"""
+        token, held = self.hold_seats(
+            [{"flight": ticket.flight, "row": ticket.row, "seat": ticket.seat}]
+        )
+        try:
+            ticket.save(error_to_raise=serializers.ValidationError)
+        except Exception:
+            self.release_seats(held, token)
+            raise
+        transaction.on_commit(lambda: self.claim_seats(held, token))
+
+
+class HoldTokenField(serializers.CharField):
+    """Token of a seat hold, usable only by the user who made the hold"""
+
+    def to_internal_value(self, data):
+        token = super().to_internal_value(data)
+        user = self.context["request"].user
+        if not get_seat_inventory().is_hold_of(token, user.pk):
+            raise serializers.ValidationError("Unknown seat hold.")
+        return token
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    hold = HoldTokenField(
+        required=False,
+        help_text="Token of an existing hold to extend"
+    )
+    seats = SeatSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.SEAT_INVENTORY["MAX_HOLD_SEATS"]
+    )
+    expires_in = serializers.IntegerField(read_only=True)
+
+    def validate(self, attrs):
+        flight = self.context["flight"]
+        if flight.flight_is_over:
             raise serializers.ValidationError(
-                {"detail": "This seat has already been taken for the selected flight"}
+                {
+                    "detail": "Unavailable to sell tickets for a flight that has already completed"
+                }
+            )
+        for seat in attrs["seats"]:
+            Ticket.validate_seat_and_rows(
+                seat["seat"],
+                flight.airplane.seats_in_row,
+                seat["row"],
+                flight.airplane.rows,
+                serializers.ValidationError,
             )
         return attrs
 
@@ -399,6 +870,9 @@ class TicketRetrieveSerializer(serializers.ModelSerializer):
             "seat",
             "flight_info"
         ]
+        select_related_fields = {
+            "flight_info": ["flight__route__source", "flight__route__destination"],
+        }
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -407,32 +881,52 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only=False,
         allow_empty=False
     )
+    hold = HoldTokenField(
+        write_only=True,
+        required=False,
+        help_text="Token of the seat hold to confirm"
+    )
 
     class Meta:
         model = Order
         fields = [
             "id",
             "created_at",
-            "tickets"
+            "tickets",
+            "hold"
         ]
 
+    def book(self, order: Order, tickets_data: list[dict], hold: str = None):
+        for ticket_data in tickets_data:
+            ticket_data.pop("order", None)
+        token, held = TicketSerializer.hold_seats(tickets_data, hold)
+        try:
+            Ticket.book(order, tickets_data, serializers.ValidationError)
+        except Exception:
+            if hold is None:
+                TicketSerializer.release_seats(held, token)
+            raise
+        user_id = order.user_id if hold else None
+        transaction.on_commit(
+            lambda: TicketSerializer.claim_seats(held, token, user_id)
+        )
+
     @transaction.atomic()
     def create(self, validated_data):
+        hold = validated_data.pop("hold", None)
         tickets_data = validated_data.pop("tickets")
         order = Order.objects.create(**validated_data)
-        for ticket_data in tickets_data:
-            ticket_data.pop("order", None)
-            Ticket.objects.create(order=order, **ticket_data)
+        self.book(order, tickets_data, hold)
         return order
 
+    @transaction.atomic()
     def update(self, instance, validated_data):
+        hold = validated_data.pop("hold", None)
         tickets_data = validated_data.pop("tickets")
         instance = super().update(instance, validated_data)
 
         instance.tickets.all().delete()
-        for ticket_data in tickets_data:
-            ticket_data.pop("order", None)
-            Ticket.objects.create(order=instance, **ticket_data)
+        self.book(instance, tickets_data, hold)
 
         return instance
 
@@ -450,6 +944,7 @@ class OrderListSerializer(serializers.ModelSerializer):
             "created_at",
             "tickets"
         ]
+        prefetch_related_fields = {"tickets": ["tickets"]}
 
 
 class OrderRetrieveSerializer(serializers.ModelSerializer):
@@ -465,3 +960,13 @@ class OrderRetrieveSerializer(serializers.ModelSerializer):
             "created_at",
             "tickets"
         ]
+        prefetch_related_fields = {
+            "tickets": [
+                Prefetch(
+                    "tickets",
+                    queryset=Ticket.objects.select_related(
+                        "flight__route__source", "flight__route__destination"
+                    )
+                )
+            ]
+        }
@@ -0,0 +1,179 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_reference_model
+from .flight_search import (
+    RELATED_LOOKUPS,
+    instance_values,
+    invalidate_entries,
+    refresh_search_entries,
+    related_flights,
+    stored_values,
+    update_seats_sold,
+)
+from .inventory import get_seat_inventory
+from .itinerary import flight_graph
+from .models import (
+    AirplaneType,
+    Airplane,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Route,
+    Ticket,
+    seats_changed,
+)
+
+REFERENCE_MODELS = (Country, City, Airport, AirplaneType, Airplane, Route)
+# Models whose version is part of conditional GET validators
+VERSIONED_MODELS = (*REFERENCE_MODELS, Crew)
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance: Ticket, **kwargs) -> None:
+    flight = Flight.update_seat_map(
+        instance.flight_id,
+        release=[(instance.row, instance.seat)]
+    )
+    if flight is not None:
+        # Freed only once the deletion commits, a rolled back deletion
+        # keeps the seat sold
+        transaction.on_commit(
+            lambda: get_seat_inventory().free(
+                flight, [(instance.row, instance.seat)]
+            )
+        )
+
+
+@receiver(pre_save, sender=Flight)
+def rebuild_seat_map_on_airplane_change(
+        sender,
+        instance: Flight,
+        update_fields=None,
+        **kwargs
+) -> None:
+    if instance.pk is None:
+        return
+    if update_fields is not None and "airplane" not in update_fields:
+        return
+    previous_airplane_id = Flight.objects.filter(
+        pk=instance.pk
+    ).values_list("airplane_id", flat=True).first()
+    if previous_airplane_id not in (None, instance.airplane_id):
+        instance.rebuild_seat_map()
+        get_seat_inventory().reset(instance.pk)
+
+
+@receiver(pre_save, sender=Airplane)
+def remember_airplane_layout(sender, instance: Airplane, **kwargs) -> None:
+    instance._previous_layout = None
+    if instance.pk is not None:
+        instance._previous_layout = Airplane.objects.filter(
+            pk=instance.pk
+        ).values_list("rows", "seats_in_row").first()
+
+
+@receiver(post_save, sender=Airplane)
+def rebuild_seat_maps_on_layout_change(
+        sender,
+        instance: Airplane,
+        created: bool,
+        **kwargs
+) -> None:
+    previous_layout = getattr(instance, "_previous_layout", None)
+    if created or previous_layout in (None, (instance.rows, instance.seats_in_row)):
+        return
+    for flight in instance.airplane_flights.all():
+        flight.airplane = instance
+        flight.rebuild_seat_map()
+        flight.save(update_fields=Flight.SEAT_FIELDS)
+        get_seat_inventory().reset(flight.pk)
+
+
+@receiver(post_save, sender=Flight)
+def refresh_flight_graph(
+        sender,
+        instance: Flight,
+        update_fields=None,
+        **kwargs
+) -> None:
+    if update_fields is not None and set(update_fields) <= set(Flight.SEAT_FIELDS):
+        flight_graph.update_seats(instance.pk, instance.tickets_available)
+    else:
+        flight_graph.refresh_flights(Flight.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Flight)
+def refresh_flight_search_entry(
+        sender,
+        instance: Flight,
+        update_fields=None,
+        **kwargs
+) -> None:
+    if update_fields is not None and set(update_fields) <= set(Flight.SEAT_FIELDS):
+        update_seats_sold([instance])
+    else:
+        refresh_search_entries(Flight.objects.filter(pk=instance.pk))
+
+
+@receiver(seats_changed, sender=Flight)
+def update_flight_graph_seats(sender, flights: list[Flight], **kwargs) -> None:
+    for flight in flights:
+        flight_graph.update_seats(flight.pk, flight.tickets_available)
+
+
+@receiver(seats_changed, sender=Flight)
+def update_flight_search_seats(sender, flights: list[Flight], **kwargs) -> None:
+    update_seats_sold(flights)
+
+
+@receiver(post_delete, sender=Flight)
+def forget_deleted_flight(sender, instance: Flight, **kwargs) -> None:
+    flight_graph.remove_flight(instance.pk)
+    get_seat_inventory().reset(instance.pk)
+    # The search entry goes with the flight
+    invalidate_entries()
+
+
+@receiver(post_save, sender=Route)
+def refresh_route_flights_in_graph(sender, instance: Route, **kwargs) -> None:
+    flight_graph.refresh_flights(
+        Flight.objects.filter(
+            route=instance,
+            departure_time__gte=timezone.now()
+        )
+    )
+
+
+def remember_search_values(sender, instance, **kwargs) -> None:
+    instance._search_values = stored_values(instance)
+
+
+def refresh_related_search_entries(
+        sender,
+        instance,
+        created: bool,
+        **kwargs
+) -> None:
+    """Copy a renamed airport, city, country, route or airplane into entries"""
+    previous = getattr(instance, "_search_values", None)
+    if created or previous in (None, instance_values(instance)):
+        return
+    refresh_search_entries(related_flights(sender, instance.pk))
+
+
+def invalidate_reference_cache(sender, **kwargs) -> None:
+    invalidate_reference_model(sender._meta.label_lower)
+
+
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(invalidate_reference_cache, sender=versioned_model)
+    post_delete.connect(invalidate_reference_cache, sender=versioned_model)
+
+for related_model in RELATED_LOOKUPS:
+    pre_save.connect(remember_search_values, sender=related_model)
+    post_save.connect(refresh_related_search_entries, sender=related_model)
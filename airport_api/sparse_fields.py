@@ -0,0 +1,101 @@
+from drf_spectacular.openapi import AutoSchema
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
+
+SPARSE_ACTIONS = ("list", "retrieve")
+
+
+def parse_field_names(value: str | None) -> set[str] | None:
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Let clients pick response fields with ``?fields=`` or ``?exclude=``.
+
+    Both take comma separated names of top level serializer fields and
+    apply to list and retrieve. The serializer used by the action may
+    declare in its ``Meta`` which ``select_related_fields`` and
+    ``prefetch_related_fields`` each field needs; only the lookups of
+    the fields that are rendered are added to the queryset, so a field
+    that is left out costs neither a join nor a query.
+    """
+
+    def get_sparse_fields(self) -> tuple[set[str] | None, set[str]]:
+        params = self.request.query_params
+        return (
+            parse_field_names(params.get("fields")),
+            parse_field_names(params.get("exclude")) or set(),
+        )
+
+    def field_is_rendered(self, name: str) -> bool:
+        if self.action not in SPARSE_ACTIONS:
+            return True
+        fields, exclude = self.get_sparse_fields()
+        return (fields is None or name in fields) and name not in exclude
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in SPARSE_ACTIONS:
+            return queryset
+        meta = getattr(self.get_serializer_class(), "Meta", None)
+        for name, lookups in getattr(meta, "select_related_fields", {}).items():
+            if self.field_is_rendered(name):
+                queryset = queryset.select_related(*lookups)
+        for name, lookups in getattr(meta, "prefetch_related_fields", {}).items():
+            if self.field_is_rendered(name):
+                queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.action not in SPARSE_ACTIONS:
+            return serializer
+        fields, exclude = self.get_sparse_fields()
+        if fields is None and not exclude:
+            return serializer
+
+        target = (
+            serializer.child
+            if isinstance(serializer, ListSerializer)
+            else serializer
+        )
+        unknown = ((fields or set()) | exclude) - set(target.fields)
+        if unknown:
+            raise ValidationError(
+                {
+                    "fields": "Unknown fields: " + ", ".join(sorted(unknown))
+                }
+            )
+        for name in list(target.fields):
+            if not self.field_is_rendered(name):
+                target.fields.pop(name)
+        return serializer
+
+
+class SparseFieldsAutoSchema(AutoSchema):
+    """Document ``fields`` and ``exclude`` on list and retrieve"""
+
+    def get_override_parameters(self):
+        parameters = super().get_override_parameters()
+        if (
+                isinstance(self.view, SparseFieldsMixin)
+                and self.method == "GET"
+                and getattr(self.view, "action", None) in SPARSE_ACTIONS
+        ):
+            parameters = [
+                *parameters,
+                OpenApiParameter(
+                    name="fields",
+                    description="Comma separated fields to return",
+                    type=str,
+                ),
+                OpenApiParameter(
+                    name="exclude",
+                    description="Comma separated fields to leave out",
+                    type=str,
+                ),
+            ]
+        return parameters
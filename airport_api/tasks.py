@@ -1,18 +1,112 @@
-from .models import Flight
+import logging
+import time
+
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Sum,
+    Value,
+    When,
+)
+from django.utils import timezone
+
+from .cache import invalidate_reference_model
+from .images import build_variants
+from .models import Airplane, Crew, Flight
+
+logger = logging.getLogger(__name__)
 
 
+def account_flights(flight_ids: list[int]) -> int:
+    """Add the duration of the flights to their crews in one UPDATE"""
+    crew_durations = (
+        Flight.crews.through.objects.filter(flight_id__in=flight_ids)
+        .values("crew_id")
+        .annotate(
+            duration=Sum(
+                ExpressionWrapper(
+                    F("flight__arrival_time") - F("flight__departure_time"),
+                    output_field=DurationField()
+                )
+            )
+        )
+        .values_list("crew_id", "duration")
+    )
+    hours = {
+        crew_id: round(duration.total_seconds() / 3600, 2)
+        for crew_id, duration in crew_durations
+    }
+    if hours:
+        Crew.objects.filter(id__in=hours).update(
+            updated_at=timezone.now(),
+            flying_hours=F("flying_hours") + Case(
+                *[
+                    When(id=crew_id, then=Value(crew_hours))
+                    for crew_id, crew_hours in hours.items()
+                ],
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+        )
+        invalidate_reference_model(Crew._meta.label_lower)
+    Flight.objects.filter(id__in=flight_ids).update(
+        accounted=True, updated_at=timezone.now()
+    )
+    return len(hours)
+
 
 @shared_task
-def update_flying_hours() -> None:
-    flights = Flight.objects.filter(accounted=False)
-    for flight in flights:
-        if flight.flight_is_over:
-            flight_duration = flight.arrival_time - flight.departure_time
-            hours_flight_time = flight_duration.total_seconds() / 3600
-            hours_flight_time = round(hours_flight_time, 2)
-            for crew in flight.crews.all():
-                crew.flying_hours += hours_flight_time
-                crew.save()
-            flight.accounted = True
-            flight.save()
+def update_flying_hours(batch_size: int = None) -> dict:
+    """Credit crews with the hours of landed flights that are not accounted.
+
+    Flights are taken in batches through the partial index on unaccounted
+    arrivals and locked with SKIP LOCKED, so overlapping runs never credit
+    the same flight twice. Each batch is committed on its own.
+    """
+    batch_size = batch_size or settings.FLYING_HOURS_BATCH_SIZE
+    now = timezone.now()
+    started = time.monotonic()
+    metrics = {"flights": 0, "crews": 0, "batches": 0}
+    while True:
+        with transaction.atomic():
+            flight_ids = list(
+                Flight.objects.select_for_update(skip_locked=True)
+                .filter(accounted=False, arrival_time__lte=now)
+                .order_by("arrival_time")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not flight_ids:
+                break
+            metrics["crews"] += account_flights(flight_ids)
+        metrics["flights"] += len(flight_ids)
+        metrics["batches"] += 1
+    metrics["duration"] = round(time.monotonic() - started, 3)
+    logger.info(
+        "Accounted %(flights)s flights for %(crews)s crew members "
+        "in %(batches)s batches, %(duration)ss",
+        metrics
+    )
+    return metrics
+
+
+@shared_task
+def process_airplane_image(airplane_id: int, name: str, digest: str) -> dict:
+    """Render the resized and WebP variants of an uploaded airplane image.
+
+    Variants are stored under the content hash, so an image that is
+    already processed for another airplane is only linked, not rendered.
+    The airplane is updated only if ``name`` is still its current image.
+    """
+    variants = build_variants(name, digest)
+    updated = Airplane.objects.filter(id=airplane_id, image=name).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        invalidate_reference_model(Airplane._meta.label_lower)
+    return variants
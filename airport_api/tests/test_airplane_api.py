@@ -1,5 +1,11 @@
+import io
+import tempfile
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -11,6 +17,7 @@ from airport_api.serializers import (
     AirplaneListSerializer,
     AirplaneRetrieveSerializer
 )
+from airport_api.tasks import process_airplane_image
 
 AIRPLANE_URL = reverse("api_airport:airplane-list")
 
@@ -19,6 +26,18 @@ def detail_url(airplane_id):
     return reverse("api_airport:airplane-detail", args=[airplane_id])
 
 
+def upload_url(airplane_id):
+    return reverse("api_airport:airplane-upload-image", args=[airplane_id])
+
+
+def sample_image(size=(1600, 1200)) -> SimpleUploadedFile:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (30, 90, 160)).save(buffer, "JPEG")
+    return SimpleUploadedFile(
+        "plane.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
 class UnauthenticatedAirplaneApiTests(TestCase):
 
     def setUp(self) -> None:
@@ -171,3 +190,99 @@ class AdminAirplaneTests(TestCase):
         invalid_id = self.airplane_2.id + 1
         res = self.client.get(detail_url(invalid_id))
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AirplaneImageTests(TestCase):
+
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email="admin@test.test",
+            password="Testpsw1"
+        )
+        self.client.force_authenticate(self.user)
+        airplane_type = AirplaneType.objects.create(name="Airplane Type 1")
+        self.airplane_1 = Airplane.objects.create(
+            name="Airplane Name 1",
+            rows=55,
+            seats_in_row=10,
+            airplane_type=airplane_type,
+        )
+        self.airplane_2 = Airplane.objects.create(
+            name="Airplane Name 2",
+            rows=80,
+            seats_in_row=10,
+            airplane_type=airplane_type,
+        )
+
+    def upload(self, airplane):
+        # Commit callbacks, which would queue the Celery task, are not run
+        with self.captureOnCommitCallbacks():
+            return self.client.post(
+                upload_url(airplane.id),
+                {"image": sample_image()},
+                format="multipart"
+            )
+
+    def test_upload_queues_variants(self):
+        res = self.upload(self.airplane_1)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.airplane_1.refresh_from_db()
+        self.assertEqual(self.airplane_1.image_variants, {})
+        self.assertEqual(len(self.airplane_1.image_hash), 64)
+        self.assertIn(self.airplane_1.image_hash, self.airplane_1.image.name)
+        self.assertEqual(
+            res.data["images"]["thumbnail"], res.data["image"]
+        )
+
+    def test_variants_are_rendered(self):
+        self.upload(self.airplane_1)
+        self.airplane_1.refresh_from_db()
+
+        variants = process_airplane_image(
+            self.airplane_1.id,
+            self.airplane_1.image.name,
+            self.airplane_1.image_hash
+        )
+
+        self.airplane_1.refresh_from_db()
+        self.assertEqual(self.airplane_1.image_variants, variants)
+        with default_storage.open(variants["thumbnail_webp"]) as file:
+            with Image.open(file) as image:
+                self.assertEqual(image.format, "WEBP")
+                self.assertEqual(image.size, (320, 240))
+
+        res = self.client.get(AIRPLANE_URL)
+        images = res.data["results"][0]["images"]
+        self.assertEqual(set(images), {"thumbnail", "thumbnail_webp"})
+        self.assertTrue(images["thumbnail_webp"].endswith(".webp"))
+
+    def test_identical_image_is_stored_once(self):
+        self.upload(self.airplane_1)
+        self.airplane_1.refresh_from_db()
+        process_airplane_image(
+            self.airplane_1.id,
+            self.airplane_1.image.name,
+            self.airplane_1.image_hash
+        )
+
+        res = self.upload(self.airplane_2)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.airplane_1.refresh_from_db()
+        self.airplane_2.refresh_from_db()
+        self.assertEqual(self.airplane_2.image.name, self.airplane_1.image.name)
+        self.assertNotEqual(self.airplane_2.image_variants, {})
+        self.assertEqual(
+            self.airplane_2.image_variants, self.airplane_1.image_variants
+        )
+        self.assertEqual(
+            len(default_storage.listdir("upload/airplanes/originals")[1]), 1
+        )
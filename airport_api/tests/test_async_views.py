@@ -0,0 +1,198 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport_api.inventory import get_seat_inventory
+from airport_api.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport_api.throttling import InMemoryRateLimiter, get_rate_limiter
+
+FLIGHT_URL = "/api/airport/flights/"
+COUNTRY_URL = "/api/airport/countries/"
+
+
+def flight_detail_url(flight_id):
+    return f"{FLIGHT_URL}{flight_id}/"
+
+
+class AsyncOnlyRateLimiter(InMemoryRateLimiter):
+    def hit(self, key, limit, window):
+        raise AssertionError("Blocking rate limiter call on the event loop")
+
+    async def ahit(self, key, limit, window):
+        return super().hit(key, limit, window)
+
+
+@override_settings(ROOT_URLCONF="airport_service.asgi_urls")
+class AsyncReadViewTests(TestCase):
+    def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
+        self.async_client = AsyncClient()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.headers = {
+            "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+        city = City.objects.create(
+            name="Paris",
+            country=Country.objects.create(name="France")
+        )
+        route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Charles de Gaulle", closest_big_city=city
+            ),
+            destination=Airport.objects.create(
+                name="Orly", closest_big_city=city
+            ),
+            distance=30
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=Airplane.objects.create(
+                name="A320",
+                rows=30,
+                seats_in_row=6,
+                airplane_type=AirplaneType.objects.create(name="Narrow body"),
+            ),
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=1),
+        )
+        self.flight.crews.add(
+            Crew.objects.create(first_name="Anna", last_name="Smith")
+        )
+
+    def send(self, method: str, path: str, **kwargs):
+        async def request():
+            return await getattr(self.async_client, method)(path, **kwargs)
+
+        return async_to_sync(request)()
+
+    def aget(self, path, data=None, **headers):
+        return self.send(
+            "get", path, data=data, headers={**self.headers, **headers}
+        )
+
+    def test_urls_resolve_to_async_views(self):
+        self.assertEqual(
+            reverse("api_airport:flight-detail", args=[self.flight.id]),
+            flight_detail_url(self.flight.id),
+        )
+
+    def test_responses_match_sync_views(self):
+        for path, data in (
+                (FLIGHT_URL, {}),
+                (FLIGHT_URL, {"from": "Charles"}),
+                (flight_detail_url(self.flight.id), {}),
+                (flight_detail_url(self.flight.id), {"fields": "id,crews"}),
+                (COUNTRY_URL, {}),
+                ("/api/airport/airports/", {"name": "Orly"}),
+                ("/api/airport/airplanes/", {}),
+        ):
+            with self.subTest(path=path, data=data):
+                res = self.aget(path, data)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.json(), self.client.get(path, data).json())
+
+    def test_seat_availability(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=2)
+
+        res = self.aget(f"{flight_detail_url(self.flight.id)}seats/")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["taken_seats"], [2])
+        self.assertEqual(res.json()["tickets_available"], 179)
+        self.assertEqual(
+            res.json(),
+            self.client.get(f"{flight_detail_url(self.flight.id)}seats/").json()
+        )
+
+    def test_conditional_get(self):
+        etag = self.aget(flight_detail_url(self.flight.id))["ETag"]
+
+        res = self.aget(flight_detail_url(self.flight.id), if_none_match=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "user": "2/hour",
+            },
+        },
+        RATE_LIMITER={
+            **settings.RATE_LIMITER,
+            "BACKEND": "airport_api.tests.test_async_views.AsyncOnlyRateLimiter",
+        },
+    )
+    def test_throttles_are_awaited(self):
+        get_rate_limiter.cache_clear()
+        self.addCleanup(get_rate_limiter.cache_clear)
+
+        for _ in range(2):
+            self.assertEqual(self.aget(FLIGHT_URL).status_code, 200)
+        res = self.aget(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    def test_authentication_required(self):
+        res = self.send("get", FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.send(
+            "get", FLIGHT_URL, headers={"Authorization": "Bearer invalid"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_missing_flight(self):
+        res = self.aget(flight_detail_url(self.flight.id + 100))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_are_delegated(self):
+        admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="Testpass123", is_staff=True
+        )
+
+        res = self.send(
+            "post",
+            COUNTRY_URL,
+            data={"name": "Spain"},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {AccessToken.for_user(admin)}"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.send(
+            "post",
+            COUNTRY_URL,
+            data={"name": "Italy"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
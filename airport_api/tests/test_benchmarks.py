@@ -0,0 +1,106 @@
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase
+
+from airport_api.benchmarks import find_regressions, run_suite, seed_dataset
+from airport_api.inventory import get_seat_inventory
+from airport_api.load_benchmark import run_load, run_server_load
+
+
+class BenchmarkSuiteTests(TestCase):
+    def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
+
+    def test_run_suite(self):
+        results = run_suite(
+            tickets=200,
+            iterations=2,
+            warmup=1,
+            memory_iterations=1,
+            order_tickets=3,
+            log=lambda message: None,
+        )
+        self.assertEqual(results["meta"]["tickets"], 200)
+        self.assertIn("order_create_3_tickets", results["results"])
+        for metrics in results["results"].values():
+            self.assertLessEqual(metrics["p50_ms"], metrics["p99_ms"])
+            self.assertGreaterEqual(metrics["peak_memory_kb"], 0)
+        self.assertEqual(find_regressions(results, results, 0), [])
+
+    def test_find_regressions(self):
+        baseline = {
+            "results": {
+                "flight_list": {
+                    "p50_ms": 10.0,
+                    "p95_ms": 20.0,
+                    "p99_ms": 30.0,
+                    "queries": 2,
+                    "peak_memory_kb": 100.0,
+                },
+            }
+        }
+        current = {
+            "results": {
+                "flight_list": {
+                    "p50_ms": 10.5,
+                    "p95_ms": 40.0,
+                    "p99_ms": 90.0,
+                    "queries": 3,
+                    "peak_memory_kb": 110.0,
+                },
+                "route_list": baseline["results"]["flight_list"],
+            }
+        }
+        regressions = find_regressions(current, baseline, tolerance=0.25)
+        self.assertEqual(
+            regressions,
+            [
+                "flight_list: p95_ms 40.0 > 20.0",
+                "flight_list: queries 3 > 2",
+            ]
+        )
+
+
+class LoadBenchmarkTests(TransactionTestCase):
+    # WSGI workers use their own connections and only see committed rows
+
+    def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
+
+    def test_run_load(self):
+        results = run_load(
+            tickets=100,
+            clients=3,
+            delay=0.01,
+            threads=2,
+            only=["flight_list", "flight_seats", "route_list"],
+            log=lambda message: None,
+        )
+        self.assertEqual(
+            set(results["results"]), {"flight_list", "flight_seats", "route_list"}
+        )
+        for result in results["results"].values():
+            for path in ("wsgi", "asgi"):
+                self.assertEqual(result[path]["requests"], 3)
+                self.assertEqual(result[path]["errors"], 0, (path, result))
+
+
+class ServerLoadBenchmarkTests(LiveServerTestCase):
+    def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
+
+    def test_run_server_load(self):
+        dataset = seed_dataset(50)
+        results = run_server_load(
+            servers={"live": self.live_server_url},
+            user=dataset["users"][0],
+            # The live server shares the in-memory test database connection
+            clients=1,
+            requests=3,
+            only=["flight_list", "flight_retrieve"],
+            log=lambda message: None,
+        )
+        self.assertEqual(
+            set(results["results"]), {"flight_list", "flight_retrieve"}
+        )
+        for result in results["results"].values():
+            self.assertEqual(result["live"]["requests"], 3)
+            self.assertEqual(result["live"]["errors"], 0, result)
@@ -49,6 +49,36 @@ class AuthenticatedCountryApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data)
 
+    def test_country_list_cached(self):
+        self.client.get(COUNTRY_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(COUNTRY_URL)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_country_list_cache_invalidated_on_change(self):
+        self.client.get(COUNTRY_URL)
+        Country.objects.create(name="Country 3")
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(len(res.data["results"]), 3)
+
+        self.country_2.delete()
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_country_list_not_modified(self):
+        res = self.client.get(COUNTRY_URL)
+        with self.assertNumQueries(0):
+            res_unchanged = self.client.get(
+                COUNTRY_URL, HTTP_IF_NONE_MATCH=res["ETag"]
+            )
+        self.assertEqual(res_unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.country_1.name = "Renamed Country"
+        self.country_1.save()
+        res_changed = self.client.get(COUNTRY_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res_changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res_changed["ETag"], res["ETag"])
+
     def test_filter_country_by_name(self):
         res = self.client.get(COUNTRY_URL, data={"name": "Country 1"})
         serializer1 = CountryListSerializer(self.country_1)
@@ -1,9 +1,22 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from airport_api.models import Crew
+from airport_api.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Route,
+)
+from airport_api.tasks import update_flying_hours
 from airport_api.serializers import (
     CrewListSerializer,
     CrewRetrieveSerializer
@@ -162,3 +175,84 @@ class AdminCrewTest(TestCase):
         invalid_id = self.crew_member2.id + 1
         res = self.client.get(detail_url(invalid_id))
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UpdateFlyingHoursTaskTests(TestCase):
+    def setUp(self) -> None:
+        city = City.objects.create(
+            name="Random City",
+            country=Country.objects.create(name="Random Country")
+        )
+        self.route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Airport Name 1",
+                closest_big_city=city
+            ),
+            destination=Airport.objects.create(
+                name="Airport Name 2",
+                closest_big_city=city
+            ),
+            distance=700.0
+        )
+        self.airplane = Airplane.objects.create(
+            name="Airplane Name 1",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Airplane Type 1"),
+        )
+        self.pilot = Crew.objects.create(
+            first_name="Qwerty",
+            last_name="Johnson",
+            flying_hours=10.0
+        )
+        self.attendant = Crew.objects.create(
+            first_name="John",
+            last_name="Qwerty"
+        )
+
+    def create_flight(self, departure_time, hours, crews):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=hours),
+        )
+        flight.crews.add(*crews)
+        return flight
+
+    @override_settings(FLYING_HOURS_BATCH_SIZE=1)
+    def test_update_flying_hours(self):
+        now = timezone.now()
+        landed = [
+            self.create_flight(now - timedelta(days=2), 2.5, [self.pilot]),
+            self.create_flight(
+                now - timedelta(days=1), 1.5, [self.pilot, self.attendant]
+            ),
+        ]
+        upcoming = self.create_flight(
+            now + timedelta(days=1), 3, [self.pilot, self.attendant]
+        )
+
+        metrics = update_flying_hours()
+
+        self.assertEqual(metrics["flights"], 2)
+        self.assertEqual(metrics["batches"], 2)
+        self.pilot.refresh_from_db()
+        self.attendant.refresh_from_db()
+        self.assertEqual(self.pilot.flying_hours, 14.0)
+        self.assertEqual(self.attendant.flying_hours, 1.5)
+        for flight in landed:
+            flight.refresh_from_db()
+            self.assertTrue(flight.accounted)
+        upcoming.refresh_from_db()
+        self.assertFalse(upcoming.accounted)
+
+    def test_flights_are_accounted_once(self):
+        self.create_flight(
+            timezone.now() - timedelta(hours=3), 2, [self.pilot]
+        )
+        update_flying_hours()
+        metrics = update_flying_hours()
+        self.assertEqual(metrics["flights"], 0)
+        self.pilot.refresh_from_db()
+        self.assertEqual(self.pilot.flying_hours, 12.0)
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from airport_api.models import (
+    Country,
+    City,
+    Route,
+    Airport,
+    Airplane,
+    Flight,
+    AirplaneType,
+    Order,
+    Ticket
+)
+
+FLIGHT_EXPORT_URL = reverse("api_airport:flight-export")
+ORDER_EXPORT_URL = reverse("api_airport:order-export")
+TICKET_EXPORT_URL = reverse("api_airport:ticket-export")
+
+
+def read_stream(response) -> str:
+    return b"".join(response.streaming_content).decode()
+
+
+class ExportApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="Admin@test.test",
+            password="Testpsw1",
+            is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test",
+            password="Testpsw1"
+        )
+        self.client.force_authenticate(self.admin)
+        city = City.objects.create(
+            name="Random City",
+            country=Country.objects.create(name="Random Country")
+        )
+        london = Airport.objects.create(
+            name="London Airport",
+            closest_big_city=city
+        )
+        paris = Airport.objects.create(
+            name="Paris Airport",
+            closest_big_city=city
+        )
+        airplane = Airplane.objects.create(
+            name="Airplane Name 1",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Airplane Type 1"),
+        )
+        departure_time = datetime(2024, 5, 21, 8, tzinfo=timezone.utc)
+        self.flights = [
+            Flight.objects.create(
+                route=Route.objects.create(
+                    source=source,
+                    destination=destination,
+                    distance=350.0
+                ),
+                airplane=airplane,
+                departure_time=departure_time + timedelta(days=index),
+                arrival_time=departure_time + timedelta(days=index, hours=1),
+            )
+            for index, (source, destination) in enumerate(
+                [(london, paris), (paris, london)]
+            )
+        ]
+        order = Order.objects.create(user=self.user)
+        for seat, flight in enumerate(self.flights, start=1):
+            Ticket.objects.create(row=1, seat=seat, flight=flight, order=order)
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(self.user)
+        for url in (FLIGHT_EXPORT_URL, ORDER_EXPORT_URL, TICKET_EXPORT_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_flights_csv(self):
+        res = self.client.get(FLIGHT_EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertIn('filename="flight.csv"', res["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(read_stream(res))))
+        self.assertEqual(
+            [int(row["id"]) for row in rows],
+            [flight.id for flight in self.flights]
+        )
+        self.assertEqual(rows[0]["source"], "London Airport")
+        self.assertEqual(rows[0]["departure_time"], "2024-05-21T08:00:00+00:00")
+        self.assertEqual(rows[0]["seats_sold"], "1")
+
+    def test_export_flights_with_filters(self):
+        res = self.client.get(
+            FLIGHT_EXPORT_URL,
+            data={"from": "Paris", "export_format": "ndjson"}
+        )
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.flights[1].id])
+
+    def test_export_tickets_ndjson(self):
+        res = self.client.get(
+            TICKET_EXPORT_URL,
+            data={"export_format": "ndjson"}
+        )
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["user"], "Test@test.test")
+        self.assertEqual(rows[0]["flight"], self.flights[0].id)
+        self.assertEqual((rows[1]["row"], rows[1]["seat"]), (1, 2))
+
+    def test_export_orders(self):
+        res = self.client.get(ORDER_EXPORT_URL)
+        rows = list(csv.DictReader(io.StringIO(read_stream(res))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["user"], "Test@test.test")
+
+    def test_export_invalid_format(self):
+        res = self.client.get(FLIGHT_EXPORT_URL, data={"export_format": "xml"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
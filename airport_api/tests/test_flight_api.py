@@ -4,7 +4,10 @@ from datetime import (
     timezone
 )
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import localtime
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -16,14 +19,18 @@ from airport_api.models import (
     Airplane,
     Crew,
     Flight,
-    AirplaneType
+    AirplaneType,
+    Order,
+    Ticket
 )
 from airport_api.serializers import (
     FlightListSerializer,
-    FlightRetrieveSerializer
+    FlightRetrieveSerializer,
+    FlightSerializer
 )
 
 FLIGHT_URL = reverse("api_airport:flight-list")
+VALIDATE_BATCH_URL = reverse("api_airport:flight-validate-batch")
 
 
 def detail_url(flight_id):
@@ -153,6 +160,22 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data)
 
+    def test_flight_list_cursor_pagination(self):
+        res = self.client.get(FLIGHT_URL, data={"page_size": 1})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        self.assertEqual(
+            res.data["results"],
+            [FlightListSerializer(self.flight_1).data]
+        )
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual(
+            res.data["results"],
+            [FlightListSerializer(self.flight_2).data]
+        )
+        self.assertIsNone(res.data["next"])
+
     def test_filter_flight_by_id(self):
         res = self.client.get(FLIGHT_URL, data={"id": 1})
         serializer_1 = FlightListSerializer(self.flight_1)
@@ -177,6 +200,13 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertIn(serializer_1.data, res.data["results"])
         self.assertNotIn(serializer_2.data, res.data["results"])
 
+    def test_filter_flight_by_source_and_destination(self):
+        res = self.client.get(
+            FLIGHT_URL, data={"from": "name 1", "to": "name 1"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [])
+
     def test_filter_flight_by_plane_name(self):
         res = self.client.get(FLIGHT_URL, data={"plane_name": "Name 1"})
         serializer_1 = FlightListSerializer(self.flight_1)
@@ -205,11 +235,12 @@ class AuthenticatedFlightApiTests(TestCase):
 
     def test_filter_flight_by_departure_minute(self):
         departure_minute = self.flight_2.departure_time.minute
-        res = self.client.get(FLIGHT_URL, data={"departure_hour": departure_minute})
-        serializer_1 = FlightListSerializer(self.flight_1)
+        res = self.client.get(
+            FLIGHT_URL, data={"departure_minute": departure_minute}
+        )
+        serializer_2 = FlightListSerializer(self.flight_2)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        for result in res.data["results"]:
-            self.assertEqual(result, serializer_1.data)
+        self.assertIn(serializer_2.data, res.data["results"])
 
     def test_filter_by_arrival_date(self):
         arrival_date = self.flight_1.arrival_time.date()
@@ -237,6 +268,71 @@ class AuthenticatedFlightApiTests(TestCase):
             serializer = FlightListSerializer(Flight.objects.get(id=result["id"]))
             self.assertEqual(result, serializer.data)
 
+    def test_filter_by_departure_date_and_hour(self):
+        departure_time = localtime(self.flight_2.departure_time)
+        res = self.client.get(
+            FLIGHT_URL,
+            data={
+                "departure_date": departure_time.strftime("%Y-%m-%d"),
+                "departure_hour": departure_time.hour,
+                "departure_minute": departure_time.minute,
+            }
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["id"] for result in res.data["results"]],
+            [self.flight_2.id]
+        )
+
+    def test_filter_by_departure_range(self):
+        middle = self.flight_1.departure_time + timedelta(hours=12)
+        res = self.client.get(
+            FLIGHT_URL, data={"departure_after": middle.isoformat()}
+        )
+        self.assertEqual(
+            [result["id"] for result in res.data["results"]],
+            [self.flight_2.id]
+        )
+        res = self.client.get(
+            FLIGHT_URL, data={"departure_before": middle.isoformat()}
+        )
+        self.assertEqual(
+            [result["id"] for result in res.data["results"]],
+            [self.flight_1.id]
+        )
+
+    def test_filter_by_arrival_range(self):
+        res = self.client.get(
+            FLIGHT_URL,
+            data={
+                "arrival_after": self.flight_1.arrival_time.isoformat(),
+                "arrival_before": self.flight_2.arrival_time.isoformat(),
+            }
+        )
+        self.assertEqual(
+            [result["id"] for result in res.data["results"]],
+            [self.flight_1.id]
+        )
+
+    def test_filter_by_invalid_date(self):
+        res = self.client.get(FLIGHT_URL, data={"departure_date": "21-05-2024"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(FLIGHT_URL, data={"arrival_after": "tomorrow"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_out_of_range_time(self):
+        date = self.flight_1.departure_time.strftime("%Y-%m-%d")
+        for params in (
+                {"departure_hour": 24},
+                {"departure_date": date, "departure_hour": 25},
+                {"arrival_minute": 60},
+                {"arrival_minute": -1},
+        ):
+            res = self.client.get(FLIGHT_URL, data=params)
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
+
     def test_retrieve_flight_detail(self):
         res = self.client.get(detail_url(self.flight_1.id))
         serializer = FlightRetrieveSerializer(self.flight_1)
@@ -245,6 +341,88 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, added_data)
 
+    def test_retrieve_flight_not_modified(self):
+        res = self.client.get(detail_url(self.flight_1.id))
+        self.assertIn("ETag", res)
+        self.assertIn("Last-Modified", res)
+
+        res_etag = self.client.get(
+            detail_url(self.flight_1.id), HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+        res_date = self.client.get(
+            detail_url(self.flight_1.id),
+            HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+        )
+
+        self.assertEqual(res_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res_date.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res_etag.content, b"")
+
+    def test_seat_sale_changes_flight_etag(self):
+        res = self.client.get(detail_url(self.flight_1.id))
+
+        Flight.update_seat_map(self.flight_1.id, take=[(1, 1)])
+        res_after_sale = self.client.get(
+            detail_url(self.flight_1.id), HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+
+        self.assertEqual(res_after_sale.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res_after_sale["ETag"], res["ETag"])
+        self.assertEqual(res_after_sale.data["taken_seats"], [1])
+
+    def test_flight_list_not_modified(self):
+        res = self.client.get(FLIGHT_URL)
+        self.assertNotIn("Last-Modified", res)
+
+        res_unchanged = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.flight_2.delete()
+        res_changed = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res_unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res_changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res_changed.data["results"]), 1)
+
+    def test_conditional_requests_skip_the_tables(self):
+        res = self.client.get(FLIGHT_URL)
+        detail = self.client.get(detail_url(self.flight_1.id))
+
+        with self.assertNumQueries(0):
+            res_list = self.client.get(
+                FLIGHT_URL, HTTP_IF_NONE_MATCH=res["ETag"]
+            )
+        # One primary key lookup of the row
+        with self.assertNumQueries(1):
+            res_detail = self.client.get(
+                detail_url(self.flight_1.id), HTTP_IF_NONE_MATCH=detail["ETag"]
+            )
+
+        self.assertEqual(res_list.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res_detail.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_seat_sale_changes_flight_list_etag(self):
+        res = self.client.get(FLIGHT_URL)
+
+        Flight.update_seat_map(self.flight_1.id, take=[(1, 1)])
+        res_after_sale = self.client.get(
+            FLIGHT_URL, HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+
+        self.assertEqual(res_after_sale.status_code, status.HTTP_200_OK)
+
+    def test_airport_rename_changes_flight_etag(self):
+        res = self.client.get(detail_url(self.flight_1.id))
+
+        self.airport_1.name = "Renamed Airport"
+        self.airport_1.save()
+        res_changed = self.client.get(
+            detail_url(self.flight_1.id), HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+
+        self.assertEqual(res_changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res_changed.data["route"]["source"], "Renamed Airport"
+        )
+
     def test_create_flight_forbidden(self):
         payload = {
             "route": self.route_2,
@@ -453,3 +631,159 @@ class AdminFlightTests(TestCase):
         invalid_id = self.flight_2.id + 1
         res = self.client.get(detail_url(invalid_id))
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def update_loaded_flight(self, flight, airplane):
+        serializer = FlightSerializer(flight, data={
+            "route": flight.route_id,
+            "airplane": airplane.id,
+            "crews": [self.crew_member1.id, self.crew_member2.id],
+            "departure_time": flight.departure_time.isoformat(),
+            "arrival_time": flight.arrival_time.isoformat(),
+        })
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def test_update_flight_keeps_seats_sold_meanwhile(self):
+        loaded = Flight.objects.get(pk=self.flight_1.pk)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight_1, order=order)
+
+        self.update_loaded_flight(loaded, self.airplane_1)
+
+        self.flight_1.refresh_from_db()
+        self.assertEqual(
+            (self.flight_1.seats_sold, self.flight_1.seats_version),
+            (1, 1)
+        )
+        with self.assertRaises(ValueError):
+            Ticket.objects.create(
+                row=1, seat=1, flight=self.flight_1, order=order
+            )
+        self.assertEqual(self.flight_1.flight_tickets.count(), 1)
+
+    def test_update_flight_airplane_rebuilds_seat_map(self):
+        loaded = Flight.objects.get(pk=self.flight_1.pk)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight_1, order=order)
+
+        self.update_loaded_flight(loaded, self.airplane_2)
+
+        self.flight_1.refresh_from_db()
+        self.assertEqual(self.flight_1.seats_sold, 1)
+        self.assertTrue(self.flight_1.is_seat_taken(1, 1))
+
+    def test_update_flight_keeps_own_crew(self):
+        payload = {
+            "route": self.flight_1.route_id,
+            "airplane": self.flight_1.airplane_id,
+            "crews": [self.crew_member1.id, self.crew_member2.id],
+            "departure_time": self.flight_1.departure_time.isoformat(),
+            "arrival_time": self.flight_1.arrival_time.isoformat(),
+        }
+        res = self.client.put(detail_url(self.flight_1.id), payload)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create_flight_with_busy_crew(self):
+        payload = {
+            "route": self.route_2.id,
+            "airplane": self.airplane_2.id,
+            "crews": [self.crew_member1.id],
+            "departure_time": (
+                self.flight_1.departure_time + timedelta(hours=1)
+            ).isoformat(),
+            "arrival_time": (
+                self.flight_1.arrival_time + timedelta(hours=1)
+            ).isoformat(),
+        }
+        res = self.client.post(FLIGHT_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def proposal(self, crews, departure_time, hours=2, **extra):
+        return {
+            "route": self.route_1.id,
+            "airplane": self.airplane_1.id,
+            "crews": [crew.id for crew in crews],
+            "departure_time": departure_time.isoformat(),
+            "arrival_time": (
+                departure_time + timedelta(hours=hours)
+            ).isoformat(),
+            **extra
+        }
+
+    def test_validate_batch_reports_every_conflict(self):
+        later = self.flight_1.departure_time + timedelta(days=10)
+        payload = {
+            "flights": [
+                self.proposal(
+                    [self.crew_member1],
+                    self.flight_1.departure_time + timedelta(hours=1)
+                ),
+                self.proposal([self.crew_member3], later),
+                self.proposal([self.crew_member3], later + timedelta(hours=1)),
+                self.proposal([self.crew_member3], later + timedelta(hours=2)),
+                self.proposal([self.crew_member4], later),
+            ]
+        }
+        res = self.client.post(VALIDATE_BATCH_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data["valid"])
+        self.assertCountEqual(
+            res.data["conflicts"],
+            [
+                {
+                    "crew": self.crew_member1.id,
+                    "flights": [{"id": self.flight_1.id}, {"index": 0}],
+                },
+                {
+                    "crew": self.crew_member3.id,
+                    "flights": [{"index": 1}, {"index": 2}],
+                },
+                {
+                    "crew": self.crew_member3.id,
+                    "flights": [{"index": 2}, {"index": 3}],
+                },
+            ]
+        )
+        self.assertEqual(Flight.objects.count(), 2)
+
+    def test_validate_batch_rescheduled_flight(self):
+        payload = {
+            "flights": [
+                self.proposal(
+                    [self.crew_member1, self.crew_member2],
+                    self.flight_1.departure_time + timedelta(minutes=30),
+                    id=self.flight_1.id
+                ),
+            ]
+        }
+        res = self.client.post(VALIDATE_BATCH_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["valid"])
+        self.assertEqual(res.data["conflicts"], [])
+
+    def test_validate_batch_queries_do_not_grow_with_batch(self):
+        later = self.flight_1.departure_time + timedelta(days=10)
+
+        def validate(count):
+            payload = {
+                "flights": [
+                    self.proposal(
+                        [self.crew_member3, self.crew_member4],
+                        later + timedelta(days=day)
+                    )
+                    for day in range(count)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(VALIDATE_BATCH_URL, payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(res.data["valid"])
+            return len(queries)
+
+        self.assertEqual(validate(1), validate(20))
+
+    def test_validate_batch_invalid_flight(self):
+        res = self.client.post(
+            VALIDATE_BATCH_URL, {"flights": [{"route": 0}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,212 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from airport_api.models import (
+    Country,
+    City,
+    Route,
+    Airport,
+    Airplane,
+    Crew,
+    Flight,
+    FlightSchedule,
+    AirplaneType,
+    Order,
+    Ticket
+)
+from airport_api.schedules import planned_times
+
+SCHEDULE_URL = reverse("api_airport:flightschedule-list")
+
+
+def detail_url(schedule_id):
+    return reverse("api_airport:flightschedule-detail", args=[schedule_id])
+
+
+class FlightScheduleApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Admin@test.test",
+            password="Testpsw1",
+            is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        city = City.objects.create(
+            name="Random City",
+            country=Country.objects.create(name="Random Country")
+        )
+        self.route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Airport Name 1",
+                closest_big_city=city
+            ),
+            destination=Airport.objects.create(
+                name="Airport Name 2",
+                closest_big_city=city
+            ),
+            distance=700.0
+        )
+        self.airplane = Airplane.objects.create(
+            name="Airplane Name 1",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Airplane Type 1"),
+        )
+        self.crew_1 = Crew.objects.create(first_name="John", last_name="Qwerty")
+        self.crew_2 = Crew.objects.create(first_name="Bob", last_name="Miles")
+        # Two full weeks starting on the next Monday
+        today = timezone.localdate()
+        self.valid_from = today + timedelta(days=7 - today.weekday())
+        self.valid_until = self.valid_from + timedelta(days=13)
+
+    def payload(self, **extra):
+        return {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "crews": [self.crew_1.id, self.crew_2.id],
+            "departure_time": "08:30",
+            "duration": "02:10:00",
+            "weekdays": [0, 2, 4],
+            "valid_from": self.valid_from.isoformat(),
+            "valid_until": self.valid_until.isoformat(),
+            **extra
+        }
+
+    def create_schedule(self, **extra) -> FlightSchedule:
+        res = self.client.post(SCHEDULE_URL, self.payload(**extra), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        return FlightSchedule.objects.get(id=res.data["id"])
+
+    def test_create_schedule_generates_flights(self):
+        schedule = self.create_schedule()
+        flights = schedule.flights.order_by("departure_time")
+        self.assertEqual(flights.count(), 6)
+        first = flights.first()
+        self.assertEqual(
+            first.departure_time,
+            timezone.make_aware(datetime.combine(self.valid_from, time(8, 30)))
+        )
+        self.assertEqual(first.flight_time, "2:10:00")
+        self.assertEqual(
+            {
+                timezone.localdate(flight.departure_time).weekday()
+                for flight in flights
+            },
+            {0, 2, 4}
+        )
+        self.assertCountEqual(
+            first.crews.values_list("id", flat=True),
+            [self.crew_1.id, self.crew_2.id]
+        )
+
+    @override_settings(TIME_ZONE="Europe/Berlin")
+    def test_flight_across_dst_change_keeps_duration(self):
+        # Clocks go forward at 02:00 on 2030-03-31, during the flight
+        schedule = FlightSchedule(
+            departure_time=time(23, 0),
+            duration=timedelta(hours=5),
+            weekdays=1 << 5,
+            valid_from=date(2030, 3, 30),
+            valid_until=date(2030, 3, 30),
+        )
+        departure_time, arrival_time = planned_times(schedule)[date(2030, 3, 30)]
+        self.assertEqual(
+            arrival_time.astimezone(dt_timezone.utc),
+            datetime(2030, 3, 31, 3, 0, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(arrival_time.utcoffset(), timedelta(hours=2))
+
+    def test_update_schedule_regenerates_affected_dates(self):
+        schedule = self.create_schedule()
+        kept = {
+            timezone.localdate(flight.departure_time): flight.id
+            for flight in schedule.flights.all()
+        }
+        res = self.client.patch(
+            detail_url(schedule.id),
+            {"weekdays": [0, 2], "departure_time": "09:00"},
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        flights = list(schedule.flights.all())
+        self.assertEqual(len(flights), 4)
+        for flight in flights:
+            day = timezone.localdate(flight.departure_time)
+            self.assertEqual(flight.id, kept[day])
+            self.assertEqual(timezone.localtime(flight.departure_time).hour, 9)
+            self.assertEqual(
+                flight.search_entry.departure_time, flight.departure_time
+            )
+
+    def test_update_schedule_crews(self):
+        schedule = self.create_schedule()
+        res = self.client.patch(
+            detail_url(schedule.id), {"crews": [self.crew_1.id]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for flight in schedule.flights.all():
+            self.assertEqual(
+                list(flight.crews.values_list("id", flat=True)),
+                [self.crew_1.id]
+            )
+
+    def test_create_schedule_with_busy_crew(self):
+        departure_time = timezone.make_aware(
+            datetime.combine(self.valid_from, time(9))
+        )
+        busy = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=1),
+        )
+        busy.crews.add(self.crew_2)
+        res = self.client.post(SCHEDULE_URL, self.payload(), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["conflicts"][0]["crew"],
+            str(self.crew_2.id)
+        )
+        self.assertFalse(FlightSchedule.objects.exists())
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_flights_with_sold_seats_are_kept(self):
+        schedule = self.create_schedule()
+        flight = schedule.flights.order_by("departure_time").last()
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            flight=flight,
+            order=Order.objects.create(user=self.user)
+        )
+        res = self.client.patch(
+            detail_url(schedule.id), {"weekdays": [0]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(schedule.flights.count(), 6)
+
+    def test_invalid_schedule_period(self):
+        res = self.client.post(
+            SCHEDULE_URL,
+            self.payload(valid_until=self.valid_from - timedelta(days=1)),
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_schedule_forbidden(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="Test@test.test",
+                password="Testpsw1"
+            )
+        )
+        res = self.client.post(SCHEDULE_URL, self.payload(), format="json")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = self.client.get(SCHEDULE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
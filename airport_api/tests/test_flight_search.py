@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airport_api.inventory import get_seat_inventory
+from airport_api.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Flight,
+    FlightSearchEntry,
+    Route,
+)
+
+FLIGHT_URL = reverse("api_airport:flight-list")
+ORDER_URL = reverse("api_airport:order-list")
+
+
+class FlightSearchEntryTests(TestCase):
+    def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.country = Country.objects.create(name="France")
+        self.city = City.objects.create(name="Paris", country=self.country)
+        self.source = Airport.objects.create(
+            name="Charles de Gaulle", closest_big_city=self.city
+        )
+        self.destination = Airport.objects.create(
+            name="Heathrow",
+            closest_big_city=City.objects.create(
+                name="London",
+                country=Country.objects.create(name="United Kingdom")
+            )
+        )
+        self.route = Route.objects.create(
+            source=self.source, destination=self.destination, distance=350
+        )
+        self.airplane = Airplane.objects.create(
+            name="A320",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Narrow body"),
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=1, minutes=10),
+        )
+
+    def test_entry_is_created_with_flight(self):
+        entry = FlightSearchEntry.objects.get(flight=self.flight)
+
+        self.assertEqual(entry.route_id, self.route.id)
+        self.assertEqual(entry.source_name, "Charles de Gaulle")
+        self.assertEqual(entry.source_city, "Paris")
+        self.assertEqual(entry.destination_country, "United Kingdom")
+        self.assertEqual(entry.airplane_name, "A320")
+        self.assertEqual(entry.capacity, 180)
+        self.assertEqual(entry.duration, timedelta(hours=1, minutes=10))
+        self.assertEqual(entry.seats_sold, 0)
+
+    def test_entry_follows_ticket_sales(self):
+        res = self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "flight": self.flight.id},
+                    {"row": 1, "seat": 2, "flight": self.flight.id},
+                ]
+            },
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.flight.search_entry.seats_sold, 2)
+
+        self.flight.flight_tickets.first().delete()
+        self.assertEqual(
+            FlightSearchEntry.objects.get(flight=self.flight).seats_sold, 1
+        )
+
+    def test_entry_follows_related_changes(self):
+        self.city.name = "Roissy"
+        self.city.save()
+        self.source.name = "Paris CDG"
+        self.source.save()
+        self.airplane.rows = 20
+        self.airplane.save()
+
+        entry = FlightSearchEntry.objects.get(flight=self.flight)
+        self.assertEqual(entry.source_name, "Paris CDG")
+        self.assertEqual(entry.source_city, "Roissy")
+        self.assertEqual(entry.capacity, 120)
+
+        res = self.client.get(FLIGHT_URL, {"from": "CDG"})
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]], [self.flight.id]
+        )
+        self.assertEqual(res.data["results"][0]["route"]["source"], "Paris CDG")
+
+    def test_list_reads_only_search_entries(self):
+        # The ETag comes from version tokens, the page is the only query
+        with self.assertNumQueries(1):
+            res = self.client.get(FLIGHT_URL, {"to": "heath"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"][0],
+            {
+                "id": self.flight.id,
+                "route": {
+                    "id": self.route.id,
+                    "source": "Charles de Gaulle",
+                    "destination": "Heathrow",
+                },
+                "airplane": "A320",
+                "departure_time": res.data["results"][0]["departure_time"],
+                "arrival_time": res.data["results"][0]["arrival_time"],
+            }
+        )
+
+    def test_entry_is_deleted_with_flight(self):
+        self.flight.delete()
+        self.assertFalse(FlightSearchEntry.objects.exists())
@@ -0,0 +1,151 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from airport_api.itinerary import FlightGraphStore
+from airport_api.models import (
+    Airport,
+    Route,
+    Airplane,
+    Crew,
+    Flight,
+    FlightSearchEntry,
+)
+from airport_api.schedule_import import ScheduleImporter
+
+
+class ImportScheduleCommandTests(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: str) -> str:
+        path = Path(self.directory.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def import_schedule(self, **files):
+        call_command("import_schedule", stdout=StringIO(), **files)
+
+    def schedule_files(self) -> dict:
+        return {
+            "airports": self.write(
+                "airports.csv",
+                "name,city,country\n"
+                "Heathrow,London,United Kingdom\n"
+                "Charles de Gaulle,Paris,France\n"
+            ),
+            "routes": self.write(
+                "routes.csv",
+                "source,destination,distance\n"
+                "Heathrow,Charles de Gaulle,350\n"
+            ),
+            "airplanes": self.write(
+                "airplanes.ndjson",
+                '{"name": "A320", "airplane_type": "Narrow body", '
+                '"rows": 30, "seats_in_row": 6}\n'
+            ),
+            "flights": self.write(
+                "flights.csv",
+                "source,destination,airplane,departure_time,arrival_time\n"
+                "Heathrow,Charles de Gaulle,A320,"
+                "2030-05-21T08:00:00Z,2030-05-21T09:10:00Z\n"
+                "Heathrow,Charles de Gaulle,A320,"
+                "2030-05-22T08:00:00Z,2030-05-22T09:10:00Z\n"
+            ),
+            "crews": self.write(
+                "crews.csv",
+                "first_name,last_name,airplane,departure_time\n"
+                "Michael,Ellipsis,A320,2030-05-21T08:00:00Z\n"
+                "John,Qwerty,A320,2030-05-21T08:00:00Z\n"
+                "Michael,Ellipsis,A320,2030-05-22T08:00:00Z\n"
+            ),
+        }
+
+    def test_import_schedule(self):
+        files = self.schedule_files()
+        self.import_schedule(**files)
+        self.import_schedule(**files)
+
+        self.assertEqual(Airport.objects.count(), 2)
+        route = Route.objects.get()
+        self.assertEqual(route.source.closest_big_city.country.name, "United Kingdom")
+        self.assertEqual(Airplane.objects.get().capacity, 180)
+        self.assertEqual(Flight.objects.filter(route=route).count(), 2)
+        self.assertEqual(Crew.objects.count(), 2)
+        michael = Crew.objects.get(last_name="Ellipsis")
+        self.assertEqual(michael.crew_flights.count(), 2)
+
+    def test_import_updates_flight_arrival(self):
+        self.test_import_schedule()
+        self.import_schedule(
+            flights=self.write(
+                "changed.csv",
+                "source,destination,airplane,departure_time,arrival_time\n"
+                "Heathrow,Charles de Gaulle,A320,"
+                "2030-05-21T08:00:00Z,2030-05-21T09:30:00Z\n"
+            )
+        )
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertEqual(
+            Flight.objects.order_by("departure_time").first().flight_time,
+            "1:30:00"
+        )
+        entry = FlightSearchEntry.objects.order_by("departure_time").first()
+        self.assertEqual(str(entry.duration), "1:30:00")
+        self.assertEqual(entry.source_country, "United Kingdom")
+        self.assertEqual(entry.capacity, 180)
+
+    def test_import_unknown_airport(self):
+        path = self.write(
+            "routes.csv",
+            "source,destination,distance\n"
+            "Nowhere,Heathrow,350\n"
+        )
+        with self.assertRaisesMessage(CommandError, "line 2: unknown airport"):
+            self.import_schedule(routes=path)
+        self.assertFalse(Route.objects.exists())
+
+    def test_import_rejects_overlapping_crew(self):
+        self.test_import_schedule()
+        self.import_schedule(
+            airplanes=self.write(
+                "airplanes.csv",
+                "name,airplane_type,rows,seats_in_row\n"
+                "B737,Narrow body,30,6\n"
+            ),
+            flights=self.write(
+                "flights.csv",
+                "source,destination,airplane,departure_time,arrival_time\n"
+                "Heathrow,Charles de Gaulle,B737,"
+                "2030-05-21T08:30:00Z,2030-05-21T09:40:00Z\n"
+            ),
+        )
+        path = self.write(
+            "crews.csv",
+            "first_name,last_name,airplane,departure_time\n"
+            "Michael,Ellipsis,B737,2030-05-21T08:30:00Z\n"
+        )
+        with self.assertRaisesMessage(CommandError, "overlapping flights"):
+            self.import_schedule(crews=path)
+        michael = Crew.objects.get(last_name="Ellipsis")
+        self.assertEqual(michael.crew_flights.count(), 2)
+
+    def test_import_reloads_graph_of_every_process(self):
+        other_process = FlightGraphStore()
+        loaded_at = other_process.get().loaded_at
+        self.import_schedule(**self.schedule_files())
+        self.assertNotEqual(other_process.get().loaded_at, loaded_at)
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY needs PostgreSQL")
+class CopyImportTests(ImportScheduleCommandTests):
+    """Every import test again, asserting it went through COPY"""
+
+    def import_schedule(self, **files):
+        self.assertTrue(ScheduleImporter().use_copy)
+        super().import_schedule(**files)
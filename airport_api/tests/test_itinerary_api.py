@@ -0,0 +1,160 @@
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from airport_api.itinerary import flight_graph
+from airport_api.models import (
+    Country,
+    City,
+    Route,
+    Airport,
+    Airplane,
+    Flight,
+    AirplaneType
+)
+
+ITINERARY_URL = reverse("api_airport:flight-itineraries")
+
+
+class UnauthenticatedItineraryApiTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ITINERARY_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedItineraryApiTests(TestCase):
+    def setUp(self) -> None:
+        flight_graph.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test",
+            password="Testpsw1"
+        )
+        self.client.force_authenticate(self.user)
+        country = Country.objects.create(
+            name="Random Country"
+        )
+        city = City.objects.create(
+            name="Random City",
+            country=country
+        )
+        self.airport_a = Airport.objects.create(
+            name="Alpha Airport",
+            closest_big_city=city
+        )
+        self.airport_b = Airport.objects.create(
+            name="Bravo Airport",
+            closest_big_city=city
+        )
+        self.airport_c = Airport.objects.create(
+            name="Charlie Airport",
+            closest_big_city=city
+        )
+        self.route_ab = Route.objects.create(
+            source=self.airport_a,
+            destination=self.airport_b,
+            distance=500.0
+        )
+        self.route_bc = Route.objects.create(
+            source=self.airport_b,
+            destination=self.airport_c,
+            distance=500.0
+        )
+        self.route_ac = Route.objects.create(
+            source=self.airport_a,
+            destination=self.airport_c,
+            distance=900.0
+        )
+        airplane_type = AirplaneType.objects.create(
+            name="Airplane Type 1"
+        )
+        self.airplane = Airplane.objects.create(
+            name="Airplane Name 1",
+            rows=1,
+            seats_in_row=2,
+            airplane_type=airplane_type,
+        )
+
+        self.now = datetime.now(timezone.utc)
+        self.flight_ab = self.create_flight(self.route_ab, 1, 3)
+        self.flight_bc = self.create_flight(self.route_bc, 4, 6)
+        self.flight_ac = self.create_flight(self.route_ac, 2, 8)
+
+    def create_flight(self, route, departs_in, arrives_in):
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=self.now + timedelta(hours=departs_in),
+            arrival_time=self.now + timedelta(hours=arrives_in),
+        )
+
+    def search(self, **params):
+        res = self.client.get(
+            ITINERARY_URL,
+            data={"from": "Alpha", "to": "Charlie", **params}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [
+            [flight["id"] for flight in itinerary["flights"]]
+            for itinerary in res.data
+        ]
+
+    def test_itineraries_ordered_by_arrival(self):
+        self.assertEqual(
+            self.search(),
+            [
+                [self.flight_ab.id, self.flight_bc.id],
+                [self.flight_ac.id],
+            ]
+        )
+
+    def test_itineraries_max_stops(self):
+        self.assertEqual(self.search(max_stops=0), [[self.flight_ac.id]])
+
+    def test_itineraries_min_connection(self):
+        self.assertEqual(
+            self.search(min_connection=90),
+            [[self.flight_ac.id]]
+        )
+
+    def test_itineraries_skip_sold_out_flights(self):
+        Flight.update_seat_map(self.flight_bc.id, take=[(1, 1), (1, 2)])
+        self.assertEqual(self.search(), [[self.flight_ac.id]])
+
+    def test_itineraries_include_new_flights(self):
+        self.search()
+        with self.captureOnCommitCallbacks(execute=True):
+            flight_bc = self.create_flight(self.route_bc, 4, 5)
+        self.assertEqual(
+            self.search(limit=1),
+            [[self.flight_ab.id, flight_bc.id]]
+        )
+
+    def test_itineraries_skip_rolled_back_flights(self):
+        self.search()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.create_flight(self.route_bc, 4, 5)
+                raise RuntimeError("transaction fails")
+        self.assertEqual(
+            self.search(limit=1),
+            [[self.flight_ab.id, self.flight_bc.id]]
+        )
+
+    def test_itineraries_invalid_params(self):
+        res = self.client.get(
+            ITINERARY_URL,
+            data={"from": "Alpha", "to": "Charlie", "max_stops": 3}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,184 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport_api.metrics import registry, retire_process
+
+METRICS_URL = reverse("metrics")
+FLIGHT_URL = reverse("api_airport:flight-list")
+AUTHORIZATION = "Bearer secret"
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+@override_settings(METRICS={"TOKEN": "secret"})
+class MetricsTests(TestCase):
+    def setUp(self) -> None:
+        registry.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_view_metrics_are_exposed(self):
+        self.client.get(FLIGHT_URL)
+        self.client.get(FLIGHT_URL)
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION=AUTHORIZATION)
+        body = res.content.decode()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'airport_http_requests_total{view="FlightViewSet.list",'
+            'method="GET",status="200"} 2',
+            body
+        )
+        self.assertIn(
+            'airport_http_request_duration_seconds_count'
+            '{view="FlightViewSet.list"} 2',
+            body
+        )
+        self.assertIn(
+            'airport_http_request_duration_seconds_bucket'
+            '{view="FlightViewSet.list",le="+Inf"} 2',
+            body
+        )
+        self.assertIn(
+            'airport_db_queries_per_request_count{view="FlightViewSet.list"} 2',
+            body
+        )
+        self.assertIn(
+            'airport_db_query_duration_seconds_total{view="FlightViewSet.list"}',
+            body
+        )
+
+    def test_query_count_is_recorded(self):
+        self.client.get(FLIGHT_URL)
+        queries = dict(
+            (view, total)
+            for view, _, _, total in registry.snapshot()["queries"]
+        )
+        self.assertGreaterEqual(queries["FlightViewSet.list"], 1)
+
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(res.status_code, 403)
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION=AUTHORIZATION)
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS={})
+    def test_metrics_are_closed_without_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        with override_settings(METRICS={"PUBLIC": True}):
+            self.assertEqual(self.client.get(METRICS_URL).status_code, 200)
+
+    def scrape(self, directory: str) -> str:
+        with override_settings(
+                METRICS={"TOKEN": "secret", "MULTIPROCESS_DIR": directory}
+        ):
+            return self.client.get(
+                METRICS_URL, HTTP_AUTHORIZATION=AUTHORIZATION
+            ).content.decode()
+
+    def test_multiprocess_files_are_merged(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "1.json").write_text(
+                '{"requests": [["RouteViewSet.list", "GET", "200", 5]],'
+                ' "latency": [], "queries": [], "sql_seconds": [],'
+                ' "response_bytes": []}'
+            )
+            self.client.get(FLIGHT_URL)
+            body = self.scrape(directory)
+
+        self.assertIn(
+            'airport_http_requests_total{view="RouteViewSet.list",'
+            'method="GET",status="200"} 5',
+            body
+        )
+        self.assertIn('view="FlightViewSet.list"', body)
+
+    def test_pool_metrics_are_exposed(self):
+        registry.shard().record_pool_wait("default", 0.002)
+        with tempfile.TemporaryDirectory() as directory:
+            # Files of live processes
+            Path(directory, "1.json").write_text(
+                '{"requests": [], "latency": [], "queries": [],'
+                ' "sql_seconds": [], "response_bytes": [],'
+                ' "pool_wait": [], "pools": [["default", "pool_size", 4],'
+                ' ["default", "requests_queued", 3]]}'
+            )
+            Path(directory, f"{os.getppid()}.json").write_text(
+                '{"requests": [], "latency": [], "queries": [],'
+                ' "sql_seconds": [], "response_bytes": [],'
+                ' "pool_wait": [], "pools": [["default", "pool_size", 2]]}'
+            )
+            body = self.scrape(directory)
+
+        self.assertIn(
+            'airport_db_pool_wait_seconds_bucket{alias="default",le="0.0025"} 1',
+            body
+        )
+        self.assertIn('airport_db_pool_wait_seconds_count{alias="default"} 1', body)
+        self.assertIn("# TYPE airport_db_pool_connections gauge", body)
+        self.assertIn('airport_db_pool_connections{alias="default"} 6', body)
+        self.assertIn(
+            'airport_db_pool_queued_checkouts_total{alias="default"} 3', body
+        )
+
+    def test_dead_processes_are_folded(self):
+        pid = dead_pid()
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, f"{pid}.json").write_text(
+                '{"requests": [["RouteViewSet.list", "GET", "200", 5]],'
+                ' "latency": [], "queries": [], "sql_seconds": [],'
+                ' "response_bytes": [], "pool_wait": [],'
+                ' "pools": [["default", "pool_size", 4],'
+                ' ["default", "requests_queued", 3]]}'
+            )
+            body = self.scrape(directory)
+            self.assertFalse(Path(directory, f"{pid}.json").exists())
+            # Folded once, not again on the next scrape
+            body_again = self.scrape(directory)
+
+        for scraped in (body, body_again):
+            self.assertIn(
+                'airport_http_requests_total{view="RouteViewSet.list",'
+                'method="GET",status="200"} 5',
+                scraped
+            )
+        self.assertIn(
+            'airport_db_pool_queued_checkouts_total{alias="default"} 3', body
+        )
+        self.assertNotIn("airport_db_pool_connections", body)
+
+    def test_exiting_worker_is_folded(self):
+        self.client.get(FLIGHT_URL)
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(METRICS={"MULTIPROCESS_DIR": directory}):
+                retire_process()
+            self.assertEqual(
+                sorted(path.name for path in Path(directory).glob("*.json")),
+                ["aggregate.json"]
+            )
+            aggregate = json.loads(Path(directory, "aggregate.json").read_text())
+
+        self.assertIn(
+            ["FlightViewSet.list", "GET", "200", 1], aggregate["requests"]
+        )
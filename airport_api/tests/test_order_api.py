@@ -5,10 +5,13 @@ from datetime import (
 )
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from airport_api.inventory import get_seat_inventory
 from airport_api.models import (
     Country,
     City,
@@ -47,6 +50,7 @@ class AuthenticatedOrderApiTests(
     TestCase
 ):  # Same permissions for admin and user (if It's user's own order)
     def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="Test@test.test",
@@ -205,6 +209,72 @@ class AuthenticatedOrderApiTests(
         res = self.client.post(ORDER_URL, payload, format="json")
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
+    def test_create_order_updates_seat_map(self):
+        payload = {
+            "tickets": [
+                {
+                    "row": 7,
+                    "seat": 8,
+                    "flight": self.flight_1.id
+                }
+            ]
+        }
+        self.client.post(ORDER_URL, payload, format="json")
+        self.flight_1.refresh_from_db()
+        self.assertEqual(self.flight_1.taken_seats, [7, 8])
+        self.assertEqual(self.flight_1.tickets_available, 548)
+
+    def test_create_order_query_count_independent_of_ticket_count(self):
+        def payload(seats):
+            return {
+                "tickets": [
+                    {
+                        "row": 1,
+                        "seat": seat,
+                        "flight": flight.id
+                    }
+                    for seat in seats
+                    for flight in (self.flight_1, self.flight_2)
+                ]
+            }
+
+        with CaptureQueriesContext(connection) as single:
+            self.client.post(ORDER_URL, payload([1]), format="json")
+        with CaptureQueriesContext(connection) as group:
+            res = self.client.post(
+                ORDER_URL, payload(range(2, 11)), format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(group), len(single))
+        self.assertEqual(Ticket.objects.filter(order_id=res.data["id"]).count(), 18)
+
+    def test_create_order_with_duplicate_seats(self):
+        ticket = {
+            "row": 3,
+            "seat": 3,
+            "flight": self.flight_1.id
+        }
+        res = self.client.post(
+            ORDER_URL, {"tickets": [ticket, ticket]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 2)
+        self.flight_1.refresh_from_db()
+        self.assertFalse(self.flight_1.is_seat_taken(3, 3))
+
+    def test_create_order_with_taken_seat(self):
+        payload = {
+            "tickets": [
+                {
+                    "row": 7,
+                    "seat": 7,
+                    "flight": self.flight_1.id
+                }
+            ]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_update_order(self):
         payload = {
             "tickets": [
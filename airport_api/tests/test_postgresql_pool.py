@@ -0,0 +1,47 @@
+from django.db import connection
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.test import SimpleTestCase
+
+from airport_service.postgresql_pool.base import DatabaseWrapper
+
+POOL = {"min_size": 1, "max_size": 4, "timeout": 5}
+
+
+def postgresql_settings(**options) -> dict:
+    return {
+        **connection.settings_dict,
+        "ENGINE": "airport_service.postgresql_pool",
+        "NAME": "airport",
+        "USER": "airport",
+        "HOST": "localhost",
+        "OPTIONS": options,
+    }
+
+
+class PoolBackendTests(SimpleTestCase):
+    def test_pool_options_are_not_connection_params(self):
+        wrapper = DatabaseWrapper(postgresql_settings(pool=POOL), alias="pooled")
+
+        params = wrapper.get_connection_params()
+
+        self.assertEqual(wrapper.pool_options, POOL)
+        self.assertNotIn("pool", params)
+        self.assertEqual(params["dbname"], "airport")
+
+    def test_without_pool_options_connections_are_not_pooled(self):
+        wrapper = DatabaseWrapper(postgresql_settings(), alias="plain")
+
+        self.assertIsNone(wrapper.pool)
+        self.assertEqual(wrapper.pool_stats(), {})
+
+    def test_database_creation_connection_is_not_pooled(self):
+        wrapper = DatabaseWrapper(
+            {**postgresql_settings(pool=POOL), "NAME": None}, alias=NO_DB_ALIAS
+        )
+
+        self.assertIsNone(wrapper.pool)
+
+    def test_stats_are_empty_until_the_pool_is_opened(self):
+        wrapper = DatabaseWrapper(postgresql_settings(pool=POOL), alias="pooled")
+
+        self.assertEqual(wrapper.pool_stats(), {})
@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import transaction
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport_api.inventory import get_seat_inventory
+from airport_api.itinerary import flight_graph
+from airport_api.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Flight,
+    Order,
+    Route,
+)
+from airport_api.replicas import (
+    PrimaryReplicaRouter,
+    primary_reads,
+    replica_reads,
+)
+
+ORDER_URL = reverse("api_airport:order-list")
+FLIGHT_URL = reverse("api_airport:flight-list")
+
+
+# Reads inside a transaction stay on the primary, so the tests cannot
+# run inside the transaction of a TestCase
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        cache.clear()
+        get_seat_inventory.cache_clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        # The replica has the user, like it would after replication
+        self.user.save(using="replica")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        city = City.objects.create(
+            name="Paris",
+            country=Country.objects.create(name="France")
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.flight = Flight.objects.create(
+            route=Route.objects.create(
+                source=Airport.objects.create(
+                    name="Charles de Gaulle", closest_big_city=city
+                ),
+                destination=Airport.objects.create(
+                    name="Orly", closest_big_city=city
+                ),
+                distance=30
+            ),
+            airplane=Airplane.objects.create(
+                name="A320",
+                rows=30,
+                seats_in_row=6,
+                airplane_type=AirplaneType.objects.create(name="Narrow body"),
+            ),
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=1),
+        )
+
+    def order_count(self) -> int:
+        res = self.client.get(ORDER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(res.data["results"])
+
+    def test_safe_requests_read_from_replica(self):
+        # Written to the primary only, as if the replica lagged behind
+        Order.objects.create(user=self.user)
+
+        self.assertEqual(self.order_count(), 0)
+        self.assertFalse(Order.objects.using("replica").exists())
+
+    def test_writer_reads_its_own_order(self):
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.order_count(), 1)
+
+        # Once the pin expires the replica serves the client again
+        cache.clear()
+        self.assertEqual(self.order_count(), 0)
+
+    def test_failed_write_does_not_pin(self):
+        res = self.client.post(ORDER_URL, {"tickets": []}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        Order.objects.create(user=self.user)
+
+        self.assertEqual(self.order_count(), 0)
+
+    def test_router(self):
+        router = PrimaryReplicaRouter()
+
+        self.assertIsNone(router.db_for_read(Order))
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Order), "replica")
+            self.assertEqual(router.db_for_write(Order), "default")
+            self.assertIsNone(router.db_for_read(Session))
+            with primary_reads():
+                self.assertIsNone(router.db_for_read(Order))
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Order))
+
+    def test_flight_graph_loads_from_primary(self):
+        flight_graph.clear()
+        self.addCleanup(flight_graph.clear)
+        with replica_reads():
+            graph = flight_graph.get()
+        itineraries = graph.search(
+            source_ids=[self.flight.route.source_id],
+            destination_ids=[self.flight.route.destination_id],
+            earliest_departure=timezone.now(),
+            latest_departure=timezone.now() + timedelta(days=2),
+            min_connection=timedelta(minutes=30),
+            max_layover=timedelta(hours=12),
+        )
+        self.assertEqual(
+            [[connection.flight_id for connection in itinerary]
+             for itinerary in itineraries],
+            [[self.flight.id]]
+        )
+
+    def test_jobs_read_from_replica_on_request(self):
+        Order.objects.create(user=self.user)
+
+        with replica_reads():
+            self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(Order.objects.count(), 1)
+
+    @override_settings(ROOT_URLCONF="airport_service.asgi_urls")
+    def test_async_views_read_from_replica(self):
+        async def get_flights():
+            return await AsyncClient().get(
+                FLIGHT_URL,
+                headers={
+                    "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+                },
+            )
+
+        res = async_to_sync(get_flights)()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], [])
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json"
+        )
+        res = async_to_sync(get_flights)()
+        self.assertEqual(len(res.json()["results"]), 1)
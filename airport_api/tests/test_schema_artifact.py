@@ -0,0 +1,110 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airport_api.schema_artifact import load_artifact
+
+SCHEMA_URL = reverse("schema")
+
+
+class SchemaArtifactTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        call_command(
+            "build_openapi_schema",
+            output_dir=cls.directory.name,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        load_artifact.cache_clear()
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        settings_override = override_settings(
+            OPENAPI_SCHEMA_DIR=Path(self.directory.name)
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_command_writes_both_formats(self):
+        names = sorted(path.name for path in Path(self.directory.name).iterdir())
+
+        self.assertEqual(
+            names,
+            ["schema.json", "schema.json.gz", "schema.yaml", "schema.yaml.gz"]
+        )
+        content = (Path(self.directory.name) / "schema.json").read_bytes()
+        self.assertEqual(
+            gzip.decompress(
+                (Path(self.directory.name) / "schema.json.gz").read_bytes()
+            ),
+            content
+        )
+        self.assertIn("/api/airport/flights/", json.loads(content)["paths"])
+
+    def test_artifact_is_served(self):
+        res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.content,
+            (Path(self.directory.name) / "schema.json").read_bytes()
+        )
+        self.assertEqual(res["Content-Type"], "application/vnd.oai.openapi+json")
+        self.assertEqual(res["Cache-Control"], "no-cache")
+        self.assertFalse(res["ETag"].startswith("W/"))
+        self.assertNotIn("Content-Encoding", res)
+
+        yaml = self.client.get(SCHEMA_URL)
+        self.assertTrue(yaml.content.startswith(b"openapi:"))
+        self.assertNotEqual(yaml["ETag"], res["ETag"])
+
+    def test_gzipped_artifact_is_served(self):
+        res = self.client.get(
+            SCHEMA_URL, {"format": "json"}, HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", res["Vary"])
+        self.assertEqual(
+            res.content,
+            (Path(self.directory.name) / "schema.json.gz").read_bytes()
+        )
+        plain = self.client.get(SCHEMA_URL, {"format": "json"})
+        self.assertNotEqual(res["ETag"], plain["ETag"])
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(res["ETag"], etag)
+
+    def test_missing_artifact_is_generated_in_debug_only(self):
+        with tempfile.TemporaryDirectory() as empty:
+            with override_settings(OPENAPI_SCHEMA_DIR=Path(empty), DEBUG=True):
+                res = self.client.get(SCHEMA_URL, {"format": "json"})
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertIn("/api/airport/flights/", res.json()["paths"])
+                self.assertNotIn("ETag", res)
+
+            with override_settings(OPENAPI_SCHEMA_DIR=Path(empty), DEBUG=False):
+                res = self.client.get(SCHEMA_URL)
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
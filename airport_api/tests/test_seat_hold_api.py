@@ -0,0 +1,273 @@
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from airport_api.inventory import get_seat_inventory
+from airport_api.models import (
+    Country,
+    City,
+    Route,
+    Airport,
+    Airplane,
+    Flight,
+    AirplaneType
+)
+
+ORDER_URL = reverse("api_airport:order-list")
+
+
+def hold_url(flight_id):
+    return reverse("api_airport:flight-hold", args=[flight_id])
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test",
+            password="Testpsw1"
+        )
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="Other@test.test",
+                password="Testpsw1"
+            )
+        )
+        self.client.force_authenticate(self.user)
+        country = Country.objects.create(
+            name="Random Country"
+        )
+        city = City.objects.create(
+            name="Random City",
+            country=country
+        )
+        route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Airport Name 1",
+                closest_big_city=city
+            ),
+            destination=Airport.objects.create(
+                name="Airport Name 2",
+                closest_big_city=city
+            ),
+            distance=700.0
+        )
+        airplane = Airplane.objects.create(
+            name="Airplane Name 1",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(
+                name="Airplane Type 1"
+            ),
+        )
+        departure_time = datetime.now(timezone.utc) + timedelta(days=1)
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+        )
+        self.seats = [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}]
+
+    def hold(self, client=None, **payload):
+        return (client or self.client).post(
+            hold_url(self.flight.id),
+            {"seats": self.seats, **payload},
+            format="json"
+        )
+
+    def order(self, client=None, **payload):
+        # Seats are claimed in the inventory when the order commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return (client or self.client).post(
+                ORDER_URL,
+                {
+                    "tickets": [
+                        {**seat, "flight": self.flight.id} for seat in self.seats
+                    ],
+                    **payload
+                },
+                format="json"
+            )
+
+    def test_hold_seats(self):
+        res = self.hold()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(res.data["hold"])
+        self.assertEqual(res.data["seats"], self.seats)
+
+    def test_hold_held_seats_conflict(self):
+        self.hold()
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_hold_invalid_seat(self):
+        self.seats = [{"row": 11, "seat": 1}]
+        res = self.hold()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_held_seats_without_hold(self):
+        self.hold()
+        res = self.order(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_confirm_hold_with_order(self):
+        token = self.hold().data["hold"]
+        res = self.order(hold=token)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 2)
+
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_release_hold(self):
+        token = self.hold().data["hold"]
+        res = self.client.delete(
+            hold_url(self.flight.id),
+            {"seats": self.seats, "hold": token},
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_hold_of_another_user_is_rejected(self):
+        token = self.hold().data["hold"]
+        res = self.hold(self.other_client, hold=token)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.other_client.delete(
+            hold_url(self.flight.id),
+            {"seats": self.seats, "hold": token},
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.order(self.other_client, hold=token)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_hold_seats_limit(self):
+        seats = [{"row": 1, "seat": seat} for seat in range(1, 7)]
+        seats += [{"row": 2, "seat": seat} for seat in range(1, 7)]
+        res = self.client.post(
+            hold_url(self.flight.id), {"seats": seats}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_active_holds_limit(self):
+        get_seat_inventory().max_holds = 1
+        token = self.hold().data["hold"]
+        self.seats = [{"row": 2, "seat": 1}]
+        res = self.hold()
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.seats = [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}]
+        self.assertEqual(
+            self.hold(hold=token).status_code, status.HTTP_201_CREATED
+        )
+        self.order(hold=token)
+        self.seats = [{"row": 3, "seat": 1}]
+        res = self.hold()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_expired_hold(self):
+        get_seat_inventory().hold(self.flight, [(1, 1), (1, 2)], "token", ttl=0)
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_rolled_back_order_frees_seats(self):
+        get_seat_inventory().claim_ttl = 0
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                res = self.client.post(
+                    ORDER_URL,
+                    {
+                        "tickets": [
+                            {**seat, "flight": self.flight.id}
+                            for seat in self.seats
+                        ]
+                    },
+                    format="json"
+                )
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+                raise RuntimeError("outer transaction fails")
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_seat_map_write_rereads_a_stale_row(self):
+        stale = Flight.objects.select_related("airplane").get(pk=self.flight.pk)
+        Flight.update_seat_map(self.flight.pk, take=[(2, 1)])
+
+        stale.write_seat_map(take=[(2, 2)])
+        flight = Flight.objects.get(pk=self.flight.pk)
+        self.assertEqual(flight.seats_sold, 2)
+        self.assertEqual(flight.seats_version, 2)
+        with self.assertRaises(ValueError):
+            stale.write_seat_map(take=[(2, 1)])
+
+    def test_deleted_ticket_frees_inventory_seat(self):
+        order_id = self.order().data["id"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse("api_airport:order-detail", args=[order_id])
+            )
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def ticket_id(self):
+        self.seats = [{"row": 1, "seat": 1}]
+        return self.order().data["tickets"][0]["id"]
+
+    def move_ticket(self, ticket_id, row, seat):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.put(
+                reverse("api_airport:ticket-detail", args=[ticket_id]),
+                {"row": row, "seat": seat, "flight": self.flight.id},
+                format="json"
+            )
+
+    def test_ticket_cannot_take_seat_held_by_another_user(self):
+        ticket_id = self.ticket_id()
+        self.seats = [{"row": 2, "seat": 1}]
+        self.hold(self.other_client)
+        res = self.move_ticket(ticket_id, 2, 1)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.flight.refresh_from_db()
+        self.assertFalse(self.flight.is_seat_taken(2, 1))
+
+    def test_moved_ticket_updates_inventory(self):
+        ticket_id = self.ticket_id()
+        res = self.move_ticket(ticket_id, 2, 1)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.seats = [{"row": 2, "seat": 1}]
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.seats = [{"row": 1, "seat": 1}]
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_failed_order_update_keeps_seats_sold(self):
+        order_id = self.order().data["id"]
+        self.hold(self.other_client, seats=[{"row": 2, "seat": 1}])
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.put(
+                reverse("api_airport:order-detail", args=[order_id]),
+                {"tickets": [{"row": 2, "seat": 1, "flight": self.flight.id}]},
+                format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.hold(self.other_client)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airport_api.inventory import get_seat_inventory
+from airport_api.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+ROUTE_URL = reverse("api_airport:route-list")
+
+
+def flight_detail_url(flight_id):
+    return reverse("api_airport:flight-detail", args=[flight_id])
+
+
+def order_detail_url(order_id):
+    return reverse("api_airport:order-detail", args=[order_id])
+
+
+def queries_on(context, table: str) -> list[str]:
+    return [
+        query["sql"] for query in context.captured_queries
+        if f'"{table}"' in query["sql"]
+    ]
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+        city = City.objects.create(
+            name="Paris",
+            country=Country.objects.create(name="France")
+        )
+        self.route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Charles de Gaulle", closest_big_city=city
+            ),
+            destination=Airport.objects.create(
+                name="Orly", closest_big_city=city
+            ),
+            distance=30
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=Airplane.objects.create(
+                name="A320",
+                rows=30,
+                seats_in_row=6,
+                airplane_type=AirplaneType.objects.create(name="Narrow body"),
+            ),
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=1),
+        )
+        self.flight.crews.add(
+            Crew.objects.create(first_name="Anna", last_name="Smith")
+        )
+
+    def test_fields_limit_response_and_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(
+                flight_detail_url(self.flight.id),
+                {"fields": "id,departure_time"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {"id", "departure_time"})
+        self.assertFalse(queries_on(context, "airport_api_flight_crews"))
+        flight_query = [
+            sql for sql in queries_on(context, "airport_api_flight")
+            if "airport_api_airport" in sql
+        ]
+        self.assertFalse(flight_query)
+
+    def test_exclude_drops_fields(self):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(
+                flight_detail_url(self.flight.id), {"exclude": "crews"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("crews", res.data)
+        self.assertIn("route", res.data)
+        self.assertFalse(queries_on(context, "airport_api_flight_crews"))
+
+    def test_full_response_prefetches_relations(self):
+        res = self.client.get(flight_detail_url(self.flight.id))
+
+        self.assertEqual(res.data["route"]["source"], "Charles de Gaulle")
+        self.assertEqual(res.data["crews"][0]["last_name"], "Smith")
+        self.assertEqual(res.data["tickets_available"], 180)
+
+    def test_unknown_field_rejected(self):
+        res = self.client.get(ROUTE_URL, {"fields": "id,altitude"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("altitude", str(res.data["fields"]))
+
+    def test_list_fields(self):
+        res = self.client.get(ROUTE_URL, {"fields": "id"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [{"id": self.route.id}])
+
+    def test_order_tickets_loaded_only_when_requested(self):
+        order = Order.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                order=order, flight=self.flight, row=1, seat=seat
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(order_detail_url(order.id), {"fields": "id"})
+        self.assertEqual(res.data, {"id": order.id})
+        self.assertFalse(queries_on(context, "airport_api_ticket"))
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(order_detail_url(order.id))
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertEqual(len(queries_on(context, "airport_api_ticket")), 1)
@@ -0,0 +1,127 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airport_api.throttling import InMemoryRateLimiter, get_rate_limiter
+
+ORDER_URL = reverse("api_airport:order-list")
+REGISTER_URL = reverse("user:create")
+
+
+def throttle_rates(**rates) -> dict:
+    return {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            **rates,
+        },
+    }
+
+
+class InMemoryRateLimiterTests(SimpleTestCase):
+    def test_window_slides(self):
+        limiter = InMemoryRateLimiter()
+
+        self.assertEqual(limiter.hit("key", 2, 0.2), (True, 0.0))
+        self.assertTrue(limiter.hit("key", 2, 0.2)[0])
+        allowed, wait = limiter.hit("key", 2, 0.2)
+        self.assertFalse(allowed)
+        self.assertTrue(0 < wait <= 0.2)
+        self.assertTrue(limiter.hit("other", 2, 0.2)[0])
+
+        time.sleep(wait)
+        self.assertTrue(limiter.hit("key", 2, 0.2)[0])
+
+
+class ThrottleTests(TestCase):
+    def setUp(self) -> None:
+        get_rate_limiter().reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self) -> None:
+        get_rate_limiter().reset()
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(order_create="2/hour"))
+    def test_order_creation_is_throttled(self):
+        # Throttles run before validation, so rejected orders count too
+        for _ in range(2):
+            res = self.client.post(ORDER_URL, {"tickets": []}, format="json")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(ORDER_URL, {"tickets": []}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(0 < int(res["Retry-After"]) <= 3600)
+        self.assertEqual(
+            self.client.get(ORDER_URL).status_code, status.HTTP_200_OK
+        )
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(register="2/hour"))
+    def test_registration_is_throttled(self):
+        client = APIClient()
+        for number in range(2):
+            res = client.post(
+                REGISTER_URL,
+                {"email": f"user{number}@test.com", "password": "Testpass123"}
+            )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = client.post(
+            REGISTER_URL, {"email": "user2@test.com", "password": "Testpass123"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(
+            get_user_model().objects.filter(email="user2@test.com").exists()
+        )
+
+    def register(self, number: int, forwarded_for: str):
+        return APIClient().post(
+            REGISTER_URL,
+            {"email": f"user{number}@test.com", "password": "Testpass123"},
+            HTTP_X_FORWARDED_FOR=forwarded_for,
+        )
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(register="2/hour"))
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for number in range(2):
+            res = self.register(number, f"198.51.100.{number}")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.register(2, "198.51.100.2")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(
+        REST_FRAMEWORK={**throttle_rates(register="2/hour"), "NUM_PROXIES": 1}
+    )
+    def test_spoofed_forwarded_for_does_not_reset_limit(self):
+        # The proxy appends the address it sees to what the client sent
+        for number in range(2):
+            res = self.register(number, f"198.51.100.{number}, 203.0.113.7")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.register(2, "198.51.100.2, 203.0.113.7")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.register(3, "198.51.100.2, 203.0.113.8")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(
+        REST_FRAMEWORK=throttle_rates(user="1/hour"),
+        RATE_LIMITER={**settings.RATE_LIMITER, "ENABLED": False},
+    )
+    def test_throttling_can_be_disabled(self):
+        for _ in range(3):
+            res = self.client.get(ORDER_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
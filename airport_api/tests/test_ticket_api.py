@@ -5,9 +5,11 @@ from datetime import (
 )
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.exceptions import ValidationError
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from airport_api.inventory import get_seat_inventory
 from airport_api.models import (
     Country,
     City,
@@ -22,7 +24,8 @@ from airport_api.models import (
 )
 from airport_api.serializers import (
     TicketListSerializer,
-    TicketRetrieveSerializer
+    TicketRetrieveSerializer,
+    TicketSerializer
 )
 
 TICKET_URL = reverse("api_airport:ticket-list")
@@ -46,6 +49,7 @@ class AuthenticatedTicketApiTests(
     TestCase
 ):  # Same permissions for admin and user (if It's user's own ticket)
     def setUp(self) -> None:
+        get_seat_inventory.cache_clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="Test@test.test",
@@ -167,7 +171,7 @@ class AuthenticatedTicketApiTests(
 
     def test_ticket_list(self):
         res = self.client.get(TICKET_URL)
-        tickets = Ticket.objects.all()
+        tickets = Ticket.objects.order_by("id")
         serializer = TicketListSerializer(tickets, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data)
@@ -208,10 +212,38 @@ class AuthenticatedTicketApiTests(
         )
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_update_ticket_moves_seat(self):
+        payload = {
+            "row": 7,
+            "seat": 9,
+            "flight": self.flight_1.id
+        }
+        self.client.put(detail_url(self.ticket_1.id), payload, format="json")
+        self.flight_1.refresh_from_db()
+        self.assertFalse(self.flight_1.is_seat_taken(7, 7))
+        self.assertTrue(self.flight_1.is_seat_taken(7, 9))
+        self.assertEqual(self.flight_1.seats_sold, 1)
+
+    def test_update_ticket_to_seat_sold_meanwhile(self):
+        serializer = TicketSerializer(
+            self.ticket_1,
+            data={"row": 7, "seat": 9, "flight": self.flight_1.id}
+        )
+        self.assertTrue(serializer.is_valid())
+        Flight.update_seat_map(self.flight_1.id, take=[(7, 9)])
+        with self.assertRaises(ValidationError):
+            serializer.save()
+
     def test_delete_ticket(self):
         res = self.client.delete(detail_url(self.ticket_1.id))
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_delete_ticket_releases_seat(self):
+        self.client.delete(detail_url(self.ticket_1.id))
+        self.flight_1.refresh_from_db()
+        self.assertFalse(self.flight_1.is_seat_taken(7, 7))
+        self.assertEqual(self.flight_1.seats_sold, 0)
+
     def test_get_invalid_ticket(self):
         invalid_id = self.ticket_2.id + 1
         res = self.client.get(detail_url(invalid_id))
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+
+class RateLimiter(ABC):
+    """Sliding-window log of the requests made under a key.
+
+    A request is allowed when fewer than ``limit`` requests were allowed
+    under its key in the last ``window`` seconds; rejected requests are
+    not recorded, so a client that keeps retrying is let in again as
+    soon as its oldest request leaves the window.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: int) -> tuple[bool, float]:
+        """Record a request if allowed. Returns whether it is allowed and
+        the seconds until the next one would be."""
+
+    async def ahit(self, key: str, limit: int, window: int) -> tuple[bool, float]:
+        """``hit`` for async callers, backends doing I/O override it"""
+        return self.hit(key, limit, window)
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Forget every recorded request"""
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """Single-process stand-in for tests and local development"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            requests = self._requests.setdefault(key, deque())
+            while requests and requests[0] <= now - window:
+                requests.popleft()
+            if len(requests) < limit:
+                requests.append(now)
+                return True, 0.0
+            return False, requests[0] + window - now
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+
+
+class RedisRateLimiter(RateLimiter):
+    """Rate limiter shared by all workers through Redis.
+
+    Every key is a sorted set of request ids scored by their time in
+    microseconds, taken from the Redis clock so that workers with
+    skewed clocks agree. Trimming, counting and recording happen in one
+    Lua script, a single round trip per check.
+    """
+
+    script = """
+        local now = redis.call('TIME')
+        local now_us = tonumber(now[1]) * 1000000 + tonumber(now[2])
+        local limit = tonumber(ARGV[1])
+        local window_us = tonumber(ARGV[2]) * 1000000
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_us - window_us)
+        if redis.call('ZCARD', KEYS[1]) < limit then
+            redis.call('ZADD', KEYS[1], now_us, ARGV[3])
+            redis.call('PEXPIRE', KEYS[1], math.ceil(window_us / 1000))
+            return {1, 0}
+        end
+        local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+        return {0, tonumber(oldest[2]) + window_us - now_us}
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self._script = self.client.register_script(self.script)
+        # redis.asyncio connections belong to the loop that opened them
+        self._async_scripts = weakref.WeakKeyDictionary()
+
+    def hit(self, key, limit, window):
+        allowed, wait_us = self._script(
+            keys=[f"rate-limit:{key}"],
+            args=[limit, window, uuid.uuid4().hex],
+        )
+        return bool(allowed), wait_us / 1_000_000
+
+    async def ahit(self, key, limit, window):
+        loop = asyncio.get_running_loop()
+        script = self._async_scripts.get(loop)
+        if script is None:
+            import redis.asyncio
+
+            script = redis.asyncio.Redis.from_url(self.url).register_script(
+                self.script
+            )
+            self._async_scripts[loop] = script
+        allowed, wait_us = await script(
+            keys=[f"rate-limit:{key}"],
+            args=[limit, window, uuid.uuid4().hex],
+        )
+        return bool(allowed), wait_us / 1_000_000
+
+    def reset(self):
+        for key in self.client.scan_iter("rate-limit:*"):
+            self.client.delete(key)
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter() -> RateLimiter:
+    options = settings.RATE_LIMITER
+    return import_string(options["BACKEND"])(**options.get("OPTIONS", {}))
+
+
+class SlidingWindowMixin:
+    """Keep the history of a ``SimpleRateThrottle`` in the rate limiter.
+
+    DRF's throttles read and write the cache in separate steps, so
+    concurrent requests can all pass, and with a per-process cache every
+    worker counts on its own. The rate limiter checks and records a
+    request in one step shared by all workers.
+    """
+
+    wait_seconds = None
+
+    @property
+    def THROTTLE_RATES(self):
+        # DRF binds the rates at import, which hides settings overrides
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def checks_request(self, request, view) -> bool:
+        if self.rate is None or not settings.RATE_LIMITER.get("ENABLED", True):
+            return False
+        self.key = self.get_cache_key(request, view)
+        return self.key is not None
+
+    def allow_request(self, request, view):
+        if not self.checks_request(request, view):
+            return True
+        allowed, self.wait_seconds = get_rate_limiter().hit(
+            self.key, self.num_requests, self.duration
+        )
+        return allowed
+
+    async def aallow_request(self, request, view):
+        """``allow_request`` without blocking the event loop"""
+        if not self.checks_request(request, view):
+            return True
+        allowed, self.wait_seconds = await get_rate_limiter().ahit(
+            self.key, self.num_requests, self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonSlidingWindowThrottle(SlidingWindowMixin, AnonRateThrottle):
+    pass
+
+
+class UserSlidingWindowThrottle(SlidingWindowMixin, UserRateThrottle):
+    pass
+
+
+class OrderCreateThrottle(SlidingWindowMixin, UserRateThrottle):
+    scope = "order_create"
+
+
+class RegistrationThrottle(SlidingWindowMixin, SimpleRateThrottle):
+    """Limits sign-ups per client address"""
+
+    scope = "register"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
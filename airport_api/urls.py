@@ -9,6 +9,7 @@ from .views import (
     AirplaneTypeViewSet,
     AirplaneViewSet,
     FlightViewSet,
+    FlightScheduleViewSet,
     OrderViewSet,
     TicketViewSet,
 )
@@ -22,6 +23,7 @@ router.register("routes", RouteViewSet)
 router.register("airplane_types", AirplaneTypeViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("flights", FlightViewSet)
+router.register("flight_schedules", FlightScheduleViewSet)
 router.register("orders", OrderViewSet)
 router.register("tickets", TicketViewSet)
 
@@ -1,6 +1,8 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 
-from django.db.models import Count, F, Q
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema,
@@ -9,6 +11,7 @@ from drf_spectacular.utils import (
     extend_schema_view,
 )
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -23,10 +26,24 @@ from .models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightSchedule,
+    FlightSearchEntry,
     Order,
     Ticket,
+    SEAT_TAKEN_MESSAGE,
 )
+from .async_views import AsyncReadMixin
+from .cache import CachedReadMixin
+from .conditional import ConditionalGetMixin
+from .crew_schedule import find_crew_conflicts
+from .export import ExportMixin
+from .inventory import get_seat_inventory
+from .itinerary import flight_graph
+from .pagination import FlightPagination, OrderPagination, TicketPagination
 from .permissions import IsAdminAllORIsAuthenticatedOrReadOnly
+from .search import substring_filter
+from .sparse_fields import SparseFieldsMixin
+from .throttling import OrderCreateThrottle
 from .serializers import (
     CrewSerializer,
     CrewListSerializer,
@@ -50,8 +67,15 @@ from .serializers import (
     AirplaneImageSerializer,
     AirplaneRetrieveSerializer,
     FlightSerializer,
-    FlightListSerializer,
+    FlightSearchEntrySerializer,
     FlightRetrieveSerializer,
+    FlightSeatsSerializer,
+    FlightBatchValidationSerializer,
+    FlightScheduleSerializer,
+    FlightScheduleListSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
+    SeatHoldSerializer,
     TicketSerializer,
     TicketListSerializer,
     TicketRetrieveSerializer,
@@ -86,7 +110,7 @@ from .serializers import (
         description="Admin can delete specific crew member",
     ),
 )
-class CrewViewSet(ModelViewSet):
+class CrewViewSet(ConditionalGetMixin, SparseFieldsMixin, ModelViewSet):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
 
@@ -95,13 +119,9 @@ class CrewViewSet(ModelViewSet):
         first_name = self.request.query_params.get("first_name")
         last_name = self.request.query_params.get("last_name")
         if first_name:
-            queryset = queryset.filter(
-                first_name__icontains=first_name
-            )
+            queryset = substring_filter(queryset, first_name, "first_name")
         if last_name:
-            queryset = queryset.filter(
-                last_name__icontains=last_name
-            )
+            queryset = substring_filter(queryset, last_name, "last_name")
         return queryset
 
     def get_serializer_class(self):
@@ -155,17 +175,22 @@ class CrewViewSet(ModelViewSet):
         description="Admin can delete specific country",
     ),
 )
-class CountryViewSet(ModelViewSet):
+class CountryViewSet(
+    ConditionalGetMixin,
+    CachedReadMixin,
+    SparseFieldsMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
+    cache_models = (Country,)
 
     def get_queryset(self):
         queryset = self.queryset
         name = self.request.query_params.get("name")
         if name:
-            queryset = queryset.filter(
-                name__icontains=name
-            )
+            queryset = substring_filter(queryset, name, "name")
         return queryset
 
     def get_serializer_class(self):
@@ -211,19 +236,23 @@ class CountryViewSet(ModelViewSet):
         description="Admin can delete specific city",
     ),
 )
-class CityViewSet(ModelViewSet):
+class CityViewSet(
+    ConditionalGetMixin,
+    CachedReadMixin,
+    SparseFieldsMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = City.objects.all()
     serializer_class = CitySerializer
+    cache_models = (City, Country)
+    conditional_models = (Country,)
 
     def get_queryset(self):
         queryset = self.queryset
         name = self.request.query_params.get("name")
         if name:
-            queryset = queryset.filter(
-                name__icontains=name
-            )
-        if self.action in ("list", "retrieve"):
-            return queryset.select_related()
+            queryset = substring_filter(queryset, name, "name")
         return queryset
 
     def get_serializer_class(self):
@@ -271,9 +300,17 @@ class CityViewSet(ModelViewSet):
         description="Admin can delete specific airport",
     ),
 )
-class AirportViewSet(ModelViewSet):
+class AirportViewSet(
+    ConditionalGetMixin,
+    CachedReadMixin,
+    SparseFieldsMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
+    cache_models = (Airport, City, Country)
+    conditional_models = (City, Country)
 
     @extend_schema(
         methods=["GET"],
@@ -302,9 +339,7 @@ class AirportViewSet(ModelViewSet):
         queryset = self.queryset
         name = self.request.query_params.get("name")
         if name:
-            queryset = queryset.filter(
-                name__icontains=name
-            )
+            queryset = substring_filter(queryset, name, "name")
         return queryset
 
 
@@ -328,24 +363,28 @@ class AirportViewSet(ModelViewSet):
         summary="Delete a specific route", description="Admin can delete specific route"
     ),
 )
-class RouteViewSet(ModelViewSet):
+class RouteViewSet(
+    ConditionalGetMixin,
+    CachedReadMixin,
+    SparseFieldsMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
+    cache_models = (Route, Airport)
+    conditional_models = (Airport,)
 
     def get_queryset(self):
         queryset = self.queryset
         source = self.request.query_params.get("from")
         destination = self.request.query_params.get("to")
         if source:
-            queryset = queryset.filter(
-                source__name__icontains=source
-            )
+            queryset = substring_filter(queryset, source, "source__name")
         if destination:
-            queryset = queryset.filter(
-                destination__name__icontains=destination
+            queryset = substring_filter(
+                queryset, destination, "destination__name"
             )
-        if self.action in ("list", "retrieve"):
-            return queryset.select_related()
         return queryset
 
     def get_serializer_class(self):
@@ -400,15 +439,22 @@ class RouteViewSet(ModelViewSet):
         description="Admin can delete specific airplane type",
     ),
 )
-class AirplaneTypeViewSet(ModelViewSet):
+class AirplaneTypeViewSet(
+    ConditionalGetMixin,
+    CachedReadMixin,
+    SparseFieldsMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
+    cache_models = (AirplaneType,)
 
     def get_queryset(self):
         queryset = self.queryset
         name = self.request.query_params.get("name")
         if name:
-            queryset = queryset.filter(name__icontains=name)
+            queryset = substring_filter(queryset, name, "name")
         return queryset
 
     def get_serializer_class(self):
@@ -455,15 +501,23 @@ class AirplaneTypeViewSet(ModelViewSet):
         description="Admin can delete specific airplane",
     ),
 )
-class AirplaneViewSet(ModelViewSet):
+class AirplaneViewSet(
+    ConditionalGetMixin,
+    CachedReadMixin,
+    SparseFieldsMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
+    cache_models = (Airplane, AirplaneType)
+    conditional_models = (AirplaneType,)
 
     def get_queryset(self):
         queryset = self.queryset
         name = self.request.query_params.get("name")
         if name:
-            queryset = queryset.filter(name__icontains=name)
+            queryset = substring_filter(queryset, name, "name")
         return queryset
 
     def get_serializer_class(self):
@@ -526,105 +580,155 @@ class AirplaneViewSet(ModelViewSet):
         description="Admin can delete specific flight",
     ),
 )
-class FlightViewSet(ModelViewSet):
+class FlightViewSet(
+    ConditionalGetMixin,
+    ExportMixin,
+    SparseFieldsMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = Flight.objects.all()
     serializer_class = FlightSerializer
+    pagination_class = FlightPagination
+    conditional_models = (Route, Airport, Airplane, Crew)
+    # Every seat map write bumps seats_version
+    conditional_fields = ("updated_at", "seats_version", "arrival_time")
+    export_fields = {
+        "id": "flight_id",
+        "source": "source_name",
+        "destination": "destination_name",
+        "airplane": "airplane_name",
+        "departure_time": "departure_time",
+        "arrival_time": "arrival_time",
+        "seats_sold": "seats_sold",
+    }
+    filter_lookups = {
+        "id": "id",
+        "from": "route__source__name",
+        "to": "route__destination__name",
+        "plane_name": "airplane__name",
+    }
+    search_filter_lookups = {
+        "id": "flight_id",
+        "from": "source_name",
+        "to": "destination_name",
+        "plane_name": "airplane_name",
+    }
 
     def get_queryset(self):
-        queryset = self.queryset
+        # Listing and exporting read only the flat search entries
+        if self.action in ("list", "export"):
+            return self.filter_flights(
+                FlightSearchEntry.objects.all(), self.search_filter_lookups
+            )
+        queryset = self.filter_flights(self.queryset, self.filter_lookups)
+        if self.action == "seats":
+            return queryset.select_related("airplane")
+        return queryset
+
+    def filter_flights(self, queryset, lookups: dict):
         flight_id = self.request.query_params.get(
             "id"
         )
-        source = self.request.query_params.get(
-            "from"
-        )
-        destination = self.request.query_params.get(
-            "to"
-        )
-        airplane = self.request.query_params.get(
-            "plane_name"
-        )
-        departure_date = self.request.query_params.get(
-            "departure_date"
-        )
-        arrival_date = self.request.query_params.get(
-            "arrival_date"
-        )
-        departure_hour = self.request.query_params.get(
-            "departure_hour"
-        )
-        departure_minute = self.request.query_params.get(
-            "departure_minute"
-        )
-        arrival_hour = self.request.query_params.get(
-            "arrival_hour"
-        )
-        arrival_minute = self.request.query_params.get(
-            "arrival_minute"
-        )
         if flight_id:
-            queryset = self.queryset.filter(
-                id__in=flight_id
-            )
-        if source:
-            queryset = self.queryset.filter(
-                route__source__name__icontains=source
-            )
-        if destination:
-            queryset = self.queryset.filter(
-                route__destination__name__icontains=destination
-            )
-        if airplane:
-            queryset = self.queryset.filter(
-                airplane__name__icontains=airplane
-            )
-        if departure_date:
-            date = datetime.strptime(
-                departure_date, "%Y-%m-%d"
-            ).date()
-            queryset = queryset.filter(
-                departure_time__date=date
-            )
-        if departure_hour:
             queryset = queryset.filter(
-                departure_time__hour=departure_hour
+                **{f"{lookups['id']}__in": flight_id}
             )
-        if departure_minute:
-            queryset = queryset.filter(
-                departure_time__minute=departure_minute
+        for param in ("from", "to", "plane_name"):
+            value = self.request.query_params.get(param)
+            if value:
+                queryset = substring_filter(queryset, value, lookups[param])
+        for field in ("departure", "arrival"):
+            queryset = self.filter_by_time(queryset, field)
+        return queryset
+
+    def get_conditional_models(self) -> tuple:
+        # The search entries carry copies of everything the list shows
+        if self.action == "list":
+            return (FlightSearchEntry,)
+        return self.conditional_models
+
+    def get_conditional_row(self, row: dict) -> dict:
+        # Landing changes the detail at arrival_time without a write
+        if row["arrival_time"] <= timezone.now():
+            row["updated_at"] = max(row["updated_at"], row["arrival_time"])
+        return row
+
+    @staticmethod
+    def parse_moment(name: str, value: str) -> datetime:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValidationError(
+                    {name: "Use YYYY-MM-DD or an ISO 8601 date and time"}
+                )
+            moment = datetime.combine(day, time.min)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def filter_by_time(self, queryset, field: str):
+        """Filter ``<field>_time`` by date, hour, minute and explicit bounds.
+
+        A date is turned into a half-open range in the server time zone,
+        narrowed to the hour and minute when they are given, so the filter
+        can use the flight time indexes. Hour or minute without a date
+        match every day and still fall back to extracting the field.
+        """
+        params = self.request.query_params
+        column = f"{field}_time"
+        date = params.get(f"{field}_date")
+        hour = params.get(f"{field}_hour")
+        minute = params.get(f"{field}_minute")
+        after = params.get(f"{field}_after")
+        before = params.get(f"{field}_before")
+        try:
+            hour = int(hour) if hour else None
+            minute = int(minute) if minute else None
+            if hour is not None and not 0 <= hour <= 23:
+                raise ValueError(hour)
+            if minute is not None and not 0 <= minute <= 59:
+                raise ValueError(minute)
+            day = datetime.strptime(date, "%Y-%m-%d").date() if date else None
+        except ValueError:
+            raise ValidationError(
+                {field: "Use YYYY-MM-DD for dates, 0-23 for hours and 0-59 for minutes"}
             )
-        if arrival_date:
-            date = datetime.strptime(
-                arrival_date,
-                "%Y-%m-%d"
-            ).date()
+
+        if day:
+            start = timezone.make_aware(datetime.combine(day, time.min))
+            length = timedelta(days=1)
+            if hour is not None:
+                start += timedelta(hours=hour)
+                length = timedelta(hours=1)
+                if minute is not None:
+                    start += timedelta(minutes=minute)
+                    length = timedelta(minutes=1)
             queryset = queryset.filter(
-                arrival_time__date=date
+                **{f"{column}__gte": start, f"{column}__lt": start + length}
             )
-        if arrival_hour:
+        elif hour is not None:
+            queryset = queryset.filter(**{f"{column}__hour": hour})
+        if minute is not None and (not day or hour is None):
+            queryset = queryset.filter(**{f"{column}__minute": minute})
+        if after:
             queryset = queryset.filter(
-                arrival_time__hour=arrival_hour
+                **{f"{column}__gte": self.parse_moment(f"{field}_after", after)}
             )
-        if arrival_minute:
+        if before:
             queryset = queryset.filter(
-                arrival_time__minute=arrival_minute
-            )
-        if self.action in ("list", "retrieve"):
-            return (
-                queryset.select_related()
-                .prefetch_related("crews")
-                .annotate(
-                    tickets_available=F("airplane__rows") * F("airplane__seats_in_row")
-                                      - Count("flight_tickets")
-                )
+                **{f"{column}__lt": self.parse_moment(f"{field}_before", before)}
             )
         return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
-            return FlightListSerializer
+            return FlightSearchEntrySerializer
         elif self.action == "retrieve":
             return FlightRetrieveSerializer
+        elif self.action == "seats":
+            return FlightSeatsSerializer
         return FlightSerializer
 
     @extend_schema(
@@ -657,11 +761,23 @@ class FlightViewSet(ModelViewSet):
                 examples=[OpenApiExample("Example", value="Paris")],
             ),
             OpenApiParameter(
-                name="departure_time",
-                description="Filter by airplane departure time",
-                type=OpenApiTypes.DATETIME,
+                name="departure_date",
+                description="Filter by airplane departure date",
+                type=OpenApiTypes.DATE,
                 examples=[OpenApiExample("Example", value="2024-05-21")],
             ),
+            OpenApiParameter(
+                name="departure_after",
+                description="Flights departing at or after this date or time",
+                type=OpenApiTypes.DATETIME,
+                examples=[OpenApiExample("Example", value="2024-05-21T08:00")],
+            ),
+            OpenApiParameter(
+                name="departure_before",
+                description="Flights departing before this date or time",
+                type=OpenApiTypes.DATETIME,
+                examples=[OpenApiExample("Example", value="2024-05-21T12:00")],
+            ),
             OpenApiParameter(
                 name="departure_hour",
                 description="Filter by airplane departure hour",
@@ -675,11 +791,23 @@ class FlightViewSet(ModelViewSet):
                 examples=[OpenApiExample("Example", value="30")],
             ),
             OpenApiParameter(
-                name="arrival_time",
-                description="Filter by airplane arrival time",
-                type=OpenApiTypes.DATETIME,
+                name="arrival_date",
+                description="Filter by airplane arrival date",
+                type=OpenApiTypes.DATE,
                 examples=[OpenApiExample("Example", value="2024-05-21")],
             ),
+            OpenApiParameter(
+                name="arrival_after",
+                description="Flights arriving at or after this date or time",
+                type=OpenApiTypes.DATETIME,
+                examples=[OpenApiExample("Example", value="2024-05-21T10:00")],
+            ),
+            OpenApiParameter(
+                name="arrival_before",
+                description="Flights arriving before this date or time",
+                type=OpenApiTypes.DATETIME,
+                examples=[OpenApiExample("Example", value="2024-05-22")],
+            ),
             OpenApiParameter(
                 name="arrival_hour",
                 description="Filter by airplane arrival hour",
@@ -697,6 +825,307 @@ class FlightViewSet(ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        methods=["GET"],
+        summary="Search connecting flights",
+        description="User can find direct flights and itineraries "
+                    "with up to two stops between two airports",
+        parameters=[
+            OpenApiParameter(
+                name="from",
+                description="Departure airport name",
+                type=str,
+                required=True,
+                examples=[OpenApiExample("Example", value="London")],
+            ),
+            OpenApiParameter(
+                name="to",
+                description="Arrival airport name",
+                type=str,
+                required=True,
+                examples=[OpenApiExample("Example", value="Tokyo")],
+            ),
+            OpenApiParameter(
+                name="date",
+                description="Departure date of the first flight",
+                type=OpenApiTypes.DATE,
+                examples=[OpenApiExample("Example", value="2024-05-21")],
+            ),
+            OpenApiParameter(
+                name="max_stops",
+                description="Maximum number of stops (0-2)",
+                type=int,
+                examples=[OpenApiExample("Example", value=1)],
+            ),
+            OpenApiParameter(
+                name="min_connection",
+                description="Minimum connection time in minutes",
+                type=int,
+                examples=[OpenApiExample("Example", value=60)],
+            ),
+            OpenApiParameter(
+                name="seats",
+                description="Number of seats needed on every flight",
+                type=int,
+                examples=[OpenApiExample("Example", value=2)],
+            ),
+            OpenApiParameter(
+                name="limit",
+                description="Maximum number of itineraries",
+                type=int,
+                examples=[OpenApiExample("Example", value=10)],
+            ),
+        ],
+        responses=ItinerarySerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="itineraries",
+    )
+    def itineraries(self, request: Request):
+        params = request.query_params
+        search = ItinerarySearchSerializer(
+            data={
+                key: value
+                for key, value in {
+                    "source": params.get("from"),
+                    "destination": params.get("to"),
+                    "date": params.get("date"),
+                    "max_stops": params.get("max_stops"),
+                    "min_connection": params.get("min_connection"),
+                    "seats": params.get("seats"),
+                    "limit": params.get("limit"),
+                }.items()
+                if value is not None
+            }
+        )
+        search.is_valid(raise_exception=True)
+        data = search.validated_data
+
+        now = timezone.now()
+        earliest_departure = now
+        latest_departure = now + timedelta(days=1)
+        if "date" in data:
+            day_start = timezone.make_aware(datetime.combine(data["date"], time.min))
+            earliest_departure = max(now, day_start)
+            latest_departure = day_start + timedelta(days=1)
+        min_connection = settings.ITINERARY_MIN_CONNECTION
+        if "min_connection" in data:
+            min_connection = timedelta(minutes=data["min_connection"])
+
+        airports = Airport.objects.all()
+        paths = flight_graph.get().search(
+            source_ids=substring_filter(
+                airports, data["source"], "name"
+            ).values_list("id", flat=True),
+            destination_ids=substring_filter(
+                airports, data["destination"], "name"
+            ).values_list("id", flat=True),
+            earliest_departure=earliest_departure,
+            latest_departure=latest_departure,
+            min_connection=min_connection,
+            max_layover=settings.ITINERARY_MAX_LAYOVER,
+            max_stops=data["max_stops"],
+            seats=data["seats"],
+            limit=data["limit"],
+        )
+
+        flights = Flight.objects.select_related(
+            "route__source", "route__destination", "airplane"
+        ).in_bulk({leg.flight_id for path in paths for leg in path})
+        itineraries = []
+        for path in paths:
+            if any(leg.flight_id not in flights for leg in path):
+                continue
+            legs = [flights[leg.flight_id] for leg in path]
+            itineraries.append(
+                {
+                    "departure_time": legs[0].departure_time,
+                    "arrival_time": legs[-1].arrival_time,
+                    "duration": str(
+                        legs[-1].arrival_time - legs[0].departure_time
+                    ),
+                    "stops": len(legs) - 1,
+                    "flights": legs,
+                }
+            )
+        serializer = ItinerarySerializer(itineraries, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        methods=["POST"],
+        summary="Validate a batch of flights",
+        description="Admin can check a list of proposed flights for crew "
+                    "members assigned to overlapping flights, both against "
+                    "the current schedule and within the batch, "
+                    "and get every conflict at once",
+        request=FlightBatchValidationSerializer,
+        responses=FlightBatchValidationSerializer,
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="validate-batch",
+    )
+    def validate_batch(self, request: Request):
+        serializer = FlightBatchValidationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        conflicts = find_crew_conflicts(serializer.validated_data["flights"])
+        return Response(
+            {"valid": not conflicts, "conflicts": conflicts},
+            status=status.HTTP_200_OK
+        )
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get seat availability of a flight",
+        description="User can get the sold seats and the number of "
+                    "tickets still available on a flight",
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="seats",
+    )
+    def seats(self, request: Request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    async def aseats(self, request: Request, pk=None):
+        return Response(self.get_serializer(await self.aget_object()).data)
+
+    @extend_schema(
+        methods=["POST"],
+        summary="Hold seats on a flight",
+        description="User can reserve seats for a short time and confirm "
+                    "them later by passing the hold token when creating an order",
+        request=SeatHoldSerializer,
+        responses={
+            status.HTTP_201_CREATED: SeatHoldSerializer,
+            status.HTTP_409_CONFLICT: None,
+        },
+    )
+    @extend_schema(
+        methods=["DELETE"],
+        summary="Release held seats",
+        description="User can release seats of his hold before it expires",
+        request=SeatHoldSerializer,
+        responses={status.HTTP_204_NO_CONTENT: None},
+    )
+    @action(
+        methods=["POST", "DELETE"],
+        detail=True,
+        url_path="hold",
+        permission_classes=[IsAuthenticated],
+    )
+    def hold(self, request: Request, pk=None):
+        flight = self.get_object()
+        serializer = SeatHoldSerializer(
+            data=request.data,
+            context={**self.get_serializer_context(), "flight": flight}
+        )
+        serializer.is_valid(raise_exception=True)
+        positions = [
+            (seat["row"], seat["seat"])
+            for seat in serializer.validated_data["seats"]
+        ]
+        inventory = get_seat_inventory()
+
+        token = serializer.validated_data.get("hold")
+
+        if request.method == "DELETE":
+            if token:
+                inventory.release(flight, positions, token)
+                inventory.unregister_hold(request.user.pk, flight.id, token)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        extends = token is not None
+        if not extends:
+            token = inventory.hold_token(request.user.pk)
+        if not inventory.register_hold(request.user.pk, flight.id, token):
+            return Response(
+                {"detail": "Too many active seat holds"},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not inventory.hold(flight, positions, token):
+            if not extends:
+                inventory.unregister_hold(request.user.pk, flight.id, token)
+            return Response(
+                {"detail": SEAT_TAKEN_MESSAGE},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            {
+                "hold": token,
+                "seats": serializer.validated_data["seats"],
+                "expires_in": inventory.hold_ttl,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+@extend_schema_view(
+    create=extend_schema(
+        summary="Create a flight schedule",
+        description="Admin can create a recurring flight schedule, "
+                    "its flights are generated right away",
+    ),
+    retrieve=extend_schema(
+        summary="Get a detailed info about specific flight schedule",
+        description="User can get a detailed info about specific flight schedule",
+    ),
+    update=extend_schema(
+        summary="Update specific flight schedule",
+        description="Admin can update a flight schedule, only the flights "
+                    "of affected dates are regenerated",
+    ),
+    partial_update=extend_schema(
+        summary="Partial update of specific flight schedule",
+        description="Admin can make a partial update of specific flight schedule",
+    ),
+    destroy=extend_schema(
+        summary="Delete a specific flight schedule",
+        description="Admin can delete a flight schedule, "
+                    "flights that were generated from it are kept",
+    ),
+)
+class FlightScheduleViewSet(SparseFieldsMixin, ModelViewSet):
+    queryset = FlightSchedule.objects.all()
+    serializer_class = FlightScheduleSerializer
+
+    def get_queryset(self):
+        queryset = self.queryset
+        route = self.request.query_params.get("route")
+        if route:
+            queryset = substring_filter(
+                queryset,
+                route,
+                "route__source__name",
+                "route__destination__name",
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return FlightScheduleListSerializer
+        return FlightScheduleSerializer
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get list of flight schedules",
+        description="User can get a list of recurring flight schedules",
+        parameters=[
+            OpenApiParameter(
+                name="route",
+                description="Filter by departure or arrival airport",
+                type=str,
+                examples=[OpenApiExample("Example", value="Paris")],
+            ),
+        ],
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 @extend_schema_view(
     create=extend_schema(
@@ -719,10 +1148,16 @@ class FlightViewSet(ModelViewSet):
         description="Admin can delete specific order or user can if it's user's own order",
     ),
 )
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(ExportMixin, SparseFieldsMixin, ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderPagination
     permission_classes = [IsAuthenticated]
+    export_fields = {
+        "id": "id",
+        "user": "user__email",
+        "created_at": "created_at",
+    }
 
     @staticmethod
     def params_to_ints(query_str):
@@ -738,13 +1173,21 @@ class OrderViewSet(ModelViewSet):
         if ticket_ids:
             ticket_ids = self.params_to_ints(ticket_ids)
             queryset = queryset.filter(tickets__id__in=ticket_ids)
+        if self.action == "export":
+            return queryset.distinct()
         if self.action in ("list", "retrieve"):
-            return queryset.select_related()
+            return queryset
         return queryset.filter(user=self.request.user).distinct()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def get_throttles(self):
+        throttles = super().get_throttles()
+        if self.action == "create":
+            throttles.append(OrderCreateThrottle())
+        return throttles
+
     def get_serializer_class(self):
         if self.action == "list":
             return OrderListSerializer
@@ -787,10 +1230,23 @@ class OrderViewSet(ModelViewSet):
         description="Admin can delete specific ticket or user can if it's user's own ticket",
     ),
 )
-class TicketViewSet(ModelViewSet):
+class TicketViewSet(ExportMixin, SparseFieldsMixin, ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
+    pagination_class = TicketPagination
     permission_classes = [IsAuthenticated]
+    export_fields = {
+        "id": "id",
+        "order": "order_id",
+        "user": "order__user__email",
+        "flight": "flight_id",
+        "source": "flight__route__source__name",
+        "destination": "flight__route__destination__name",
+        "departure_time": "flight__departure_time",
+        "row": "row",
+        "seat": "seat",
+        "ordered_at": "order__created_at",
+    }
 
     def get_queryset(self):
         user = self.request.user
@@ -807,12 +1263,12 @@ class TicketViewSet(ModelViewSet):
                 queryset = self.queryset.filter(id__in=ticket_id)
 
         if flight_info:
-            queryset = self.queryset.filter(
-                Q(flight__route__source__name__icontains=flight_info)
-                | Q(flight__route__destination__name__icontains=flight_info)
+            queryset = substring_filter(
+                queryset,
+                flight_info,
+                "flight__route__source__name",
+                "flight__route__destination__name",
             )
-        if self.action in ("list", "retrieve"):
-            return queryset.select_related()
         return queryset
 
     def get_serializer_class(self):
@@ -2,6 +2,8 @@
 ASGI config for airport_service project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with ``uvicorn airport_service.asgi:application``; it serves the
+read-heavy airport endpoints with async views (``airport_service.asgi_urls``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -12,5 +14,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_service.settings")
+os.environ.setdefault("ROOT_URLCONF", "airport_service.asgi_urls")
 
 application = get_asgi_application()
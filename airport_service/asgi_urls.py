@@ -0,0 +1,21 @@
+"""
+URL configuration of the ASGI deployment.
+
+Same routes as ``airport_service.urls``, except that the read-heavy
+airport endpoints are served by async views (``airport_api.async_urls``).
+"""
+
+from django.urls import include, path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path(
+        "api/airport/",
+        include("airport_api.async_urls", namespace="api_airport")
+    ),
+    *(
+        pattern for pattern in wsgi_urlpatterns
+        if getattr(pattern, "namespace", None) != "api_airport"
+    ),
+]
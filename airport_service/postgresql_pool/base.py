@@ -0,0 +1,139 @@
+"""PostgreSQL backend drawing its connections from a psycopg pool.
+
+Django 4.2 opens one connection per request unless ``CONN_MAX_AGE`` keeps
+it around per thread. This backend takes the connection from a
+``psycopg_pool.ConnectionPool`` instead and gives it back when Django
+closes it, the way ``OPTIONS["pool"]`` works from Django 5.1 on, so the
+setting carries over unchanged after an upgrade::
+
+    "ENGINE": "airport_service.postgresql_pool",
+    "CONN_MAX_AGE": 0,
+    "CONN_HEALTH_CHECKS": True,
+    "OPTIONS": {"pool": {"min_size": 2, "max_size": 8, "timeout": 10}},
+
+``OPTIONS["pool"]`` holds the ``ConnectionPool`` arguments. With
+``CONN_HEALTH_CHECKS`` the pool checks a connection before handing it
+out. The time requests wait for a connection is recorded in the
+metrics, next to the pool statistics.
+"""
+import os
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from airport_api.metrics import registry
+
+# Pools by alias, database name and process. The threads of a pool do
+# not survive a fork, so every preforked worker opens pools of its own.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def close_pools() -> None:
+    """Close the pools opened by this process"""
+    with _pools_lock:
+        pools = [
+            pool for (_, _, pid), pool in _pools.items() if pid == os.getpid()
+        ]
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool_options(self) -> dict:
+        if self.alias == NO_DB_ALIAS:
+            # Test database creation connects to the "postgres" database
+            return {}
+        return self.settings_dict["OPTIONS"].get("pool") or {}
+
+    @property
+    def pool_key(self) -> tuple:
+        return self.alias, self.settings_dict["NAME"], os.getpid()
+
+    @property
+    def pool(self):
+        if not self.pool_options:
+            return None
+        pool = _pools.get(self.pool_key)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(self.pool_key)
+                if pool is None:
+                    pool = _pools[self.pool_key] = self.create_pool()
+        return pool
+
+    def create_pool(self):
+        from psycopg_pool import ConnectionPool
+
+        kwargs = self.get_connection_params()
+        # Connections wait in the pool outside of a transaction, Django
+        # sets the configured autocommit after taking one
+        kwargs["autocommit"] = True
+        return ConnectionPool(
+            kwargs=kwargs,
+            check=(
+                ConnectionPool.check_connection
+                if self.settings_dict["CONN_HEALTH_CHECKS"]
+                else None
+            ),
+            name=self.alias,
+            open=True,
+            **self.pool_options,
+        )
+
+    def pool_stats(self) -> dict:
+        """``psycopg_pool`` statistics, empty until the pool is opened"""
+        pool = _pools.get(self.pool_key)
+        return pool.get_stats() if pool is not None else {}
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        started = time.perf_counter()
+        connection = pool.getconn()
+        registry.shard().record_pool_wait(
+            self.alias, time.perf_counter() - started
+        )
+
+        # The same setup as a new connection gets from the parent
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = IsolationLevel(
+                options.get("isolation_level", IsolationLevel.READ_COMMITTED)
+            )
+        except ValueError:
+            pool.putconn(connection)
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level "
+                f"{options['isolation_level']} specified. "
+                f"Use one of the psycopg.IsolationLevel values."
+            )
+        if "isolation_level" in options:
+            connection.isolation_level = self.isolation_level
+        connection.cursor_factory = (
+            base.ServerBindingCursor
+            if options.get("server_side_binding") is True
+            else base.Cursor
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pool_options:
+            return super()._close()
+        with self.wrap_database_errors:
+            # The pool rolls back an unfinished transaction, or discards
+            # the connection when it is broken
+            self.pool.putconn(self.connection)
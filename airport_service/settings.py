@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
+    "airport_api.metrics.MetricsMiddleware",
+    "airport_api.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -61,7 +63,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "airport_service.urls"
+# The ASGI entry point switches to airport_service.asgi_urls
+ROOT_URLCONF = os.getenv("ROOT_URLCONF", "airport_service.urls")
 
 TEMPLATES = [
     {
@@ -87,15 +90,37 @@ WSGI_APPLICATION = "airport_service.wsgi.application"
 
 DJANGO_ENV = os.getenv("DJANGO_ENV")
 
+DATABASE_POOL = os.getenv("DATABASE_POOL", "true").lower() == "true"
+
 if DJANGO_ENV == "production":
     DATABASES = {
         "default": {
-            "ENGINE": "django.db.backends.postgresql",
+            "ENGINE": (
+                "airport_service.postgresql_pool"
+                if DATABASE_POOL
+                else "django.db.backends.postgresql"
+            ),
             "NAME": os.environ.get("POSTGRES_DB"),
             "USER": os.environ.get("POSTGRES_USER"),
             "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
             "HOST": os.environ.get("POSTGRES_HOST"),
             "PORT": os.environ.get("POSTGRES_PORT"),
+            # Pooled connections go back to the pool after every request,
+            # without a pool a thread keeps its connection for a while
+            "CONN_MAX_AGE": 0 if DATABASE_POOL else int(
+                os.getenv("CONN_MAX_AGE", 60)
+            ),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", 2)),
+                    # At least the threads of a worker, see gunicorn.conf.py
+                    "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", 8)),
+                    "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),
+                    "max_idle": 10 * 60,
+                    "max_lifetime": 60 * 60,
+                },
+            } if DATABASE_POOL else {},
         }
     }
 else:
@@ -103,9 +128,88 @@ else:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+        },
+        # Local stand-in for a replica, used once DATABASE_REPLICAS names it
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db_replica.sqlite3",
+        },
+    }
+
+# Aliases of the databases replicating "default", see airport_api.replicas
+if DJANGO_ENV == "production":
+    DATABASE_REPLICAS = []
+    for index, host in enumerate(
+            filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")),
+            start=1
+    ):
+        DATABASES[f"replica_{index}"] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+        DATABASE_REPLICAS.append(f"replica_{index}")
+else:
+    DATABASE_REPLICAS = list(
+        filter(None, os.getenv("DATABASE_REPLICAS", "").split(","))
+    )
+
+DATABASE_ROUTERS = ["airport_api.replicas.PrimaryReplicaRouter"]
+
+# Seconds a client that changed data keeps reading from the primary
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 10))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+
+if DJANGO_ENV == "production":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": f"{REDIS_URL}/1",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         }
     }
 
+REFERENCE_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 60 * 60,
+    "L1_MAX_ENTRIES": 1024,
+    "L1_TIMEOUT": 5 * 60,
+    "PUBSUB_URL": REDIS_URL if DJANGO_ENV == "production" else None,
+}
+
+SEAT_INVENTORY = {
+    "BACKEND": (
+        "airport_api.inventory.RedisSeatInventory"
+        if DJANGO_ENV == "production"
+        else "airport_api.inventory.InMemorySeatInventory"
+    ),
+    "OPTIONS": {"url": f"{REDIS_URL}/2"} if DJANGO_ENV == "production" else {},
+    "HOLD_TTL": 5 * 60,
+    # Seats of an order are held this long until its transaction commits
+    "CLAIM_TTL": 30,
+    "SYNC_TTL": 10 * 60,
+    # Active holds per user and seats per hold
+    "MAX_HOLDS": 5,
+    "MAX_HOLD_SEATS": 10,
+}
+
+METRICS = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+    # Bearer token required by the metrics endpoint, which is closed
+    # without one unless explicitly made public
+    "TOKEN": os.getenv("METRICS_TOKEN"),
+    "PUBLIC": os.getenv("METRICS_PUBLIC", "false").lower() == "true",
+    # Shared directory where every worker process publishes its totals
+    "MULTIPROCESS_DIR": os.getenv("METRICS_MULTIPROCESS_DIR"),
+    "FLUSH_INTERVAL": 5,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -156,12 +260,52 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 5,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "airport_api.permissions.IsAdminAllORIsAuthenticatedOrReadOnly",
     ],
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_SCHEMA_CLASS": "airport_api.sparse_fields.SparseFieldsAutoSchema",
+    "DEFAULT_THROTTLE_CLASSES": [
+        "airport_api.throttling.AnonSlidingWindowThrottle",
+        "airport_api.throttling.UserSlidingWindowThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.getenv("THROTTLE_RATE_ANON", "100/day"),
+        "user": os.getenv("THROTTLE_RATE_USER", "1000/day"),
+        "order_create": os.getenv("THROTTLE_RATE_ORDER_CREATE", "30/hour"),
+        "register": os.getenv("THROTTLE_RATE_REGISTER", "10/hour"),
+    },
+    # Trusted proxies appending to X-Forwarded-For; with 0 the throttles
+    # identify anonymous clients by REMOTE_ADDR and ignore the header
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
+}
+
+# Request history of the throttles, shared by all workers in production
+RATE_LIMITER = {
+    "BACKEND": (
+        "airport_api.throttling.RedisRateLimiter"
+        if DJANGO_ENV == "production"
+        else "airport_api.throttling.InMemoryRateLimiter"
+    ),
+    "OPTIONS": {"url": f"{REDIS_URL}/3"} if DJANGO_ENV == "production" else {},
+    "ENABLED": os.getenv("THROTTLING_ENABLED", "true").lower() == "true",
+}
+
+CURSOR_PAGINATION_MAX_PAGE_SIZE = int(
+    os.getenv("CURSOR_PAGINATION_MAX_PAGE_SIZE", 100)
+)
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+ITINERARY_GRAPH_MAX_AGE = int(os.getenv("ITINERARY_GRAPH_MAX_AGE", 300))
+ITINERARY_MIN_CONNECTION = timedelta(minutes=45)
+ITINERARY_MAX_LAYOVER = timedelta(hours=24)
+
+# Users of access tokens, see user.authentication.CachedJWTAuthentication
+AUTH_USER_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 60)),
 }
 
 SIMPLE_JWT = {
@@ -181,18 +325,19 @@ SPECTACULAR_SETTINGS = {
         "defaultModelExpandDepth": 2,
         "defaultModelsExpandDepth": 2,
     },
-    "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
-    ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
 }
+
+# Written by the build_openapi_schema command and served at /api/schema/
+OPENAPI_SCHEMA_DIR = Path(os.getenv("OPENAPI_SCHEMA_DIR", BASE_DIR / "openapi"))
+
 CELERY_BROKER_URL = "redis://redis:6379"
 CELERY_RESULT_BACKEND = "redis://redis:6379"
 CELERY_TIMEZONE = "Europe/Kiev"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+FLYING_HOURS_BATCH_SIZE = int(os.environ.get("FLYING_HOURS_BATCH_SIZE", 500))
+
 CELERY_BEAT_SCHEDULE = {
     "update-flying-hours-every-5-minutes": {
         "task": "airport_api.tasks.update_flying_hours",
@@ -22,15 +22,18 @@ from django.urls import path, include
 from drf_spectacular.views import (
     SpectacularRedocView,
     SpectacularSwaggerView,
-    SpectacularAPIView,
 )
 
+from airport_api.metrics import metrics_view
+from airport_api.schema_artifact import SchemaArtifactView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/user/", include("user.urls", namespace="user")),
     path("__debug__/", include("debug_toolbar.urls")),
     path("api/airport/", include("airport_api.urls", namespace="api_airport")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("api/schema/", SchemaArtifactView.as_view(), name="schema"),
     path(
         "api/doc/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
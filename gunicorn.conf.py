@@ -0,0 +1,44 @@
+"""Production server: ``gunicorn airport_service.wsgi``.
+
+The master imports Django and the project once (``preload_app``) and
+freezes everything allocated so far before forking. Frozen objects are
+never visited by the garbage collector again, so the workers keep
+sharing those memory pages copy-on-write instead of each writing its
+own copy on the first collection.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(
+    os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+# Recycle workers now and then, spread out so they do not restart at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
+
+
+def when_ready(server):
+    """Runs in the master once the app is loaded, before the first fork"""
+    from django.db import connections
+
+    # A connection opened while loading must not be shared by the workers
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    server.log.info("Froze %d objects before forking", gc.get_freeze_count())
+
+
+def worker_exit(server, worker):
+    from airport_api.metrics import retire_process
+    from airport_service.postgresql_pool.base import close_pools
+
+    retire_process()
+    close_pools()
@@ -0,0 +1,143 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from airport_api.replicas import primary_reads
+
+
+def user_cache():
+    return caches[settings.AUTH_USER_CACHE["ALIAS"]]
+
+
+def version_key(user_id) -> str:
+    return f"auth-user:version:{user_id}"
+
+
+def entry_key(user_id, version: str) -> str:
+    return f"auth-user:{user_id}:{version}"
+
+
+def user_version(user_id) -> str:
+    """Current cache version of a user, created on first use"""
+    cache = user_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key(user_id), version, None):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+async def auser_version(user_id) -> str:
+    cache = user_cache()
+    version = await cache.aget(version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        if not await cache.aadd(version_key(user_id), version, None):
+            version = await cache.aget(version_key(user_id), version)
+    return version
+
+
+def invalidate_user(user_id) -> None:
+    """Bump the cache version of a user now and once the transaction commits.
+
+    A request that loaded the old row before the commit may still cache
+    it, but only under the version the second bump leaves behind.
+    """
+
+    def bump():
+        user_cache().set(version_key(user_id), uuid.uuid4().hex, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def check_user(user, validated_token) -> None:
+    """The checks ``JWTAuthentication.get_user`` runs on a loaded user"""
+    if not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+    ) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed(
+            _("The user's password has been changed."), code="password_changed"
+        )
+
+
+async def aget_jwt_user(authenticator: JWTAuthentication, validated_token):
+    """``JWTAuthentication.get_user`` with the lookup awaited"""
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(
+            _("Token contained no recognizable user identification")
+        )
+
+    try:
+        user = await authenticator.user_model.objects.aget(
+            **{api_settings.USER_ID_FIELD: user_id}
+        )
+    except authenticator.user_model.DoesNotExist:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    check_user(user, validated_token)
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that loads the user from the cache.
+
+    Users are cached by id and cache version for
+    ``AUTH_USER_CACHE["TIMEOUT"]`` seconds. Saving or deleting a user,
+    e.g. through ``ManageUserView`` or the admin, bumps the version, so
+    the next request loads the changed row from the primary database.
+    Bulk ``update()`` calls do not, their changes show once the entry
+    expires.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        cache = user_cache()
+        version = user_version(user_id)
+        user = cache.get(entry_key(user_id, version))
+        if user is None:
+            # A lagging replica would cache stale flags under the new version
+            with primary_reads():
+                user = super().get_user(validated_token)
+            cache.set(
+                entry_key(user_id, version),
+                user,
+                settings.AUTH_USER_CACHE["TIMEOUT"]
+            )
+            return user
+        check_user(user, validated_token)
+        return user
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return await aget_jwt_user(self, validated_token)
+        cache = user_cache()
+        version = await auser_version(user_id)
+        user = await cache.aget(entry_key(user_id, version))
+        if user is None:
+            with primary_reads():
+                user = await aget_jwt_user(self, validated_token)
+            await cache.aset(
+                entry_key(user_id, version),
+                user,
+                settings.AUTH_USER_CACHE["TIMEOUT"]
+            )
+            return user
+        check_user(user, validated_token)
+        return user
@@ -0,0 +1,7 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document the cached authentication like the plain JWT one"""
+
+    target_class = "user.authentication.CachedJWTAuthentication"
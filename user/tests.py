@@ -1,3 +1,131 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+ME_URL = reverse("user:manage_user")
+FLIGHT_URL = reverse("api_airport:flight-list")
+
+
+def user_queries(context) -> list[str]:
+    return [
+        query["sql"] for query in context.captured_queries
+        if 'FROM "user_user"' in query["sql"]
+    ]
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_is_loaded_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.assertEqual(len(user_queries(context)), 1)
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["email"], "test@test.com")
+        self.assertEqual(user_queries(context), [])
+
+    def test_update_through_manage_user_view_is_seen(self):
+        # Only staff may write with the default permission class
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"email": "new@test.com"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(ME_URL).data["email"], "new@test.com")
+
+    def test_staff_change_is_seen(self):
+        self.client.get(ME_URL)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        self.assertTrue(self.client.get(ME_URL).data["is_staff"])
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.delete()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+# Reads inside a transaction stay on the primary, so the tests cannot
+# run inside the transaction of a TestCase
+@override_settings(DATABASE_REPLICAS=["replica"])
+class CachedJWTAuthenticationReplicaTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="Testpass123"
+        )
+        self.user.save(using="replica")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_is_reloaded_from_primary(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+        # Saved on the primary only, as if the replica lagged behind
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ROOT_URLCONF="airport_service.asgi_urls")
+    def test_async_views_reload_user_from_primary(self):
+        async def get_flights():
+            return await AsyncClient().get(
+                FLIGHT_URL,
+                headers={
+                    "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+                },
+            )
+
+        self.assertEqual(async_to_sync(get_flights)().status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = async_to_sync(get_flights)()
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,7 +1,8 @@
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from airport_api.throttling import RegistrationThrottle
+from .authentication import CachedJWTAuthentication
 from .serializers import UserSerializer
 
 
@@ -9,10 +10,13 @@ class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
 
+    def get_throttles(self):
+        return [*super().get_throttles(), RegistrationThrottle()]
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def get_object(self):
         return self.request.user